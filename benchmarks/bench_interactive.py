@@ -0,0 +1,88 @@
+"""
+Messages per second through N concurrent interactive `cat` sessions, using
+one thread-backed InteractiveJob per session or a single InteractiveHub.
+
+    python benchmarks/bench_interactive.py --sessions 200 --messages 100
+
+With ``--backend inprocess`` the server runs in this process, see
+:py:mod:`xenon.testing`; note that its threads are then included in the
+thread count.
+"""
+
+import argparse
+import threading
+import time
+
+import xenon
+
+
+def round_trips(jobs, messages, payload):
+    """Send `messages` lines to every job, reading every reply."""
+    def talk(job):
+        for _ in range(messages):
+            job.write(payload)
+            job.stdout.readline(timeout=60)
+
+    threads = [threading.Thread(target=talk, args=(job,)) for job in jobs]
+    start = time.monotonic()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return time.monotonic() - start
+
+
+def run(mode, scheduler, sessions, messages, payload):
+    description = xenon.JobDescription(executable='cat')
+    if mode == 'hub':
+        with xenon.InteractiveHub(scheduler) as hub:
+            jobs = [hub.submit(description) for _ in range(sessions)]
+            for job in jobs:
+                job.started.result()
+            threads = threading.active_count()
+            elapsed = round_trips(jobs, messages, payload)
+    else:
+        jobs = [scheduler.submit_interactive_job(description)
+                for _ in range(sessions)]
+        for job in jobs:
+            job.stdout
+        threads = threading.active_count()
+        elapsed = round_trips(jobs, messages, payload)
+        for job in jobs:
+            job.close_stdin()
+            job.wait()
+
+    total = sessions * messages
+    print('{:8} sessions={:5} threads={:5} messages={:8} '
+          '{:10.0f} msg/s'.format(
+              mode, sessions, threads, total, total / elapsed))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--sessions', type=int, nargs='+',
+                        default=[1, 10, 50, 200])
+    parser.add_argument('--messages', type=int, default=100)
+    parser.add_argument('--size', type=int, default=64)
+    parser.add_argument('--mode', choices=['threads', 'hub'], nargs='+',
+                        default=['threads', 'hub'])
+    parser.add_argument('--backend', choices=['java', 'inprocess'],
+                        default='java')
+    parser.add_argument('--latency', type=float, default=0.0,
+                        help='simulated latency of the inprocess backend')
+    args = parser.parse_args()
+
+    payload = b'x' * (args.size - 1) + b'\n'
+    if args.backend == 'inprocess':
+        xenon.init(backend='inprocess', latency=args.latency,
+                   max_workers=2 * max(args.sessions) + 16)
+    else:
+        xenon.init()
+    with xenon.Scheduler.create(adaptor='local') as scheduler:
+        for sessions in args.sessions:
+            for mode in args.mode:
+                run(mode, scheduler, sessions, args.messages, payload)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""
+Benchmarks of the client, against the in-process server of
+:py:mod:`xenon.testing`, so that the cost of the server stays constant.
+Run them with ``pytest benchmarks``; see the README for storing and
+comparing results. With ``--latency``, ``--jitter`` or ``--bandwidth``, calls
+pass a :py:class:`xenon.testing.WanProxy` to measure the client over a
+slow connection.
+"""
+
+import os
+
+import pytest
+import xenon
+from xenon.testing import WanProxy
+
+
+def pytest_addoption(parser):
+    parser.addoption(
+        '--max-entries', type=int, default=100000,
+        help='largest directory tree to list in the listing benchmarks')
+    parser.addoption(
+        '--latency', type=float, default=0.0,
+        help='simulated round-trip time of every call in seconds')
+    parser.addoption(
+        '--jitter', type=float, default=0.0,
+        help='largest random extra delay of every call in seconds')
+    parser.addoption(
+        '--bandwidth', type=float, default=None,
+        help='simulated bandwidth per call in bytes per second')
+
+
+@pytest.fixture(scope='session')
+def xenon_server(pytestconfig):
+    server = xenon.init(do_not_exit=True, backend='inprocess',
+                        max_workers=128)
+    link = {name: pytestconfig.getoption(name)
+            for name in ('latency', 'jitter', 'bandwidth')}
+    proxy = None
+    if any(link.values()):
+        proxy = WanProxy(max_workers=128, **link).attach(server)
+    yield server
+    if proxy is not None:
+        proxy.close()
+    server.__exit__(None, None, None)
+
+
+@pytest.fixture(scope='session')
+def filesystem(xenon_server):
+    fs = xenon.FileSystem.create(adaptor='file')
+    yield fs
+    fs.close()
+
+
+@pytest.fixture(scope='session')
+def scheduler(xenon_server):
+    scheduler = xenon.Scheduler.create(adaptor='local')
+    yield scheduler
+    scheduler.close()
+
+
+@pytest.fixture(scope='session')
+def tree_factory(tmp_path_factory):
+    """Create directory trees of a given number of files, 1000 per
+    directory, once per session."""
+    trees = {}
+
+    def make(entries):
+        if entries not in trees:
+            root = tmp_path_factory.mktemp('tree-{}'.format(entries))
+            for i in range(0, entries, 1000):
+                directory = root / 'd{:04}'.format(i // 1000)
+                directory.mkdir()
+                for j in range(min(1000, entries - i)):
+                    with open(os.path.join(directory, str(j)), 'wb'):
+                        pass
+            trees[entries] = root
+        return trees[entries]
+
+    return make
@@ -0,0 +1,47 @@
+import subprocess
+import sys
+
+from xenon import (FileSystem, JobDescription, Path)
+from xenon.oop import make_request
+
+
+def test_exists(benchmark, filesystem, tmp_path):
+    path = Path(str(tmp_path))
+    assert benchmark(filesystem.exists, path)
+
+
+def test_get_job_status(benchmark, scheduler):
+    job = scheduler.submit_batch_job(JobDescription(executable='/bin/true'))
+    scheduler.wait_until_done(job=job, timeout=5000)
+    assert benchmark(scheduler.get_job_status, job).done
+
+
+def test_make_request(benchmark, filesystem):
+    method = next(m for m in FileSystem.__methods__() if m.name == 'exists')
+    method.field_name = FileSystem.__field_name__
+    path = Path('/tmp/some/path')
+    request = benchmark(make_request, filesystem, method, path)
+    assert request.path.path == '/tmp/some/path'
+
+
+def test_job_description(benchmark):
+    def build():
+        return JobDescription(
+            executable='/bin/echo', arguments=['a', 'b', 'c'],
+            working_directory='/tmp', queue_name='multi', stdout='out.txt',
+            max_runtime=10).__wrapped__
+
+    assert benchmark(build).queue_name == 'multi'
+
+
+def import_time(statement):
+    subprocess.run([sys.executable, '-c', statement], check=True)
+
+
+def test_import_baseline(benchmark):
+    """Interpreter start-up, to subtract from :py:func:`test_import`."""
+    benchmark.pedantic(import_time, args=('pass',), rounds=5)
+
+
+def test_import(benchmark):
+    benchmark.pedantic(import_time, args=('import xenon',), rounds=5)
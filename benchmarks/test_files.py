@@ -0,0 +1,49 @@
+import pytest
+
+from xenon import Path
+
+
+MB = 1 << 20
+
+
+@pytest.mark.parametrize('chunk_size', [4096, 65536, MB])
+def test_write_to_file(benchmark, filesystem, tmp_path, chunk_size):
+    chunk = b'x' * chunk_size
+    count = 16 * MB // chunk_size
+    path = Path(str(tmp_path / 'data'))
+    benchmark.extra_info['bytes'] = count * chunk_size
+
+    def setup():
+        if filesystem.exists(path):
+            filesystem.delete(path)
+
+    benchmark.pedantic(
+        filesystem.write_to_file, args=(path, [chunk] * count),
+        setup=setup, rounds=5)
+
+
+@pytest.mark.parametrize('size', [MB, 16 * MB, 64 * MB])
+def test_read_from_file(benchmark, filesystem, tmp_path, size):
+    (tmp_path / 'data').write_bytes(b'x' * size)
+    path = Path(str(tmp_path / 'data'))
+    benchmark.extra_info['bytes'] = size
+
+    def read():
+        return sum(len(chunk) for chunk in filesystem.read_from_file(path))
+
+    assert benchmark.pedantic(read, rounds=5) == size
+
+
+@pytest.mark.parametrize('entries', [10000, 100000, 1000000])
+def test_list_recursive(benchmark, request, filesystem, tree_factory,
+                        entries):
+    if entries > request.config.getoption('--max-entries'):
+        pytest.skip('larger than --max-entries')
+    root = Path(str(tree_factory(entries)))
+    benchmark.extra_info['entries'] = entries
+
+    def listing():
+        return sum(1 for _ in filesystem.list(root, recursive=True))
+
+    assert benchmark.pedantic(listing, rounds=3) == \
+        entries + (entries + 999) // 1000
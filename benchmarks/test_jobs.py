@@ -0,0 +1,28 @@
+from xenon import JobDescription
+
+
+def test_submit_batch_job(benchmark, scheduler):
+    description = JobDescription(executable='/bin/true')
+    jobs = []
+
+    def submit():
+        jobs.append(scheduler.submit_batch_job(description))
+
+    benchmark.pedantic(submit, rounds=50)
+    for job in jobs:
+        scheduler.wait_until_done(job=job, timeout=5000)
+
+
+def test_submit_many(benchmark, scheduler):
+    descriptions = [JobDescription(executable='/bin/true')] * 50
+    benchmark.extra_info['jobs'] = len(descriptions)
+    results = []
+
+    def submit():
+        results.append(scheduler.submit_many(descriptions))
+
+    benchmark.pedantic(submit, rounds=3)
+    for result in results:
+        assert result.count == len(descriptions)
+        for job in result.jobs:
+            scheduler.wait_until_done(job=job, timeout=5000)
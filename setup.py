@@ -55,6 +55,9 @@ setup(
     install_requires=['grpcio', 'grpcio-tools', 'pyxdg', 'pyopenssl'],
     extras_require={
         'test': ['pytest', 'flake8', 'coverage', 'pep8', 'tox'],
-        'develop': ['sphinx']
+        'bench': ['pytest', 'pytest-benchmark'],
+        'develop': ['sphinx'],
+        'table': ['numpy'],
+        'executor': ['cloudpickle']
     }
 )
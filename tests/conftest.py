@@ -1,3 +1,5 @@
+import os
+
 import pytest
 import xenon
 
@@ -5,7 +7,8 @@ import xenon
 @pytest.fixture(scope="session")
 def xenon_server(request):
     print("============== Starting Xenon-GRPC server ================")
-    m = xenon.init(do_not_exit=True, disable_tls=False, log_level='INFO')
+    m = xenon.init(do_not_exit=True, disable_tls=False, log_level='INFO',
+                   backend=os.environ.get('XENON_BACKEND', 'java'))
     yield m
     m.__exit__(None, None, None)
 
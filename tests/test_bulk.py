@@ -0,0 +1,60 @@
+import os
+
+from xenon import Path
+
+
+def make_tree(tmpdir, n=5):
+    root = Path(str(tmpdir)) / 'scratch'
+    for i in range(n):
+        for j in range(n):
+            d = root / 'd{}'.format(i) / 'e{}'.format(j)
+            os.makedirs(str(d))
+            open(str(d / 'file.txt'), 'w').close()
+    return root
+
+
+def test_delete_many(local_filesystem, tmpdir):
+    tmpdir = Path(str(tmpdir))
+    paths = [tmpdir / 'file{}.txt'.format(i) for i in range(10)]
+    for p in paths:
+        open(str(p), 'w').close()
+
+    result = local_filesystem.delete_many(paths + [tmpdir / 'missing'])
+    assert result.count == 10
+    assert list(result.errors) == [str(tmpdir / 'missing')]
+    assert os.listdir(str(tmpdir)) == []
+
+
+def test_delete_tree_parallel(local_filesystem, tmpdir):
+    root = make_tree(tmpdir)
+    result = local_filesystem.delete_tree(root)
+    assert result.strategy == 'parallel'
+    assert result.count == 5 + 25 + 25 + 1
+    assert result.errors == {}
+    assert result.rate > 0
+    assert not os.path.exists(str(root))
+
+
+def test_delete_tree_remote(local_filesystem, local_scheduler, tmpdir):
+    root = make_tree(tmpdir)
+    result = local_filesystem.delete_tree(
+        root, scheduler=local_scheduler, threshold=10)
+    assert result.strategy == 'remote'
+    assert result.estimate > 10
+    assert result.count is None and result.rate is None
+    assert not os.path.exists(str(root))
+
+
+def test_create_directories_many(local_filesystem, tmpdir):
+    root = Path(str(tmpdir))
+    paths = [root / 'jobs' / 'job{}'.format(i) / sub
+             for i in range(10) for sub in ('in', 'out')]
+    os.makedirs(str(root / 'jobs' / 'job0'))
+
+    result = local_filesystem.create_directories_many(paths)
+    assert result.errors == {}
+    assert result.count == 9 + 20
+    assert all(os.path.isdir(str(p)) for p in paths)
+
+    result = local_filesystem.create_directories_many(paths)
+    assert result.count == 0
@@ -0,0 +1,98 @@
+from xenon import (CopyMode, Path)
+from xenon.cache import MISSING
+
+
+def test_cache_exists(local_filesystem, tmpdir):
+    tmpdir = Path(str(tmpdir))
+    cache = local_filesystem.enable_cache(ttl=60)
+    filename = tmpdir / 'test.dat'
+
+    assert not local_filesystem.exists(filename)
+    assert not local_filesystem.exists(filename)
+    assert cache.hits == 1
+
+    local_filesystem.create_file(filename)
+    assert local_filesystem.exists(filename)
+    assert cache.hits == 2
+
+    local_filesystem.delete(filename)
+    assert not local_filesystem.exists(filename)
+    assert cache.hits == 3
+    assert cache.hit_rate == 0.75
+
+
+def test_cache_list(local_filesystem, tmpdir):
+    tmpdir = Path(str(tmpdir))
+    filename = tmpdir / 'test.dat'
+    with open(str(filename), 'wb') as f:
+        f.write(b'12345')
+
+    cache = local_filesystem.enable_cache(ttl=60)
+    assert len(list(local_filesystem.list(tmpdir, recursive=False))) == 1
+    assert local_filesystem.get_attributes(filename).size == 5
+    assert cache.stats()['hits'] == 1
+
+    local_filesystem.append_to_file(filename, [b'678'])
+    assert local_filesystem.get_attributes(filename).size == 8
+    assert cache.misses == 1
+
+
+def test_cache_relative(local_filesystem, tmpdir):
+    tmpdir = Path(str(tmpdir))
+    local_filesystem.set_working_directory(tmpdir)
+    cache = local_filesystem.enable_cache(ttl=60)
+
+    local_filesystem.create_directory(Path('subdir'))
+    assert local_filesystem.exists(tmpdir / 'subdir')
+    assert cache.hits == 1
+
+    local_filesystem.disable_cache()
+    assert local_filesystem.cache is None
+    assert local_filesystem.exists(Path('subdir'))
+
+
+def test_cache_partial_entries(local_filesystem, tmpdir):
+    tmpdir = Path(str(tmpdir))
+    filename = tmpdir / 'test.dat'
+    local_filesystem.create_file(filename)
+
+    cache = local_filesystem.enable_cache(ttl=60)
+    assert local_filesystem.exists(filename)
+    assert local_filesystem.get_attributes(filename).size == 0
+    assert (cache.hits, cache.misses) == (0, 2)
+    assert local_filesystem.get_attributes(filename).size == 0
+    assert (cache.hits, cache.misses) == (1, 2)
+
+
+def test_cache_copy(local_filesystem, tmpdir):
+    tmpdir = Path(str(tmpdir))
+    source = tmpdir / 'source.dat'
+    target = tmpdir / 'target.dat'
+    with open(str(source), 'wb') as f:
+        f.write(b'12345')
+
+    cache = local_filesystem.enable_cache(ttl=60)
+    operation = local_filesystem.copy(
+        source, local_filesystem, target, CopyMode.CREATE, False)
+    # an exists() racing with the copy caches the destination as missing
+    cache.put(cache.key(local_filesystem, target), MISSING)
+    assert local_filesystem.wait_until_done(operation).done
+    assert local_filesystem.exists(target)
+
+
+def test_cache_create_directories(local_filesystem, tmpdir):
+    root = Path(str(tmpdir)) / 'a'
+    cache = local_filesystem.enable_cache(ttl=60)
+    assert not local_filesystem.exists(root)
+    assert not local_filesystem.exists(root / 'b')
+
+    local_filesystem.create_directories(root / 'b' / 'c')
+    assert local_filesystem.exists(root)
+    assert local_filesystem.exists(root / 'b')
+    assert local_filesystem.exists(root / 'b' / 'c')
+
+    # entries below a directory are found even if the path between them
+    # is not cached
+    cache.put(str(root / 'b' / 'c' / 'd' / 'e'), MISSING)
+    cache.invalidate(str(root))
+    assert len(cache) == 0
@@ -0,0 +1,63 @@
+import math
+import operator
+
+import pytest
+
+from xenon import SchedulerExecutor
+from xenon.executor import (dumps, loads, frame_stream, parse_frames)
+
+
+def test_frames_roundtrip():
+    obj = {'data': bytearray(b'x' * 3000), 'n': 42}
+    data = b''.join(frame_stream(dumps(obj)))
+    assert loads(parse_frames(data)) == obj
+
+
+def test_executor_submit(local_scheduler, local_filesystem, tmpdir):
+    with SchedulerExecutor(local_scheduler, local_filesystem,
+                           str(tmpdir.join('executor')),
+                           python='python3') as executor:
+        executor.monitor.min_interval = 0.05
+        future = executor.submit(math.factorial, 10)
+        failing = executor.submit(operator.truediv, 1, 0)
+
+        assert future.result(timeout=30) == 3628800
+        with pytest.raises(ZeroDivisionError):
+            failing.result(timeout=30)
+
+    assert tmpdir.join('executor').listdir() == []
+
+
+def test_executor_map(local_scheduler, local_filesystem, tmpdir):
+    with SchedulerExecutor(local_scheduler, local_filesystem,
+                           str(tmpdir.join('executor'))) as executor:
+        executor.monitor.min_interval = 0.05
+        results = executor.map(pow, range(10), range(10), chunksize=3)
+        assert list(results) == [pow(i, i) for i in range(10)]
+
+
+def test_executor_map_staging_error(local_scheduler, local_filesystem, tmpdir,
+                                    monkeypatch):
+    executor = SchedulerExecutor(local_scheduler, local_filesystem,
+                                 str(tmpdir.join('executor')))
+    executor.monitor.min_interval = 0.05
+    stage = executor._stage
+    staged = []
+
+    def stage_two(calls):
+        if len(staged) == 2:
+            raise OSError("disk full")
+        staged.append(calls)
+        return stage(calls)
+
+    monkeypatch.setattr(executor, '_stage', stage_two)
+    results = executor.map(abs, [-1, -2, -3, -4])
+    assert [next(results), next(results)] == [1, 2]
+    with pytest.raises(OSError):
+        next(results)
+
+    thread = executor.monitor._thread
+    executor.shutdown(wait=False)
+    thread.join(timeout=10)
+    assert not thread.is_alive()
+    assert executor._futures == set()
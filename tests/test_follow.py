@@ -0,0 +1,39 @@
+from xenon import (JobDescription, JobMonitor)
+
+
+def test_follow_output(local_scheduler, local_filesystem, tmpdir):
+    description = JobDescription(
+        executable='/bin/bash',
+        arguments=['-c', 'for i in 1 2 3; do echo $i; echo e$i >&2; '
+                         'sleep 0.3; done'],
+        working_directory=str(tmpdir), stdout='out.txt', stderr='err.txt')
+    job = local_scheduler.submit_batch_job(description)
+
+    chunks = list(local_scheduler.follow_output(
+        job, local_filesystem, description))
+
+    stdout = b''.join(data for name, data in chunks if name == 'stdout')
+    stderr = b''.join(data for name, data in chunks if name == 'stderr')
+    assert stdout == b'1\n2\n3\n'
+    assert stderr == b'e1\ne2\ne3\n'
+
+
+def test_follow_output_shared_monitor(
+        local_scheduler, local_filesystem, tmpdir):
+    descriptions = [JobDescription(
+        executable='/bin/bash',
+        arguments=['-c', 'echo a{0}; sleep 0.2; echo b{0}'.format(i)],
+        stdout=str(tmpdir.join('out-{}.txt'.format(i))))
+        for i in range(4)]
+    jobs = local_scheduler.submit_many(descriptions).jobs
+
+    with JobMonitor(local_scheduler, min_interval=0.05) as monitor:
+        outputs = [local_scheduler.follow_output(
+            job, local_filesystem, d, monitor=monitor)
+            for job, d in zip(jobs, descriptions)]
+        for i, output in enumerate(outputs):
+            assert b''.join(data for _, data in output) == \
+                'a{0}\nb{0}\n'.format(i).encode()
+            assert output.status.done
+
+    assert len(monitor._followers) == 1
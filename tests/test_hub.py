@@ -0,0 +1,31 @@
+from xenon import (JobDescription, InteractiveHub)
+
+
+def test_interactive_hub(local_scheduler):
+    with InteractiveHub(local_scheduler, max_pending_writes=4) as hub:
+        jobs = [hub.submit(JobDescription(executable='/bin/cat'))
+                for _ in range(20)]
+        for i, job in enumerate(jobs):
+            job.write('{}\n'.format(i).encode())
+        replies = [job.stdout.readline(timeout=10) for job in jobs]
+        assert replies == ['{}\n'.format(i).encode() for i in range(20)]
+        assert len({job.started.result(10).id for job in jobs}) == 20
+
+        chunks = []
+        job = hub.submit(
+            JobDescription(executable='/bin/bash',
+                           arguments=['-c', 'echo out; echo err >&2']),
+            on_stderr=lambda job, data: chunks.append(data))
+        assert job.wait(10)
+        assert job.stdout.read(timeout=1) == b'out\n'
+        assert chunks == [b'err\n']
+
+    assert all(job.finished.done() for job in jobs)
+
+
+def test_interactive_hub_error(local_scheduler):
+    with InteractiveHub(local_scheduler) as hub:
+        job = hub.submit(JobDescription(arguments=['no executable']))
+        assert job.wait(10)
+        assert job.error is not None
+        assert job.stdout.read(timeout=1) == b''
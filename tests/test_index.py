@@ -0,0 +1,71 @@
+import os
+import time
+
+from xenon import (Path, RemoteIndex)
+
+
+def write(path, size, age=0):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+    if age:
+        t = time.time() - age
+        os.utime(path, (t, t))
+
+
+def test_remote_index(local_filesystem, tmpdir):
+    root = Path(str(tmpdir)) / 'archive'
+    write(str(root / 'run1' / 'out.nc'), 2000, age=40 * 86400)
+    write(str(root / 'run1' / 'log.txt'), 10)
+    write(str(root / 'run2' / 'deep' / 'out.nc'), 100)
+
+    index = RemoteIndex(local_filesystem, str(tmpdir / 'index.db'))
+    assert index.crawl(root) == 6
+    assert index.roots == [str(root)]
+
+    found = index.query(pattern='*.nc', min_size=1000, older_than=30 * 86400)
+    assert [e.path for e in found] == [str(root / 'run1' / 'out.nc')]
+
+    found = index.query(pattern='*/run2/*', type='f')
+    assert [e.name for e in found] == ['out.nc']
+
+    largest = index.query(type='f', order_by='-size', limit=2)
+    assert [e.size for e in largest] == [2000, 100]
+    index.close()
+
+
+def test_remote_index_refresh(local_filesystem, tmpdir):
+    root = Path(str(tmpdir)) / 'archive'
+    write(str(root / 'a' / 'one.dat'), 1)
+    write(str(root / 'b' / 'two.dat'), 2)
+
+    with RemoteIndex(local_filesystem, ':memory:') as index:
+        index.crawl(root)
+        assert index.refresh() == 0
+
+        # make sure the modification time of the directory changes
+        time.sleep(0.01)
+        write(str(root / 'a' / 'new' / 'three.dat'), 3)
+        os.remove(str(root / 'b' / 'two.dat'))
+        os.rmdir(str(root / 'b'))
+
+        assert index.refresh() == 2
+        assert sorted(e.name for e in index.query(type='f')) == \
+            ['one.dat', 'three.dat']
+        assert index.query(under=root / 'b') == []
+
+
+def test_remote_index_patterns(local_filesystem, tmpdir):
+    root = Path(str(tmpdir)) / 'archive'
+    for name in ['x.tar.gz', 'y.gz', '.gz', 'z.tar']:
+        write(str(root / name), 1)
+
+    with RemoteIndex(local_filesystem, ':memory:') as index:
+        index.crawl(root)
+
+        def names(pattern):
+            return sorted(e.name for e in index.query(pattern=pattern))
+
+        assert names('*.tar.gz') == ['x.tar.gz']
+        assert names('*.gz') == ['.gz', 'x.tar.gz', 'y.gz']
+        assert names('*.tar') == ['z.tar']
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+
+from xenon import JobDescription
+
+
+def test_interactive_job(local_scheduler):
+    job = local_scheduler.submit_interactive_job(
+        JobDescription(executable='/bin/bash',
+                       arguments=['-c', 'cat; echo done >&2']))
+
+    for line in [b'Mystic noble gas,\n', b'Heavy yet fleeting from grasp,\n']:
+        job.write(line)
+        assert job.stdout.readline(timeout=5) == line
+
+    with pytest.raises(TimeoutError):
+        job.stdout.readline(timeout=0.1)
+
+    job.write(b'no newline')
+    job.close_stdin()
+    assert job.stdout.read(timeout=5) == b'no newline'
+    assert job.stderr.read(timeout=5) == b'done\n'
+    assert job.wait(5)
+    with pytest.raises(ValueError):
+        job.write(b'too late')
+
+
+def test_interactive_job_raw_stream(local_scheduler):
+    job, stream = local_scheduler.submit_interactive_job(
+        description=JobDescription(executable='/bin/echo',
+                                   arguments=['hello']),
+        stdin_stream=iter([]))
+    assert b''.join(r.stdout for r in stream) == b'hello\n'
+
+
+def test_interactive_job_backpressure(local_scheduler):
+    job = local_scheduler.submit_interactive_job(
+        JobDescription(executable='/bin/sleep', arguments=['30']),
+        max_pending_writes=2)
+
+    with pytest.raises(TimeoutError):
+        for _ in range(1000):
+            job.write(b'x' * (1 << 20), timeout=0.5)
+
+    local_scheduler.cancel_job(job.job)
+    assert job.wait(10)
+
+
+def test_interactive_job_async(local_scheduler):
+    job = local_scheduler.submit_interactive_job(
+        JobDescription(executable='/bin/cat'))
+
+    async def talk():
+        lines = []
+        for i in range(3):
+            await job.awrite('{}\n'.format(i).encode())
+            lines.append(await job.stdout.areadline())
+        job.close_stdin()
+        async for line in job.stdout:
+            lines.append(line)
+        return lines
+
+    loop = asyncio.new_event_loop()
+    try:
+        assert loop.run_until_complete(talk()) == [b'0\n', b'1\n', b'2\n']
+    finally:
+        loop.close()
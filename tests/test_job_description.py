@@ -0,0 +1,71 @@
+import copy
+import pickle
+
+import pytest
+
+from xenon import (JobDescription, Path)
+
+
+def test_job_description_cached():
+    d = JobDescription(executable='/bin/echo', arguments=['a', 'b'])
+    message = d.__wrapped__
+    assert d.__wrapped__ is message
+    assert list(message.arguments) == ['a', 'b']
+
+    d.arguments = ['c']
+    assert d.__wrapped__ is not message
+    assert list(d.__wrapped__.arguments) == ['c']
+    assert d.arguments == ['c']
+
+    d.arguments.append('d')
+    assert list(d.__wrapped__.arguments) == ['c', 'd']
+
+    with pytest.raises(AttributeError):
+        d.no_such_field = 1
+    with pytest.raises(AttributeError):
+        JobDescription(no_such_field=1)
+    with pytest.raises(AttributeError):
+        d.queue_name
+
+
+def test_job_description_working_directory():
+    d = JobDescription(executable='/bin/true', working_directory=Path('/tmp'))
+    assert d.__wrapped__.working_directory == '/tmp'
+    assert isinstance(d.working_directory, Path)
+
+
+def test_job_description_copy():
+    d = JobDescription(executable='/bin/echo', arguments=['a'],
+                       queue_name='short')
+    e = d.copy(arguments=['b', 'c'], name='copy')
+
+    assert d.arguments == ['a']
+    assert e.arguments == ['b', 'c']
+    assert e.queue_name == 'short'
+    assert e.name == 'copy'
+    assert list(e.__wrapped__.arguments) == ['b', 'c']
+    assert e.__wrapped__.queue_name == 'short'
+    assert e.__wrapped__.name == 'copy'
+    assert d.__wrapped__.name == ''
+
+    with pytest.raises(AttributeError):
+        d.copy(no_such_field=1)
+
+
+def test_job_description_pickle():
+    d = JobDescription(executable='/bin/echo', arguments=['a'])
+    d.__wrapped__
+    for e in [pickle.loads(pickle.dumps(d)), copy.deepcopy(d)]:
+        assert e.arguments == ['a']
+        assert e.__wrapped__ == d.__wrapped__
+        e.arguments.append('b')
+        assert list(e.__wrapped__.arguments) == ['a', 'b']
+    assert d.arguments == ['a']
+
+    d = JobDescription(executable='/bin/echo', environment={'A': '1'},
+                       scheduler_arguments=['-x'])
+    for e in [pickle.loads(pickle.dumps(d)), copy.deepcopy(d)]:
+        assert e.environment == {'A': '1'}
+        assert e.scheduler_arguments == ['-x']
+        e.environment['B'] = '2'
+    assert d.environment == {'A': '1'}
@@ -0,0 +1,76 @@
+import time
+
+import pytest
+
+from xenon import (Job, JobDescription, JobJournal, JobMonitor)
+
+
+def test_journal_resume(local_scheduler, tmpdir):
+    path = str(tmpdir.join('campaign.db'))
+    sleeper = JobDescription(executable='/bin/sleep', arguments=['30'])
+    quick = JobDescription(executable='/bin/true')
+
+    journal = JobJournal(path, local_scheduler)
+    running, finished = journal.submit_many([sleeper, quick]).jobs
+    journal.record_submissions([Job('gone')], [quick])
+    local_scheduler.wait_until_done(job=finished, timeout=5000)
+    journal.close()
+
+    stranger = local_scheduler.submit_batch_job(sleeper)
+    try:
+        with JobJournal(path, local_scheduler) as journal, \
+                JobMonitor(local_scheduler) as monitor:
+            assert journal.description(running).arguments == ['30']
+            result = journal.resume(monitor)
+            assert [j.id for j in result.running] == [running.id]
+            assert [j.id for j in result.finished] == [finished.id]
+            assert [j.id for j in result.lost] == ['gone']
+            assert stranger.id in [j.id for j in result.unknown]
+            assert len(monitor) == 1
+
+            assert journal.status(finished)[1:3] == (1, 0)
+            assert journal.status(Job('gone'))[1] == 1
+            assert [j.id for j in journal.unfinished()] == [running.id]
+    finally:
+        local_scheduler.cancel_job(job=running)
+        local_scheduler.cancel_job(job=stranger)
+
+
+def test_journal_records_polled_statuses(local_scheduler, tmpdir):
+    journal = JobJournal(str(tmpdir.join('campaign.db')), local_scheduler,
+                         flush_interval=0)
+    with JobMonitor(local_scheduler, min_interval=0.05) as monitor:
+        journal.attach(monitor)
+        jobs = journal.submit_many([
+            JobDescription(executable='/bin/bash',
+                           arguments=['-c', 'exit {}'.format(i)])
+            for i in range(3)]).jobs
+        for job in jobs:
+            monitor.watch(job)
+        assert monitor.wait(10)
+
+    assert [journal.status(job)[1:3] for job in jobs] == \
+        [(1, 0), (1, 1), (1, 2)]
+    assert journal.unfinished() == []
+    journal.close()
+
+
+def test_journal_interrupted_batch(local_scheduler, tmpdir):
+    path = str(tmpdir.join('campaign.db'))
+
+    def descriptions():
+        for _ in range(2):
+            yield JobDescription(executable='/bin/true')
+        raise KeyboardInterrupt
+
+    journal = JobJournal(path, local_scheduler)
+    with pytest.raises(KeyboardInterrupt):
+        journal.submit_many(descriptions(), max_in_flight=1)
+
+    deadline = time.monotonic() + 5
+    while len(journal.unfinished()) < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    journal.close()
+
+    with JobJournal(path, local_scheduler) as journal:
+        assert len(journal.unfinished()) == 2
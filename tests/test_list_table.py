@@ -0,0 +1,83 @@
+import os
+import time
+
+from xenon import (Path, PathTable)
+from xenon.listing import (IS_DIRECTORY, IS_REGULAR)
+from xenon.oop import unwrap
+from xenon.proto import xenon_pb2
+
+
+def make_tree(tmpdir):
+    tmpdir = Path(str(tmpdir))
+    sizes = {'a/small.txt': 10, 'a/b/big.dat': 1000, 'a/b/medium.dat': 100,
+             'top.txt': 1}
+    for name, size in sizes.items():
+        os.makedirs(str((tmpdir / name).parent), exist_ok=True)
+        with open(str(tmpdir / name), 'wb') as f:
+            f.write(b'x' * size)
+    return tmpdir, sizes
+
+
+def test_list_table(local_filesystem, tmpdir):
+    tmpdir, sizes = make_tree(tmpdir)
+    table = local_filesystem.list_table(tmpdir, recursive=True)
+
+    assert isinstance(table, PathTable)
+    assert len(table) == len(sizes) + 2
+    assert sorted(table.paths()) == sorted(
+        [str(tmpdir / 'a'), str(tmpdir / 'a/b')] +
+        [str(tmpdir / name) for name in sizes])
+
+    assert table.du() == sum(sizes.values())
+    du = table.du_by_directory()
+    assert du[str(tmpdir)] == sum(sizes.values())
+    assert du[str(tmpdir / 'a' / 'b')] == 1100
+
+    largest = [(str(path), size) for path, size in table.largest(2)]
+    assert largest == [(str(tmpdir / 'a/b/big.dat'), 1000),
+                       (str(tmpdir / 'a/b/medium.dat'), 100)]
+
+    assert len(table.where_flags(IS_DIRECTORY)) == 2
+    assert len(table.where_flags(IS_REGULAR)) == 4
+    assert len(table.files()) == 4
+
+
+def test_list_table_not_recursive(local_filesystem, tmpdir):
+    tmpdir, sizes = make_tree(tmpdir)
+    table = local_filesystem.list_table(tmpdir, recursive=False)
+    assert sorted(table.name(i) for i in range(len(table))) == \
+        ['a', 'top.txt']
+
+
+def test_list_table_age(local_filesystem, tmpdir):
+    tmpdir, sizes = make_tree(tmpdir)
+    old = time.time() - 3600
+    os.utime(str(tmpdir / 'top.txt'), (old, old))
+
+    table = local_filesystem.list_table(tmpdir)
+    assert list(table.older_than(60).paths()) == [str(tmpdir / 'top.txt')]
+    assert len(table.newer_than(60)) == len(table) - 1
+
+
+def test_list_table_edge_cases(local_filesystem, tmpdir):
+    tmpdir, sizes = make_tree(tmpdir)
+    table = local_filesystem.list_table(tmpdir, recursive=True)
+    assert table.largest(0) == []
+
+    size = table.column('size')
+    files = table.files()
+    directories = list(table.directories)
+    files.extend(unwrap(a) for a in local_filesystem.list(
+        tmpdir / 'a', recursive=False))
+    files.append(xenon_pb2.PathAttributes(
+        path=xenon_pb2.Path(path='/elsewhere/x')))
+    assert len(files) == 7
+    assert table.directories == directories
+    assert list(size) == list(table.size)
+
+    relative = PathTable()
+    relative.append(xenon_pb2.PathAttributes(
+        path=xenon_pb2.Path(path='name.txt'), size=3))
+    relative.append(xenon_pb2.PathAttributes(
+        path=xenon_pb2.Path(path='/root.txt'), size=3))
+    assert list(relative.paths()) == ['name.txt', '/root.txt']
@@ -0,0 +1,69 @@
+from xenon import (JobDescription, JobMemo)
+from xenon.memo import MemoizedJob
+
+
+def test_job_memo(local_scheduler, local_filesystem, tmpdir):
+    source = tmpdir.join('in.txt')
+    source.write('hello\n')
+    target = str(tmpdir.join('out.txt'))
+    description = JobDescription(
+        executable='/bin/cp', arguments=[str(source), target])
+    memo_file = str(tmpdir.join('jobs.memo'))
+
+    memo = JobMemo(local_scheduler, local_filesystem, memo_file)
+    job = memo.submit(description, inputs=[source], outputs=[target])
+    assert not isinstance(job, MemoizedJob)
+    status = local_scheduler.wait_until_done(job=job, timeout=5000)
+    memo.record(job, status)
+
+    memo = JobMemo(local_scheduler, local_filesystem, memo_file)
+    again = memo.submit(description, inputs=[source], outputs=[target])
+    assert isinstance(again, MemoizedJob)
+    assert again.id == job.id and again.exit_code == 0
+
+    source.write('changed\n')
+    result = memo.submit_many([(description, [source], [target])])
+    assert result.memoized == 0
+    assert not isinstance(result.jobs[0], MemoizedJob)
+
+
+def test_job_memo_missing_output(local_scheduler, local_filesystem, tmpdir):
+    target = tmpdir.join('out.txt')
+    description = JobDescription(
+        executable='/bin/touch', arguments=[str(target)])
+    memo = JobMemo(local_scheduler, local_filesystem,
+                   str(tmpdir.join('jobs.memo')))
+
+    job = memo.submit(description, outputs=[target])
+    local_scheduler.wait_until_done(job=job, timeout=5000)
+    assert memo.submit(description, outputs=[target]).id == job.id
+
+    target.remove()
+    assert memo.submit(description, outputs=[target]).id != job.id
+
+
+def test_job_memo_lost_job(local_scheduler, local_filesystem, tmpdir):
+    target = tmpdir.join('out.txt')
+    description = JobDescription(
+        executable='/bin/touch', arguments=[str(target)])
+    memo_file = str(tmpdir.join('jobs.memo'))
+    memo = JobMemo(local_scheduler, local_filesystem, memo_file)
+
+    job = memo.submit(description, outputs=[target])
+    local_scheduler.wait_until_done(job=job, timeout=5000)
+    assert len(tmpdir.join('jobs.memo').readlines()) == 1
+
+    # a scheduler that was restarted no longer knows the job
+    key = memo.key(description, [])
+    with open(memo_file, 'a') as f:
+        f.write(memo._line(key, dict(memo.entries[key], job='lost-1')))
+
+    memo = JobMemo(local_scheduler, local_filesystem, memo_file)
+    again = memo.submit(description, outputs=[target])
+    assert isinstance(again, MemoizedJob)
+    assert again.id == 'lost-1' and again.exit_code is None
+    assert len(tmpdir.join('jobs.memo').readlines()) == 2
+
+    target.remove()
+    assert not isinstance(
+        memo.submit(description, outputs=[target]), MemoizedJob)
@@ -0,0 +1,55 @@
+from concurrent.futures import as_completed
+
+from xenon import (JobDescription, JobMonitor)
+
+
+def test_job_monitor(local_scheduler, monkeypatch):
+    jobs = local_scheduler.submit_many([
+        JobDescription(executable='/bin/bash',
+                       arguments=['-c', 'sleep 0.{}; exit {}'.format(i, i)])
+        for i in range(5)]).jobs
+
+    batches = []
+    get_job_statuses = local_scheduler.get_job_statuses
+
+    def counting_get_job_statuses(jobs):
+        batches.append(len(jobs))
+        return get_job_statuses(jobs=jobs)
+
+    monkeypatch.setattr(
+        local_scheduler, 'get_job_statuses', counting_get_job_statuses)
+    monkeypatch.setattr(
+        local_scheduler, 'get_job_status', None)
+
+    transitions = []
+    with JobMonitor(local_scheduler, min_interval=0.05) as monitor:
+        monitor.on_transition(
+            lambda job, status, previous:
+                transitions.append((job.id, previous, status.state)))
+        futures = {monitor.watch(job): i for i, job in enumerate(jobs)}
+        exit_codes = {futures[f]: f.result(timeout=10).exit_code
+                      for f in as_completed(futures, timeout=10)}
+
+    assert exit_codes == {i: i for i in range(5)}
+    assert len(monitor) == 0
+    # every poll is a single request for all jobs still tracked
+    assert len(batches) == monitor.requests <= monitor.polls
+    assert max(batches) > 1
+    for job in jobs:
+        assert (job.id, None, 'RUNNING') in transitions or \
+            (job.id, None, 'DONE') in transitions
+
+
+def test_job_monitor_callback(local_scheduler):
+    job = local_scheduler.submit_batch_job(
+        JobDescription(executable='/bin/true'))
+    states = []
+    monitor = JobMonitor(local_scheduler)
+    future = monitor.watch(
+        job, lambda job, status, previous: states.append(status.state))
+
+    while not future.done():
+        monitor.poll()
+
+    assert future.result().done
+    assert states[-1] == 'DONE'
@@ -0,0 +1,33 @@
+from xenon import JobDescription
+from xenon.packing import results
+
+
+def test_submit_packed(local_scheduler, local_filesystem, tmpdir):
+    tasks = [JobDescription(executable='/bin/bash',
+                            arguments=['-c', 'echo {0}; exit {0}'.format(i)])
+             for i in range(7)]
+    tasks.append(JobDescription(
+        executable='/bin/bash', arguments=['-c', 'echo own'],
+        working_directory=str(tmpdir), stdout='own.txt'))
+    tasks.append(JobDescription(executable='/does/not/exist'))
+
+    packs = local_scheduler.submit_packed(
+        tasks, cores_per_job=2, tasks_per_job=3,
+        working_directory=str(tmpdir.join('packs')),
+        filesystem=local_filesystem)
+
+    assert [p.count for p in packs] == [3, 3, 3]
+    assert [p.offset for p in packs] == [0, 3, 6]
+
+    outcome = results(packs)
+    assert [r.exit_code for r in outcome[:7]] == list(range(7))
+    assert [r.stdout for r in outcome[:7]] == \
+        ['{}\n'.format(i).encode() for i in range(7)]
+    assert outcome[7].stdout == b'own\n'
+    assert tmpdir.join('own.txt').read() == 'own\n'
+    assert outcome[8].exit_code is None
+    assert b'FileNotFoundError' in outcome[8].stderr
+
+    for pack in packs:
+        pack.cleanup()
+    assert tmpdir.join('packs').listdir() == []
@@ -0,0 +1,36 @@
+import pytest
+
+from xenon import TaskFarm
+from xenon.pilot import WorkerLost
+
+
+def test_task_farm(local_scheduler):
+    with TaskFarm(local_scheduler, workers=2, slots=2) as farm:
+        futures = [farm.submit('/bin/echo', [str(i)]) for i in range(20)]
+        failing = farm.submit('/bin/bash', ['-c', 'echo oops >&2; exit 3'])
+        piped = farm.submit('/bin/cat', stdin=b'hello')
+        environment = farm.submit('/bin/bash', ['-c', 'echo $GREETING'],
+                                  environment={'GREETING': 'hi'})
+
+        outputs = [f.result(timeout=30).stdout for f in futures]
+        assert outputs == ['{}\n'.format(i).encode() for i in range(20)]
+        assert failing.result(timeout=30) == (3, b'', b'oops\n')
+        assert piped.result(timeout=30).stdout == b'hello'
+        assert environment.result(timeout=30).stdout == b'hi\n'
+
+    assert all(not w.thread.is_alive() for w in farm.workers)
+
+
+def test_task_farm_worker_lost(local_scheduler):
+    farm = TaskFarm(local_scheduler, workers=1)
+    future = farm.submit('/bin/sleep', ['30'])
+    worker = farm.workers[0]
+    while worker.job is None:
+        worker.thread.join(0.01)
+
+    local_scheduler.cancel_job(worker.job)
+    with pytest.raises(WorkerLost):
+        future.result(timeout=30)
+    with pytest.raises(WorkerLost):
+        farm.submit('/bin/true')
+    farm.shutdown()
@@ -0,0 +1,77 @@
+import pytest
+
+from xenon import (JobDescription, SchedulerPool)
+
+
+def test_scheduler_pool(local_scheduler):
+    sleeper = JobDescription(executable='/bin/sleep', arguments=['30'])
+    pool = SchedulerPool()
+    multi = pool.add(local_scheduler, 'multi', max_jobs=3, slots=2)
+    unlimited = pool.add(local_scheduler, 'unlimited', max_jobs=2)
+
+    jobs = []
+    try:
+        with pool:
+            for _ in range(5):
+                jobs.append(pool.submit_batch_job(sleeper))
+            with pytest.raises(TimeoutError):
+                pool.submit_batch_job(sleeper, timeout=0.1)
+
+            assert [j.member.queue for j in jobs] == \
+                ['multi', 'multi', 'unlimited', 'multi', 'unlimited']
+
+            pool.sample()
+            assert (multi.jobs, multi.submitted) == (3, 0)
+            assert (unlimited.jobs, unlimited.submitted) == (2, 0)
+            assert pool.choose() is None
+
+            local_scheduler.cancel_job(job=jobs[0])
+            local_scheduler.wait_until_done(job=jobs[0], timeout=5000)
+            pool.sample()
+            assert pool.choose() is multi
+    finally:
+        for job in jobs:
+            local_scheduler.cancel_job(job=job)
+
+
+def test_scheduler_pool_submit_while_sampling(local_scheduler, monkeypatch):
+    sleeper = JobDescription(executable='/bin/sleep', arguments=['30'])
+    pool = SchedulerPool()
+    member = pool.add(local_scheduler, 'multi')
+    jobs = [pool.submit_batch_job(sleeper)]
+
+    get_jobs = local_scheduler.get_jobs
+
+    def get_jobs_and_submit(*args, **kwargs):
+        result = get_jobs(*args, **kwargs)
+        jobs.append(pool.submit_batch_job(sleeper))
+        return result
+
+    monkeypatch.setattr(local_scheduler, 'get_jobs', get_jobs_and_submit)
+    try:
+        pool.sample()
+        assert (member.jobs, member.submitted) == (1, 1)
+    finally:
+        for job in jobs:
+            local_scheduler.cancel_job(job=job)
+
+
+def test_scheduler_pool_default_queue(local_scheduler):
+    sleeper = JobDescription(executable='/bin/sleep', arguments=['30'])
+    busy = JobDescription(executable='/bin/sleep', arguments=['30'],
+                          queue_name='multi')
+    default_queue = local_scheduler.get_default_queue_name()
+    assert default_queue != 'multi'
+
+    pool = SchedulerPool()
+    default = pool.add(local_scheduler)
+    multi = pool.add(local_scheduler, 'multi')
+    jobs = [local_scheduler.submit_batch_job(busy) for _ in range(2)]
+    jobs.append(local_scheduler.submit_batch_job(sleeper))
+    try:
+        pool.sample()
+        assert (default.jobs, multi.jobs) == (1, 2)
+        assert pool.choose() is default
+    finally:
+        for job in jobs:
+            local_scheduler.cancel_job(job=job)
@@ -0,0 +1,70 @@
+import time
+
+import grpc
+import pytest
+
+from xenon import (FileSystem, Path)
+from xenon.exceptions import NoSuchPathException
+from xenon.proto import (xenon_pb2, xenon_pb2_grpc)
+from xenon.replay import (Recorder, ReplayServer, load)
+
+
+def test_record(xenon_server, tmpdir):
+    log = str(tmpdir.join('calls.xrpc'))
+    data = str(tmpdir.join('data'))
+
+    with Recorder(log).attach(xenon_server):
+        filesystem = FileSystem.create(adaptor='file')
+        filesystem.write_to_file(Path(data), [b'a' * 1000, b'b' * 1000])
+        assert b''.join(filesystem.read_from_file(Path(data))) == \
+            b'a' * 1000 + b'b' * 1000
+        with pytest.raises(NoSuchPathException):
+            filesystem.get_attributes(Path(data + '.missing'))
+        filesystem.close()
+
+    calls = load(log)
+    assert [c.method.split('/')[-1] for c in calls] == \
+        ['create', 'writeToFile', 'readFromFile', 'getAttributes', 'close']
+    assert len(calls[1].requests) == 3
+    assert calls[1].request_streaming and not calls[1].response_streaming
+    assert calls[2].response_streaming
+    assert calls[3].code == grpc.StatusCode.NOT_FOUND
+    assert [c.code for c in calls].count(grpc.StatusCode.OK) == 4
+
+
+def test_replay(xenon_server, tmpdir):
+    log = str(tmpdir.join('calls.xrpc'))
+    with Recorder(log).attach(xenon_server):
+        filesystem = FileSystem.create(adaptor='file')
+        filesystem.exists(Path(str(tmpdir)))
+        with pytest.raises(NoSuchPathException):
+            filesystem.get_attributes(Path(str(tmpdir.join('missing'))))
+
+    calls = load(log)
+    with ReplayServer(log) as server:
+        channel = grpc.insecure_channel('localhost:{}'.format(server.port))
+        stub = xenon_pb2_grpc.FileSystemServiceStub(channel)
+
+        start = time.monotonic()
+        fs = stub.create(xenon_pb2.CreateFileSystemRequest(adaptor='file'))
+        assert time.monotonic() - start >= calls[0].duration
+        assert fs.id == xenon_pb2.FileSystem.FromString(
+            calls[0].responses[0][1]).id
+
+        request = xenon_pb2.PathRequest.FromString(calls[1].requests[0][1])
+        assert stub.exists(request).value
+        with pytest.raises(grpc.RpcError) as e:
+            stub.getAttributes(request)
+        assert e.value.code() == grpc.StatusCode.NOT_FOUND
+        assert server.mismatches == {
+            '/xenon.FileSystemService/getAttributes': 1}
+
+        with pytest.raises(grpc.RpcError) as e:
+            stub.exists(request)
+        assert e.value.code() == grpc.StatusCode.FAILED_PRECONDITION
+        assert 'exists' in e.value.details()
+
+        with pytest.raises(grpc.RpcError) as e:
+            stub.isOpen(xenon_pb2.FileSystem(id=fs.id))
+        assert e.value.code() == grpc.StatusCode.UNIMPLEMENTED
+        channel.close()
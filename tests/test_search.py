@@ -0,0 +1,70 @@
+import os
+import time
+
+from xenon import Path
+
+
+def make_tree(tmpdir):
+    tmpdir = Path(str(tmpdir))
+    for name, size in [('data/2017/a.nc', 10), ('data/2017/b.txt', 20),
+                       ('data/2018/c.nc', 3000), ('data/2018/sub/d.nc', 0),
+                       ('other/e.nc', 5)]:
+        os.makedirs(str((tmpdir / name).parent), exist_ok=True)
+        with open(str(tmpdir / name), 'wb') as f:
+            f.write(b'x' * size)
+    return tmpdir
+
+
+def test_glob(local_filesystem, tmpdir):
+    tmpdir = make_tree(tmpdir)
+    found = sorted(str(p) for p in local_filesystem.glob(
+        tmpdir / 'data' / '*' / '*.nc'))
+    assert found == [str(tmpdir / 'data/2017/a.nc'),
+                     str(tmpdir / 'data/2018/c.nc')]
+
+    found = sorted(str(p) for p in local_filesystem.glob(
+        tmpdir / 'data' / '**' / '*.nc'))
+    assert found == [str(tmpdir / 'data/2017/a.nc'),
+                     str(tmpdir / 'data/2018/c.nc'),
+                     str(tmpdir / 'data/2018/sub/d.nc')]
+
+    assert list(local_filesystem.glob(tmpdir / 'nothing' / '*')) == []
+
+
+def test_path_glob(local_filesystem, tmpdir):
+    tmpdir = make_tree(tmpdir)
+    found = sorted(p.name for p in tmpdir.rglob(local_filesystem, '*.nc'))
+    assert found == ['a.nc', 'c.nc', 'd.nc', 'e.nc']
+
+    found = [p.name for p in (tmpdir / 'data').glob(local_filesystem, '2*')]
+    assert sorted(found) == ['2017', '2018']
+
+
+def test_find(local_filesystem, tmpdir):
+    tmpdir = make_tree(tmpdir)
+    found = sorted(a.path.name for a in local_filesystem.find(
+        tmpdir, name='*.nc', size='+1k'))
+    assert found == ['c.nc']
+
+    found = sorted(a.path.name for a in local_filesystem.find(
+        tmpdir, type='d', maxdepth=2))
+    assert found == ['2017', '2018', 'data', 'other']
+
+    found = sorted(a.path.name for a in local_filesystem.find(
+        tmpdir, type='f', prune='2018'))
+    assert found == ['a.nc', 'b.txt', 'e.nc']
+
+    old = time.time() - 10 * 86400
+    os.utime(str(tmpdir / 'other/e.nc'), (old, old))
+    found = [a.path.name for a in local_filesystem.find(tmpdir, mtime='+7')]
+    assert found == ['e.nc']
+
+
+def test_search_edge_cases(local_filesystem, tmpdir):
+    tmpdir = make_tree(tmpdir)
+    found = sorted(local_filesystem.glob(
+        str(tmpdir) + '/other/../data//2017/*.nc'))
+    assert [str(p) for p in found] == [str(tmpdir / 'data/2017/a.nc')]
+
+    assert list(local_filesystem.find(tmpdir, maxdepth=0)) == []
+    assert list(local_filesystem.find(tmpdir / 'nothing')) == []
@@ -0,0 +1,31 @@
+import os
+
+from xenon import (JobDescription, Job)
+from xenon.exceptions import XenonException
+
+
+def test_submit_many(local_scheduler, tmpdir):
+    descriptions = [
+        JobDescription(
+            executable='/bin/bash',
+            arguments=['-c', 'echo {}'.format(i)],
+            stdout=str(tmpdir.join('out{}.txt'.format(i))))
+        for i in range(20)]
+    descriptions[5] = JobDescription(arguments=['no executable'])
+
+    result = local_scheduler.submit_many(descriptions, max_in_flight=4)
+    assert result.count == 19
+    assert list(result.errors) == [5]
+    assert isinstance(result.errors[5], XenonException)
+    assert result.jobs[5] is None
+    assert result.rate > 0
+
+    for i, job in enumerate(result.jobs):
+        if job is None:
+            continue
+        assert isinstance(job, Job)
+        local_scheduler.wait_until_done(job)
+        out = open(str(tmpdir.join('out{}.txt'.format(i)))).read()
+        assert out.strip() == str(i)
+
+    assert not os.path.exists(str(tmpdir.join('out5.txt')))
@@ -0,0 +1,65 @@
+import subprocess
+
+import pytest
+
+from xenon import JobTemplate
+from xenon.sweep import (parameter_grid, array_script, array_description)
+
+
+def test_job_template():
+    template = JobTemplate(
+        executable='/bin/echo', arguments=['--alpha={alpha}', 'fixed'],
+        stdout='out-{alpha}-{seed}.txt', name='sweep-{seed}',
+        queue_name='short')
+    assert template.placeholders == {'alpha', 'seed'}
+
+    d = template.render(alpha=0.5, seed=3)
+    assert list(d.arguments) == ['--alpha=0.5', 'fixed']
+    assert d.stdout == 'out-0.5-3.txt'
+    assert d.name == 'sweep-3'
+    assert d.queue_name == 'short'
+
+    with pytest.raises(AttributeError):
+        JobTemplate(no_such_field=1)
+
+
+def test_parameter_grid():
+    assert list(parameter_grid({'a': [1, 2], 'b': 'xy'})) == [
+        {'a': 1, 'b': 'x'}, {'a': 1, 'b': 'y'},
+        {'a': 2, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+    assert list(parameter_grid({'a': [1, 2], 'b': 'xy'}, mode='zip')) == [
+        {'a': 1, 'b': 'x'}, {'a': 2, 'b': 'y'}]
+
+
+def test_array_script():
+    template = JobTemplate(
+        executable='/bin/echo', arguments=['{word}'])
+    descriptions = [template.render(word="it's {}".format(i))
+                    for i in range(3)]
+    script = array_script(descriptions, 'SGE_TASK_ID', 1)
+    output = subprocess.check_output(
+        ['/bin/bash', '-c', script], env={'SGE_TASK_ID': '2'})
+    assert output == b"it's 1\n"
+
+    d = array_description(template, descriptions, 'slurm')
+    assert list(d.scheduler_arguments) == ['--array=0-2']
+    assert d.executable == '/bin/bash'
+
+
+def test_submit_sweep(local_scheduler, tmpdir):
+    template = JobTemplate(
+        executable='/bin/bash', arguments=['-c', 'echo {a}{b}'],
+        working_directory=str(tmpdir), stdout='{a}{b}.txt')
+    result = local_scheduler.submit_sweep(
+        template, {'a': 'xy', 'b': [1, 2, 3]}, max_in_flight=4)
+    assert result.count == 6
+
+    for job in result.jobs:
+        local_scheduler.wait_until_done(job)
+    assert sorted(f.basename for f in tmpdir.listdir()) == [
+        'x1.txt', 'x2.txt', 'x3.txt', 'y1.txt', 'y2.txt', 'y3.txt']
+    assert tmpdir.join('y2.txt').read() == 'y2\n'
+
+    with pytest.raises(ValueError):
+        local_scheduler.submit_sweep(template, {'a': 'x', 'b': [1]},
+                                     array=True)
@@ -0,0 +1,79 @@
+import time
+
+import grpc
+import pytest
+
+from xenon import (FileSystem, Path)
+from xenon.exceptions import (NoSuchPathException, UnknownRpcException)
+from xenon.proto import (xenon_pb2, xenon_pb2_grpc)
+from xenon.testing import (FakeXenonServer, Link, WanProxy, copy_tree)
+
+
+def test_fake_server_link(tmpdir):
+    tmpdir.join('data').write(b'x' * 10000, mode='wb')
+
+    with FakeXenonServer(latency=0.05) as server:
+        channel = grpc.insecure_channel('localhost:{}'.format(server.port))
+        stub = xenon_pb2_grpc.FileSystemServiceStub(channel)
+        filesystem = stub.create(xenon_pb2.CreateFileSystemRequest(
+            adaptor='file'))
+        request = xenon_pb2.PathRequest(
+            filesystem=filesystem,
+            path=xenon_pb2.Path(path=str(tmpdir.join('data'))))
+
+        start = time.monotonic()
+        assert stub.exists(request).value
+        assert time.monotonic() - start >= 0.05
+
+        server.link.latency = 0
+        server.link.bandwidth = 100000
+        start = time.monotonic()
+        data = b''.join(r.buffer for r in stub.readFromFile(request))
+        assert len(data) == 10000
+        assert time.monotonic() - start >= 0.1
+        channel.close()
+
+
+def test_wan_proxy(xenon_server, tmpdir):
+    tmpdir.join('data').write(b'x' * 10000, mode='wb')
+    path = Path(str(tmpdir.join('data')))
+
+    with WanProxy(latency=0.05).attach(xenon_server) as proxy:
+        proxy.links['readFromFile'] = Link(bandwidth=100000)
+        proxy.links['exists'] = Link(error_rate=1.0)
+        filesystem = FileSystem.create(adaptor='file')
+
+        start = time.monotonic()
+        assert filesystem.get_attributes(path).size == 10000
+        assert time.monotonic() - start >= 0.05
+
+        start = time.monotonic()
+        assert len(b''.join(filesystem.read_from_file(path))) == 10000
+        assert time.monotonic() - start >= 0.1
+
+        with pytest.raises(UnknownRpcException) as e:
+            filesystem.exists(path)
+        assert 'UNAVAILABLE' in str(e.value)
+
+        with pytest.raises(NoSuchPathException):
+            filesystem.get_attributes(Path(str(tmpdir.join('missing'))))
+        filesystem.close()
+
+    filesystem = FileSystem.create(adaptor='file')
+    start = time.monotonic()
+    assert filesystem.exists(path)
+    assert time.monotonic() - start < 0.05
+    filesystem.close()
+
+
+def test_copy_tree_merges(tmpdir):
+    source, target = tmpdir.mkdir('source'), tmpdir.mkdir('target')
+    source.mkdir('sub').join('new.txt').write('new')
+    source.join('top.txt').write('top')
+    target.mkdir('sub').join('old.txt').write('old')
+    target.join('top.txt').write('stale')
+
+    copy_tree(str(source), str(target))
+    assert sorted(p.basename for p in target.join('sub').listdir()) == \
+        ['new.txt', 'old.txt']
+    assert target.join('top.txt').read() == 'top'
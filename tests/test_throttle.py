@@ -0,0 +1,96 @@
+import threading
+import time
+
+import pytest
+
+from xenon import (JobDescription, JobMonitor)
+from xenon.exceptions import (
+    InvalidJobDescriptionException, XenonRuntimeException)
+
+
+def test_throttle_rate(local_scheduler):
+    throttle = local_scheduler.enable_throttle(rate=20, burst=2)
+    start = time.monotonic()
+    result = local_scheduler.submit_many(
+        [JobDescription(executable='/bin/true') for _ in range(6)])
+    elapsed = time.monotonic() - start
+
+    assert result.count == 6
+    assert elapsed >= 0.15
+    assert throttle.budget()['queued'] == 6
+
+    for job in result.jobs:
+        local_scheduler.wait_until_done(job=job, timeout=5000)
+    assert throttle.budget()['queued'] == 0
+
+
+def test_throttle_max_queued(local_scheduler):
+    throttle = local_scheduler.enable_throttle(max_queued_per_queue={
+        'multi': 2})
+    sleeper = JobDescription(executable='/bin/sleep', arguments=['0.3'],
+                             queue_name='multi')
+
+    with JobMonitor(local_scheduler, min_interval=0.05) as monitor:
+        jobs = []
+        for _ in range(4):
+            jobs.append(local_scheduler.submit_batch_job(sleeper))
+            assert throttle.budget()['queues']['multi'] <= 2
+            monitor.watch(jobs[-1])
+        assert monitor.wait(10)
+
+    assert throttle.budget()['queued'] == 0
+
+    local_scheduler.submit_batch_job(sleeper)
+    local_scheduler.submit_batch_job(sleeper)
+    with pytest.raises(TimeoutError):
+        throttle.acquire('multi', timeout=0.1)
+    local_scheduler.disable_throttle()
+    assert local_scheduler.throttle is None
+
+
+def test_throttle_submit_many_max_queued(local_scheduler):
+    throttle = local_scheduler.enable_throttle(max_queued=2)
+    quick = JobDescription(executable='/bin/sleep', arguments=['0.1'])
+    results = []
+
+    thread = threading.Thread(target=lambda: results.append(
+        local_scheduler.submit_many([quick] * 5, max_in_flight=4)),
+        daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive()
+
+    result, = results
+    assert result.count == 5
+    assert throttle.budget()['queued'] <= 2
+    for job in result.jobs:
+        local_scheduler.wait_until_done(job=job, timeout=5000)
+    assert throttle.budget()['queued'] == 0
+
+
+def test_throttle_submit_loop_max_queued(local_scheduler):
+    throttle = local_scheduler.enable_throttle(max_queued=2)
+    quick = JobDescription(executable='/bin/true')
+    jobs = []
+
+    thread = threading.Thread(target=lambda: jobs.extend(
+        local_scheduler.submit_batch_job(quick) for _ in range(4)),
+        daemon=True)
+    thread.start()
+    thread.join(30)
+    assert not thread.is_alive()
+    assert len(jobs) == 4
+    assert throttle.budget()['queued'] <= 2
+
+
+def test_throttle_rejections(local_scheduler):
+    throttle = local_scheduler.enable_throttle(rate=1, burst=2)
+    throttle.acquire()
+    throttle.settle('', error=InvalidJobDescriptionException(
+        None, 'INVALID_ARGUMENT', 'no executable'))
+    assert throttle.rejected == 0 and throttle.tokens >= 1
+
+    throttle.acquire()
+    throttle.settle('', error=XenonRuntimeException(
+        None, 'INTERNAL', 'queue limit reached'))
+    assert throttle.rejected == 1 and throttle.tokens <= 0
@@ -0,0 +1,83 @@
+import threading
+
+from xenon import (JobDescription, Workflow)
+
+
+def bash(script, **kwargs):
+    return JobDescription(executable='/bin/bash', arguments=['-c', script],
+                          **kwargs)
+
+
+def test_workflow(local_scheduler, local_filesystem, tmpdir):
+    local = tmpdir.mkdir('local')
+    remote = tmpdir.mkdir('remote')
+    local.join('seed.txt').write('seed\n')
+
+    workflow = Workflow(local_scheduler, local_filesystem, max_jobs=2)
+    changes = []
+    workflow.on_change(lambda node, previous: changes.append(
+        (node.name, previous, node.state)))
+
+    workflow.add('prepare', bash('cp seed.txt prepared.txt',
+                                 working_directory=str(remote)),
+                 inputs=[(str(local.join('seed.txt')),
+                          str(remote.join('seed.txt')))])
+    for i in range(4):
+        workflow.add('sim-{}'.format(i), bash(
+            'sleep 0.1; echo {} > sim-{}.txt'.format(i, i),
+            working_directory=str(remote)), after=['prepare'])
+    workflow.add('reduce', bash('cat prepared.txt sim-*.txt > result.txt',
+                                working_directory=str(remote)),
+                 after=['sim-{}'.format(i) for i in range(4)],
+                 outputs=[(str(remote.join('result.txt')),
+                           str(local.join('result.txt')))])
+
+    assert workflow.run(timeout=30)
+    assert workflow.status() == {'done': 6}
+    assert local.join('result.txt').read() == 'seed\n0\n1\n2\n3\n'
+
+    states = [(name, state) for name, _, state in changes]
+    assert states.index(('prepare', 'done')) < \
+        states.index(('sim-0', 'staging-in'))
+    assert ('reduce', 'staging-out') in states
+
+    active, most = set(), 0
+    for name, _, state in changes:
+        if state in ('submitted', 'running'):
+            active.add(name)
+        else:
+            active.discard(name)
+        most = max(most, len(active))
+    assert most == 2
+
+
+def test_workflow_failure(local_scheduler, local_filesystem):
+    workflow = Workflow(local_scheduler, local_filesystem)
+    workflow.add('a', bash('exit 1'))
+    workflow.add('b', bash('true'), after=['a'])
+    workflow.add('c', bash('true'), after=['b'])
+    workflow.add('d', bash('true'))
+
+    assert not workflow.run(timeout=30)
+    assert workflow.status() == {'failed': 1, 'skipped': 2, 'done': 1}
+    assert workflow.nodes['a'].status.exit_code == 1
+
+
+def test_workflow_submits_off_monitor_thread(local_scheduler,
+                                             local_filesystem, monkeypatch):
+    threads = []
+    submit = local_scheduler.submit_batch_job
+
+    def submit_batch_job(description):
+        threads.append(threading.current_thread().name)
+        return submit(description)
+
+    monkeypatch.setattr(local_scheduler, 'submit_batch_job',
+                        submit_batch_job)
+    workflow = Workflow(local_scheduler, local_filesystem, max_jobs=1)
+    for i in range(10):
+        workflow.add(str(i), bash('true'))
+
+    assert workflow.run(timeout=30)
+    assert len(threads) == 10
+    assert 'xenon-job-monitor' not in threads
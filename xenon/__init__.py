@@ -13,6 +13,39 @@ from .proto.xenon_pb2 import (
 from .exceptions import (
     UnknownRpcException, XenonException, PathAlreadyExistsException)
 
+from .listing import (
+    PathTable)
+
+from .index import (
+    RemoteIndex)
+
+from .monitor import (
+    JobMonitor)
+
+from .executor import (
+    SchedulerExecutor)
+
+from .pilot import (
+    TaskFarm, TaskResult)
+
+from .sweep import (
+    JobTemplate)
+
+from .hub import (
+    InteractiveHub)
+
+from .memo import (
+    JobMemo)
+
+from .journal import (
+    JobJournal)
+
+from .workflow import (
+    Workflow)
+
+from .pool import (
+    SchedulerPool)
+
 from .version import (
     pyxenon_version)
 
@@ -27,6 +60,10 @@ __all__ = [
     'CopyStatus', 'CertificateCredential', 'PasswordCredential',
     'KeytabCredential',
     'PropertyDescription', 'CredentialMap', 'DefaultCredential',
-    'UserCredential', 'CopyMode',
+    'UserCredential', 'CopyMode', 'PathTable',
+    'RemoteIndex', 'JobMonitor', 'SchedulerExecutor',
+    'TaskFarm', 'TaskResult', 'JobTemplate',
+    'InteractiveHub', 'JobMemo', 'JobJournal', 'Workflow',
+    'SchedulerPool',
 
     'UnknownRpcException', 'XenonException', 'PathAlreadyExistsException']
@@ -0,0 +1,338 @@
+"""
+Bulk operations, pipelining many requests over the GRPC channel.
+"""
+
+from collections import deque
+import posixpath
+import time
+
+import grpc
+
+from .proto import xenon_pb2
+from .exceptions import (
+    make_exception, PathAlreadyExistsException, XenonRuntimeException)
+from .oop import unwrap
+from .throttle import wait_for_place
+from .walk import (walk, is_subdirectory)
+
+
+class BulkResult(object):
+    """Outcome of a bulk operation.
+
+    :ivar count: number of items that were processed successfully, or
+        `None` if it is unknown.
+    :ivar errors: dictionary mapping items that failed to the exception
+        raised for them.
+    :ivar elapsed: wall-clock time of the operation in seconds.
+    """
+    def __init__(self, count=0, errors=None, elapsed=0.0):
+        self.count = count
+        self.errors = errors if errors is not None else {}
+        self.elapsed = elapsed
+
+    @property
+    def rate(self):
+        """Items processed per second, or `None` if the count is
+        unknown."""
+        if self.count is None:
+            return None
+        return self.count / self.elapsed if self.elapsed else 0.0
+
+    def __repr__(self):
+        return '{}(count={}, errors={}, elapsed={:.3f})'.format(
+            type(self).__name__, self.count, len(self.errors), self.elapsed)
+
+
+class DeleteResult(BulkResult):
+    """Outcome of :py:meth:`FileSystem.delete_tree`.
+
+    :ivar strategy: the strategy that was used, ``'parallel'`` or
+        ``'remote'``.
+    :ivar estimate: the estimated number of entries in the tree.
+    """
+    def __init__(self, strategy, estimate, **kwargs):
+        super(DeleteResult, self).__init__(**kwargs)
+        self.strategy = strategy
+        self.estimate = estimate
+
+
+class SubmitResult(BulkResult):
+    """Outcome of :py:meth:`Scheduler.submit_many`.
+
+    :ivar jobs: list of submitted jobs, in the order of the descriptions;
+        the entry is `None` for descriptions that failed to submit.
+    :ivar errors: dictionary mapping the index of each failed description to
+        the exception raised for it.
+    :ivar memoized: number of jobs that were taken from a
+        :py:class:`xenon.memo.JobMemo` instead of being submitted.
+    """
+    def __init__(self, **kwargs):
+        super(SubmitResult, self).__init__(**kwargs)
+        self.jobs = []
+        self.memoized = 0
+
+
+def _outcome(future):
+    try:
+        return future.result(), None
+    except grpc.RpcError as e:
+        return None, e
+
+
+def pipeline(method, requests, max_in_flight=64, callback=None):
+    """Issue unary requests concurrently over a single channel, using the
+    `future` interface of a GRPC multi-callable. At most `max_in_flight`
+    requests are outstanding at any time. `requests` is consumed lazily.
+
+    :param callback: function called with `(request, response, error)` as
+        soon as a response arrives, possibly on another thread.
+    :return: generator of `(request, response, error)` tuples, in the order
+        of `requests`; either `response` or `error` (a `grpc.RpcError`) is
+        `None`."""
+    in_flight = deque()
+
+    def collect():
+        request, future = in_flight.popleft()
+        return (request,) + _outcome(future)
+
+    for request in requests:
+        future = method.future(request)
+        if callback is not None:
+            future.add_done_callback(
+                lambda f, request=request: callback(request, *_outcome(f)))
+        in_flight.append((request, future))
+        if len(in_flight) >= max_in_flight:
+            yield collect()
+
+    while in_flight:
+        yield collect()
+
+
+def invalidate(filesystem, path):
+    """Invalidate `path` in the attribute cache of `filesystem`, if any."""
+    if filesystem.cache is not None:
+        filesystem.cache.invalidate(filesystem.cache.key(filesystem, path))
+
+
+def delete_many(filesystem, paths, recursive=False, max_in_flight=64,
+                invalidate_cache=True):
+    """Implements :py:meth:`FileSystem.delete_many`."""
+    start = time.monotonic()
+    result = BulkResult()
+    requests = (xenon_pb2.DeleteRequest(
+        filesystem=filesystem.__wrapped__,
+        path=xenon_pb2.Path(path=str(p), separator='/'),
+        recursive=recursive) for p in paths)
+
+    for request, _, error in pipeline(
+            filesystem.__service__.delete, requests, max_in_flight):
+        if invalidate_cache:
+            invalidate(filesystem, request.path.path)
+        if error is None:
+            result.count += 1
+        else:
+            result.errors[request.path.path] = \
+                make_exception(delete_many, error)
+
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def submit_many(scheduler, descriptions, max_in_flight, job_type,
+                on_submit=None):
+    """Implements :py:meth:`Scheduler.submit_many`; `job_type` is called
+    with the id of every submitted job, and `on_submit` (if given) with the
+    description and id of every submitted job as soon as its response
+    arrives."""
+    start = time.monotonic()
+    result = SubmitResult()
+    throttle = scheduler.throttle
+
+    def requests():
+        for d in descriptions:
+            d = unwrap(d)
+            if throttle is not None:
+                wait_for_place(scheduler, throttle, d.queue_name)
+            yield xenon_pb2.SubmitBatchJobRequest(
+                scheduler=scheduler.__wrapped__, description=d)
+
+    def submitted(request, response, error):
+        if throttle is not None:
+            throttle.settle(
+                request.description.queue_name,
+                response.id if error is None else None,
+                None if error is None else make_exception(submit_many, error))
+        if error is None and on_submit is not None:
+            on_submit(request.description, response.id)
+
+    for index, (request, response, error) in enumerate(pipeline(
+            scheduler.__service__.submitBatchJob, requests(),
+            max_in_flight, submitted)):
+        if error is None:
+            result.jobs.append(job_type(response.id))
+            result.count += 1
+        else:
+            result.jobs.append(None)
+            result.errors[index] = make_exception(submit_many, error)
+
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def directory_trie(paths):
+    """Build a trie of path components from `paths`. Absolute and relative
+    paths end up below the keys ``'/'`` and ``''`` respectively."""
+    trie = {}
+    for path in paths:
+        path = posixpath.normpath(str(path))
+        node = trie.setdefault('/' if path.startswith('/') else '', {})
+        for component in path.split('/'):
+            if component:
+                node = node.setdefault(component, {})
+    return trie
+
+
+def create_directories_many(filesystem, paths, max_in_flight=64):
+    """Implements :py:meth:`FileSystem.create_directories_many`."""
+    start = time.monotonic()
+    result = BulkResult()
+    trie = directory_trie(paths)
+    # tuples of path, sub-trie and whether the parent existed before
+    level = [(posixpath.join(base, name), children, True)
+             for base, top in trie.items() for name, children in top.items()]
+
+    while level:
+        requests = {path: (children, is_top)
+                    for path, children, is_top in level}
+
+        next_level = []
+        for request, _, error in pipeline(
+                filesystem.__service__.createDirectory,
+                (xenon_pb2.PathRequest(
+                    filesystem=filesystem.__wrapped__,
+                    path=xenon_pb2.Path(path=p, separator='/'))
+                 for p in requests), max_in_flight):
+            path = request.path.path
+            children, is_top = requests[path]
+            created = error is None
+            if not created:
+                error = make_exception(create_directories_many, error)
+                if not isinstance(error, PathAlreadyExistsException):
+                    result.errors[path] = error
+                    continue
+            else:
+                result.count += 1
+                if is_top:
+                    invalidate(filesystem, path)
+
+            next_level.extend(
+                (posixpath.join(path, name), grandchildren, not created)
+                for name, grandchildren in children.items())
+
+        level = next_level
+
+    result.elapsed = time.monotonic() - start
+    return result
+
+
+def estimate_entries(filesystem, root, max_directories=64, max_workers=8):
+    """Estimate the number of entries below `root` by listing up to
+    `max_directories` directories. If the whole tree was listed, the count
+    is exact and the listings are returned as well.
+
+    :return: tuple of the estimate and, if the listing is complete, a list
+        of `(directory, entries)` tuples, otherwise `None`."""
+    listings = []
+    seen = 0
+    discovered = 1
+    generator = walk(filesystem, root, max_workers=max_workers)
+    for directory, entries in generator:
+        listings.append((directory, entries))
+        seen += len(entries)
+        discovered += sum(1 for e in entries if is_subdirectory(e))
+        if len(listings) >= max_directories and \
+                discovered > len(listings):
+            generator.close()
+            unlisted = discovered - len(listings)
+            return int(seen + unlisted * seen / len(listings)), None
+
+    return seen, listings
+
+
+def delete_listed(filesystem, root, listings, max_in_flight=64):
+    """Delete a tree leaf-first, given its complete listing. All
+    non-directories are deleted concurrently, followed by the directories,
+    one level at a time starting at the deepest."""
+    files = []
+    levels = {}
+    for _, entries in listings:
+        for e in entries:
+            path = e.path.path
+            if is_subdirectory(e):
+                levels.setdefault(path.count('/'), []).append(path)
+            else:
+                files.append(path)
+
+    result = delete_many(filesystem, files, max_in_flight=max_in_flight,
+                         invalidate_cache=False)
+    for paths in [levels[d] for d in sorted(levels, reverse=True)] + [[root]]:
+        level = delete_many(filesystem, paths, max_in_flight=max_in_flight,
+                            invalidate_cache=False)
+        result.count += level.count
+        result.errors.update(level.errors)
+
+    invalidate(filesystem, root)
+    return result
+
+
+def delete_remote(filesystem, root, scheduler):
+    """Delete a tree by running ``rm -rf`` through `scheduler`. Raises
+    :py:class:`XenonRuntimeException` if the job fails."""
+    description = xenon_pb2.JobDescription(
+        executable='rm', arguments=['-rf', '--', root],
+        name='pyxenon-delete-tree')
+    job = scheduler.submit_batch_job(description)
+    status = scheduler.wait_until_done(job)
+    invalidate(filesystem, root)
+
+    if status.error_message or status.exit_code != 0:
+        raise XenonRuntimeException(
+            delete_remote, status.exit_code,
+            "Remote delete of {} failed: {}".format(
+                root, status.error_message or 'rm exited with a non-zero '
+                'exit code'))
+
+
+def delete_tree(filesystem, path, strategy='auto', scheduler=None,
+                threshold=100000, max_in_flight=64, max_workers=8):
+    """Implements :py:meth:`FileSystem.delete_tree`."""
+    if strategy not in ('auto', 'parallel', 'remote'):
+        raise ValueError("Unknown strategy: {}".format(strategy))
+    if strategy == 'remote' and scheduler is None:
+        raise ValueError("The 'remote' strategy needs a scheduler.")
+
+    start = time.monotonic()
+    root = str(path)
+    if not root.startswith('/'):
+        root = posixpath.join(str(filesystem.get_working_directory()), root)
+    root = posixpath.normpath(root)
+
+    estimate, listings = estimate_entries(
+        filesystem, root, max_workers=max_workers)
+    if strategy == 'auto':
+        strategy = 'remote' \
+            if scheduler is not None and estimate > threshold \
+            else 'parallel'
+
+    if strategy == 'remote':
+        delete_remote(filesystem, root, scheduler)
+        # rm does not report what it deleted
+        result = BulkResult(count=None)
+    else:
+        if listings is None:
+            listings = list(walk(filesystem, root, max_workers=max_workers))
+        result = delete_listed(filesystem, root, listings, max_in_flight)
+
+    return DeleteResult(
+        strategy, estimate, count=result.count, errors=result.errors,
+        elapsed=time.monotonic() - start)
@@ -0,0 +1,290 @@
+"""
+Client side caching of path attributes.
+"""
+
+import functools
+import inspect
+import posixpath
+import threading
+import time
+
+
+EXISTS = object()
+MISSING = object()
+
+
+class AttributeCache(object):
+    """Time limited cache of `PathAttributes` messages for a single
+    :py:class:`FileSystem`. Entries are keyed by absolute, normalised path.
+    Besides full attributes, the cache can remember that a path is known to
+    exist (`EXISTS`) or known to be absent (`MISSING`), so that
+    :py:meth:`FileSystem.exists` can be answered locally.
+
+    :ivar ttl: time-to-live of entries in seconds.
+    :ivar hits: number of lookups answered from the cache.
+    :ivar misses: number of lookups that needed a remote call.
+    :ivar working_directory: cached working directory of the file system,
+        used to resolve relative paths.
+    """
+    def __init__(self, ttl=10.0):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.working_directory = None
+        self._entries = {}
+        # directory -> paths below it that are cached or lead to cached
+        # paths, so that a subtree is found without scanning all entries
+        self._children = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def hit_rate(self):
+        """Fraction of lookups answered from the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self):
+        """Dictionary with the hit and miss counts, hit rate and size."""
+        return {'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hit_rate, 'size': len(self)}
+
+    def key(self, filesystem, path):
+        """Absolute, normalised path string for `path`."""
+        path = str(path)
+        if not path.startswith('/'):
+            if self.working_directory is None:
+                self.working_directory = str(
+                    filesystem.get_working_directory())
+            path = posixpath.join(self.working_directory, path)
+        return posixpath.normpath(path)
+
+    def get(self, key, full=False):
+        """Retrieve the entry for `key`. Returns `None` if there is no valid
+        entry, otherwise a `PathAttributes` message, `EXISTS` or
+        `MISSING`. If `full` is set, only a `PathAttributes` message is
+        returned, since the other entries cannot answer the lookup. Updates
+        the hit and miss counts."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] < time.monotonic():
+                del self._entries[key]
+                entry = None
+
+            if entry is not None and not (
+                    full and entry[1] in (EXISTS, MISSING)):
+                self.hits += 1
+                return entry[1]
+
+            self.misses += 1
+            return None
+
+    def put(self, key, value):
+        """Store a `PathAttributes` message, `EXISTS` or `MISSING`."""
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            while True:
+                parent = posixpath.dirname(key)
+                children = self._children.setdefault(parent, set())
+                if parent == key or key in children:
+                    break
+                children.add(key)
+                key = parent
+
+    def invalidate(self, key, ancestors=False):
+        """Drop the entry for `key`, everything below it and its parent
+        directory, whose attributes change when `key` does. With
+        `ancestors` set, all entries above `key` are dropped too, as when
+        missing parent directories were created along with it."""
+        with self._lock:
+            parent = posixpath.dirname(key)
+            self._entries.pop(parent, None)
+            while ancestors and posixpath.dirname(parent) != parent:
+                parent = posixpath.dirname(parent)
+                self._entries.pop(parent, None)
+
+            pending = [key]
+            while pending:
+                k = pending.pop()
+                self._entries.pop(k, None)
+                pending.extend(self._children.pop(k, ()))
+
+    def clear(self):
+        """Drop all entries."""
+        with self._lock:
+            self._entries.clear()
+            self._children.clear()
+
+
+def cached_exists(wrap):
+    """Decorator for :py:meth:`FileSystem.exists` to use the cache. The
+    answer is wrapped with `wrap(service, value)`."""
+    def decorator(method):
+        @functools.wraps(method)
+        def exists(self, path):
+            cache = self._cache
+            if cache is None:
+                return method(self, path)
+
+            key = cache.key(self, path)
+            value = cache.get(key)
+            if value is None:
+                result = method(self, path)
+                cache.put(key, EXISTS if result else MISSING)
+                return result
+
+            return wrap(self.__service__, value is not MISSING)
+
+        return exists
+
+    return decorator
+
+
+def cached_get_attributes(wrap):
+    """Decorator for :py:meth:`FileSystem.get_attributes` to use the cache.
+    The cached message is wrapped with `wrap(service, message)`."""
+    def decorator(method):
+        @functools.wraps(method)
+        def get_attributes(self, path):
+            cache = self._cache
+            if cache is None:
+                return method(self, path)
+
+            key = cache.key(self, path)
+            value = cache.get(key, full=True)
+            if value is None:
+                result = method(self, path)
+                cache.put(key, result.__wrapped__)
+                return result
+
+            return wrap(self.__service__, value)
+
+        return get_attributes
+
+    return decorator
+
+
+def caching_list(method):
+    """Decorate :py:meth:`FileSystem.list` to store every entry that
+    passes by in the cache."""
+    @functools.wraps(method)
+    def list_(self, *args, **kwargs):
+        cache = self._cache
+        if cache is None:
+            return method(self, *args, **kwargs)
+
+        def stream():
+            for attributes in method(self, *args, **kwargs):
+                msg = attributes.__wrapped__
+                cache.put(cache.key(self, msg.path.path), msg)
+                yield attributes
+
+        return stream()
+
+    return list_
+
+
+def invalidating(*effects):
+    """Decorator for a mutating method so that it invalidates the cache
+    entries of the paths it touches.
+
+    :param effects: `(argument, filesystem_argument, state)` tuples.
+        `argument` names the path argument; `filesystem_argument` names an
+        argument holding the file system the path belongs to, or is `None`
+        for `self`; `state` is `EXISTS` or `MISSING` if the state of the
+        path is known after the call succeeds, or `None`."""
+    def decorator(method):
+        sig = inspect.signature(method)
+
+        @functools.wraps(method)
+        def mutate(self, *args, **kwargs):
+            arguments = sig.bind(self, *args, **kwargs).arguments
+            targets = []
+            for argument, fs_argument, state in effects:
+                filesystem = arguments.get(fs_argument, self) \
+                    if fs_argument else self
+                cache = getattr(filesystem, '_cache', None)
+                if cache is not None and \
+                        arguments.get(argument) is not None:
+                    key = cache.key(filesystem, arguments[argument])
+                    targets.append((cache, key, state))
+
+            try:
+                result = method(self, *args, **kwargs)
+            except Exception:
+                for cache, key, _ in targets:
+                    cache.invalidate(key)
+                raise
+
+            for cache, key, state in targets:
+                cache.invalidate(key, ancestors=state is EXISTS)
+                if state is not None:
+                    cache.put(key, state)
+            return result
+
+        return mutate
+
+    return decorator
+
+
+def tracking_copy(method):
+    """Decorate :py:meth:`FileSystem.copy` to remember the destination of
+    the copy, which is invalidated again when :py:func:`completing_copy`
+    sees the copy finish; entries cached while it runs would be stale."""
+    sig = inspect.signature(method)
+
+    @functools.wraps(method)
+    def copy(self, *args, **kwargs):
+        operation = method(self, *args, **kwargs)
+        arguments = sig.bind(self, *args, **kwargs).arguments
+        filesystem = arguments.get('destination_filesystem') or self
+        cache = getattr(filesystem, '_cache', None)
+        if cache is not None and arguments.get('destination') is not None:
+            self._copies[operation.id] = (
+                cache, cache.key(filesystem, arguments['destination']))
+        return operation
+
+    return copy
+
+
+def completing_copy(method):
+    """Decorate :py:meth:`FileSystem.wait_until_done` or
+    :py:meth:`FileSystem.get_status` to invalidate the destination of a
+    copy started by :py:func:`tracking_copy` once it is done."""
+    sig = inspect.signature(method)
+
+    @functools.wraps(method)
+    def status(self, *args, **kwargs):
+        operation = sig.bind(self, *args, **kwargs).arguments.get(
+            'copy_operation')
+
+        def forget():
+            target = self._copies.pop(getattr(operation, 'id', None), None)
+            if target is not None:
+                target[0].invalidate(target[1])
+
+        try:
+            result = method(self, *args, **kwargs)
+        except Exception:
+            forget()
+            raise
+        if result.done:
+            forget()
+        return result
+
+    return status
+
+
+def tracking_working_directory(method):
+    """Decorate :py:meth:`FileSystem.set_working_directory` to forget the
+    cached working directory."""
+    @functools.wraps(method)
+    def set_working_directory(self, *args, **kwargs):
+        result = method(self, *args, **kwargs)
+        if self._cache is not None:
+            self._cache.working_directory = None
+        return result
+
+    return set_working_directory
@@ -0,0 +1,363 @@
+"""
+A :py:class:`concurrent.futures.Executor` running Python callables as jobs.
+"""
+
+from concurrent.futures import (Executor, Future, ThreadPoolExecutor)
+import itertools
+import pickle
+import struct
+import threading
+import time
+import uuid
+
+try:
+    import cloudpickle
+except ImportError:
+    cloudpickle = None
+
+from .proto import xenon_pb2
+from .exceptions import PathAlreadyExistsException
+from .monitor import JobMonitor
+from .objects import Path
+from .oop import unwrap
+
+
+CHUNK_SIZE = 1 << 20
+
+# This program runs on the remote side as `python -c BOOTSTRAP input output`.
+# It reads a list of `(function, args, kwargs)` tuples from `input` and
+# writes a list of `(success, value_or_exception)` tuples to `output`. Both
+# files consist of a frame count, the frame lengths (unsigned 64-bit little
+# endian integers), and the frames: first the pickle, then the out-of-band
+# buffers.
+BOOTSTRAP = """
+import os, pickle, struct, sys
+
+def read_frames(path):
+    with open(path, 'rb') as f:
+        n, = struct.unpack('<Q', f.read(8))
+        lengths = struct.unpack('<%dQ' % n, f.read(8 * n))
+        return [f.read(k) for k in lengths]
+
+def write_frames(path, frames):
+    with open(path + '.part', 'wb') as f:
+        f.write(struct.pack('<Q', len(frames)))
+        f.write(struct.pack('<%dQ' % len(frames), *map(len, frames)))
+        for frame in frames:
+            f.write(frame)
+    os.rename(path + '.part', path)
+
+def dumps(obj):
+    if pickle.HIGHEST_PROTOCOL < 5:
+        return [pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)]
+    buffers = []
+    data = pickle.dumps(obj, 5, buffer_callback=buffers.append)
+    return [data] + [b.raw() for b in buffers]
+
+frames = read_frames(sys.argv[1])
+if len(frames) > 1:
+    calls = pickle.loads(frames[0], buffers=frames[1:])
+else:
+    calls = pickle.loads(frames[0])
+
+results = []
+for function, args, kwargs in calls:
+    try:
+        results.append((True, function(*args, **kwargs)))
+    except Exception as e:
+        results.append((False, e))
+
+try:
+    frames = dumps(results)
+except Exception:
+    frames = dumps([(ok, value if ok else RuntimeError(repr(value)))
+                    for ok, value in results])
+write_frames(sys.argv[2], frames)
+"""
+
+
+def dumps(obj):
+    """Pickle `obj` into a list of frames: the pickle itself followed by the
+    out-of-band buffers (pickle protocol 5, if available). Uses
+    `cloudpickle` if it is installed, so that lambdas and interactively
+    defined functions can be sent."""
+    module = cloudpickle if cloudpickle is not None else pickle
+    if pickle.HIGHEST_PROTOCOL < 5:
+        return [module.dumps(obj, protocol=pickle.HIGHEST_PROTOCOL)]
+
+    buffers = []
+    data = module.dumps(obj, protocol=5, buffer_callback=buffers.append)
+    return [data] + [b.raw() for b in buffers]
+
+
+def loads(frames):
+    """Inverse of :py:func:`dumps`."""
+    if len(frames) > 1:
+        return pickle.loads(frames[0], buffers=frames[1:])
+    return pickle.loads(frames[0])
+
+
+def frame_stream(frames):
+    """Generate the chunks of a framed file, without joining the frames
+    into a single buffer."""
+    yield struct.pack('<Q', len(frames))
+    yield struct.pack('<{}Q'.format(len(frames)),
+                      *(memoryview(f).nbytes for f in frames))
+    for frame in frames:
+        view = memoryview(frame).cast('B')
+        for i in range(0, len(view), CHUNK_SIZE):
+            yield bytes(view[i:i + CHUNK_SIZE])
+
+
+def parse_frames(data):
+    """Split a framed file into frames."""
+    data = memoryview(data)
+    n, = struct.unpack_from('<Q', data)
+    lengths = struct.unpack_from('<{}Q'.format(n), data, 8)
+    frames, offset = [], 8 + 8 * n
+    for length in lengths:
+        frames.append(data[offset:offset + length])
+        offset += length
+    return frames
+
+
+class JobFailed(Exception):
+    """Raised through the futures of a :py:class:`SchedulerExecutor` when
+    the job running the call did not produce a result."""
+    def __init__(self, job, status, stderr=''):
+        super(JobFailed, self).__init__(
+            "Job {} failed with exit code {}: {}\n{}".format(
+                job.id, status.exit_code, status.error_message, stderr))
+        self.job = job
+        self.status = status
+
+
+class SchedulerExecutor(Executor):
+    """An executor that runs Python callables as jobs on a
+    :py:class:`Scheduler`.
+
+    Every call (or chunk of calls, see :py:meth:`map`) is pickled, written to
+    `working_directory` through :py:meth:`FileSystem.write_to_file`, and run
+    by a job executing a small bootstrap program with `python`. The job
+    writes the pickled results next to its input, where they are picked up
+    with :py:meth:`FileSystem.read_from_file` once a :py:class:`JobMonitor`
+    sees the job finish.
+
+    The callables must be importable on the remote side, unless
+    `cloudpickle` is installed (on both sides). Pickle protocol 5 is used
+    when available, sending large buffers out-of-band.
+
+    :param scheduler: the :py:class:`Scheduler` to submit to.
+    :param filesystem: a :py:class:`FileSystem` on which the jobs can read
+        and write `working_directory`.
+    :param working_directory: directory for the input, output and log files;
+        it is created if needed.
+    :param python: the Python interpreter to run on the remote side.
+    :param description: a :py:class:`JobDescription` with additional
+        settings for every job, such as `queue_name` or `max_runtime`.
+    :param monitor: a :py:class:`JobMonitor` to use; by default the executor
+        creates its own.
+    :param cleanup: delete the files of a call once its result is in.
+    """
+    def __init__(self, scheduler, filesystem, working_directory,
+                 python='python3', description=None, monitor=None,
+                 cleanup=True):
+        self.scheduler = scheduler
+        self.filesystem = filesystem
+        self.working_directory = Path(working_directory)
+        self.python = python
+        self.template = unwrap(description) if description is not None \
+            else xenon_pb2.JobDescription()
+        self.cleanup = cleanup
+
+        self._own_monitor = monitor is None
+        self.monitor = monitor if monitor is not None \
+            else JobMonitor(scheduler).start()
+        self._fetcher = ThreadPoolExecutor(max_workers=4)
+        self._prefix = uuid.uuid4().hex[:8]
+        self._counter = itertools.count()
+        self._futures = set()
+        self._lock = threading.Lock()
+        self._shutdown = False
+
+        try:
+            filesystem.create_directories(self.working_directory)
+        except PathAlreadyExistsException:
+            pass
+
+    def _stage(self, calls):
+        """Write a chunk of calls to the remote side, returning the task
+        name and job description."""
+        name = 'task-{}-{}'.format(self._prefix, next(self._counter))
+        self.filesystem.write_to_file(
+            self.working_directory / (name + '.in'),
+            frame_stream(dumps(calls)))
+
+        description = xenon_pb2.JobDescription()
+        description.CopyFrom(self.template)
+        description.executable = self.python
+        description.arguments[:] = ['-c', BOOTSTRAP, name + '.in',
+                                    name + '.out']
+        description.working_directory = str(self.working_directory)
+        description.stderr = name + '.err'
+        description.name = description.name or name
+        return name, description
+
+    def _track(self, name, job, future):
+        """Hook up `future` to the completion of `job`."""
+        def on_cancel(f):
+            if f.cancelled():
+                self.scheduler.cancel_job(job)
+
+        future.add_done_callback(on_cancel)
+        self.monitor.watch(job).add_done_callback(
+            lambda done: done.cancelled() or self._fetcher.submit(
+                self._collect, name, job, done.result(), future))
+
+    def _collect(self, name, job, status, future):
+        """Retrieve the results of a finished job."""
+        files = [self.working_directory / (name + ext)
+                 for ext in ('.in', '.out', '.err')]
+        try:
+            if status.exit_code != 0 or status.error_message:
+                stderr = b''.join(self.filesystem.read_from_file(files[2]))
+                raise JobFailed(job, status, stderr.decode(errors='replace'))
+
+            data = b''.join(self.filesystem.read_from_file(files[1]))
+            results = loads(parse_frames(data))
+        except BaseException as e:
+            if future.set_running_or_notify_cancel():
+                future.set_exception(e)
+        else:
+            if future.set_running_or_notify_cancel():
+                future.set_result(results)
+        finally:
+            with self._lock:
+                self._futures.discard(future)
+            if self.cleanup:
+                self.filesystem.delete_many(files)
+
+    def _check_open(self):
+        if self._shutdown:
+            raise RuntimeError("cannot schedule new futures after shutdown")
+
+    def _new_future(self):
+        """A future for a submitted job, pending until its results are
+        collected."""
+        future = Future()
+        with self._lock:
+            self._futures.add(future)
+        return future
+
+    def submit(self, fn, *args, **kwargs):
+        """Submit a single call as a job.
+
+        :return: a :py:class:`concurrent.futures.Future` with the return
+            value of the call."""
+        self._check_open()
+        name, description = self._stage([(fn, args, kwargs)])
+        job = self.scheduler.submit_batch_job(description)
+        chunk = self._new_future()
+        self._track(name, job, chunk)
+
+        future = Future()
+
+        def unpack(f):
+            if f.cancelled() or not future.set_running_or_notify_cancel():
+                return
+            if f.exception() is not None:
+                future.set_exception(f.exception())
+            else:
+                ok, value = f.result()[0]
+                if ok:
+                    future.set_result(value)
+                else:
+                    future.set_exception(value)
+
+        future.add_done_callback(
+            lambda f: f.cancelled() and chunk.cancel())
+        chunk.add_done_callback(unpack)
+        return future
+
+    def map(self, fn, *iterables, timeout=None, chunksize=1):
+        """Like :py:func:`map`, running the calls as jobs. Calls are packed
+        into jobs of `chunksize` calls each, to amortise the scheduling
+        overhead; the jobs are submitted with
+        :py:meth:`Scheduler.submit_many`, each as soon as its input is
+        written.
+
+        :return: iterator over the results, in order. If a call raised an
+            exception, it is raised when its result is reached. If the input
+            of a chunk could not be written, no further chunks are
+            submitted, and the error is raised at that chunk."""
+        self._check_open()
+        deadline = time.monotonic() + timeout if timeout is not None \
+            else None
+        calls = iter((fn, args, {}) for args in zip(*iterables))
+        staged = []
+
+        def descriptions():
+            while True:
+                chunk = list(itertools.islice(calls, chunksize))
+                if not chunk:
+                    return
+                try:
+                    name, description = self._stage(chunk)
+                except Exception as e:
+                    staged.append((None, e))
+                    return
+                staged.append((name, None))
+                yield description
+
+        submitted = self.scheduler.submit_many(descriptions())
+        futures = []
+        for index, (name, error) in enumerate(staged):
+            if error is None and submitted.jobs[index] is not None:
+                future = self._new_future()
+                self._track(name, submitted.jobs[index], future)
+            else:
+                future = Future()
+                future.set_exception(
+                    error if error is not None else submitted.errors[index])
+            futures.append(future)
+
+        def results():
+            for future in futures:
+                remaining = None if deadline is None \
+                    else deadline - time.monotonic()
+                for ok, value in future.result(remaining):
+                    if not ok:
+                        raise value
+                    yield value
+
+        return results()
+
+    def shutdown(self, wait=True, cancel_futures=False):
+        """Stop accepting work. With `wait`, block until all pending calls
+        are done; with `cancel_futures`, cancel the jobs of pending calls.
+        Without `wait`, the pending calls complete in the background, after
+        which the threads of the executor stop."""
+        self._shutdown = True
+        with self._lock:
+            pending = list(self._futures)
+
+        if cancel_futures:
+            for future in pending:
+                future.cancel()
+
+        if wait:
+            self._close(pending)
+        else:
+            threading.Thread(target=self._close, args=(pending,),
+                             name='xenon-executor-shutdown',
+                             daemon=True).start()
+
+    def _close(self, pending):
+        """Wait for `pending` futures, then stop the monitor, if it is our
+        own, and the threads collecting results."""
+        for future in pending:
+            if not future.cancelled():
+                future.exception()
+        if self._own_monitor:
+            self.monitor.stop()
+        self._fetcher.shutdown(wait=True)
@@ -0,0 +1,191 @@
+"""
+Incremental reading of the output files of running batch jobs.
+"""
+
+import logging
+import posixpath
+import queue
+import threading
+
+import grpc
+
+from .proto import xenon_pb2
+from .exceptions import (make_exception, NoSuchPathException)
+from .bulk import pipeline
+from .oop import unwrap
+
+
+def output_paths(description):
+    """The `(name, path)` pairs of the output files of a job; relative
+    paths are taken relative to its working directory."""
+    description = unwrap(description)
+    for name in ('stdout', 'stderr'):
+        path = getattr(description, name)
+        if path:
+            yield name, posixpath.join(description.working_directory, path)
+
+
+class Tail(object):
+    """Read position in one output file of a followed job.
+
+    :ivar name: ``'stdout'`` or ``'stderr'``.
+    :ivar path: the path of the file.
+    :ivar offset: the number of bytes consumed so far.
+    """
+    def __init__(self, output, name, path):
+        self.output = output
+        self.name = name
+        self.path = path
+        self.offset = 0
+
+    def request(self, filesystem):
+        return xenon_pb2.PathRequest(
+            filesystem=filesystem.__wrapped__,
+            path=xenon_pb2.Path(path=self.path, separator='/'))
+
+    def read(self, filesystem):
+        """Read everything after :py:attr:`offset`. The service has no
+        ranged reads, so the consumed part is streamed again and discarded
+        here."""
+        skip = self.offset
+        data = bytearray()
+        try:
+            for chunk in filesystem.__service__.readFromFile(
+                    self.request(filesystem)):
+                buffer = chunk.buffer
+                if skip >= len(buffer):
+                    skip -= len(buffer)
+                    continue
+                data.extend(buffer[skip:])
+                skip = 0
+        except grpc.RpcError as e:
+            raise make_exception(self.read, e) from None
+        self.offset += len(data)
+        return bytes(data)
+
+
+class FollowedOutput(object):
+    """Iterator over the output of a batch job, as returned by
+    :py:meth:`Scheduler.follow_output`. It yields `(name, data)` tuples,
+    where `name` is ``'stdout'`` or ``'stderr'``, as the output files grow,
+    and stops once the job is done and its output is read completely.
+
+    :ivar job: the :py:class:`Job`.
+    :ivar status: the final :py:class:`JobStatus`, once the job is done.
+    """
+    def __init__(self, job):
+        self.job = job
+        self.status = None
+        self.tails = []
+        self._queue = queue.Queue()
+        self._closers = []
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        item = self._queue.get()
+        if item is None:
+            self._queue.put(None)
+            self._close()
+            raise StopIteration
+        return item
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def _put(self, name, data):
+        if data:
+            self._queue.put((name, data))
+
+    def _finish(self, status):
+        self.status = status
+        self._queue.put(None)
+
+    def _close(self):
+        while self._closers:
+            self._closers.pop()()
+
+    def close(self):
+        """Stop following the output."""
+        self._close()
+        self._queue.put(None)
+
+
+class OutputFollower(object):
+    """Reads the output files of the jobs tracked by a :py:class:`JobMonitor`
+    after every polling round of the monitor. The sizes of all followed files
+    are requested together, pipelined over the channel; only files that
+    grew since the previous round are read.
+
+    :param monitor: the :py:class:`JobMonitor`.
+    :param filesystem: the :py:class:`FileSystem` holding the output files.
+    :param max_in_flight: maximum number of concurrent size requests.
+    """
+    def __init__(self, monitor, filesystem, max_in_flight=64):
+        self.monitor = monitor
+        self.filesystem = filesystem
+        self.max_in_flight = max_in_flight
+        self._followed = {}
+        self._lock = threading.Lock()
+        monitor.on_poll(self.poll)
+
+    def follow(self, job, description):
+        """Start following the output of `job`, which was submitted with
+        `description`.
+
+        :return: a :py:class:`FollowedOutput`."""
+        output = FollowedOutput(job)
+        output.tails = [Tail(output, name, path)
+                        for name, path in output_paths(description)]
+        output._closers.append(lambda: self.unfollow(job))
+        with self._lock:
+            self._followed[job.id] = output
+        self.monitor.watch(job)
+        return output
+
+    def unfollow(self, job):
+        """Stop following the output of `job`."""
+        with self._lock:
+            self._followed.pop(job.id, None)
+
+    def _sizes(self, tails):
+        for tail, (_, response, error) in zip(tails, pipeline(
+                self.filesystem.__service__.getAttributes,
+                (t.request(self.filesystem) for t in tails),
+                self.max_in_flight)):
+            if error is None:
+                yield tail, response.size
+                continue
+            error = make_exception(self.poll, error)
+            if not isinstance(error, NoSuchPathException):
+                logging.getLogger('xenon').warning(
+                    "Could not get the size of %s: %s", tail.path, error)
+
+    def poll(self, statuses):
+        """Read the new output of all followed jobs, and finish those that
+        are done according to `statuses`. Called by the monitor after
+        every polling round."""
+        with self._lock:
+            followed = list(self._followed.values())
+        done = {s.job.id: s for s in statuses if s.done}
+
+        tails = [t for output in followed for t in output.tails]
+        for tail, size in self._sizes(tails):
+            if size < tail.offset:
+                tail.offset = 0
+            if size == tail.offset:
+                continue
+            try:
+                tail.output._put(tail.name, tail.read(self.filesystem))
+            except Exception as e:
+                logging.getLogger('xenon').warning(
+                    "Could not read %s: %s", tail.path, e)
+
+        for output in followed:
+            if output.job.id in done:
+                self.unfollow(output.job)
+                output._finish(done[output.job.id])
@@ -0,0 +1,211 @@
+"""
+Many interactive jobs driven from a single event loop.
+"""
+
+import asyncio
+from concurrent.futures import (Future, TimeoutError)
+import logging
+import threading
+
+import grpc
+try:
+    from grpc import aio
+except ImportError:
+    aio = None
+
+from .proto import (xenon_pb2, xenon_pb2_grpc)
+from .exceptions import make_exception
+from .interactive import (InteractiveJob, StdinWriter)
+from .objects import Job
+from .oop import unwrap
+from .server import __server__
+
+
+class HubJob(InteractiveJob):
+    """An interactive job run by an :py:class:`InteractiveHub`. It has the
+    interface of :py:class:`xenon.interactive.InteractiveJob`, but no thread
+    of its own.
+
+    :ivar started: a :py:class:`concurrent.futures.Future` that is resolved
+        with the :py:class:`Job` once it is submitted.
+    :ivar finished: a :py:class:`concurrent.futures.Future` that is resolved
+        when the output streams of the job are closed.
+    """
+    def __init__(self, scheduler, stdin, on_stdout=None, on_stderr=None):
+        super(HubJob, self).__init__(scheduler, None, None, stdin)
+        self.on_stdout = on_stdout
+        self.on_stderr = on_stderr
+        self.started = Future()
+        self.finished = Future()
+
+    def __iter__(self):
+        raise TypeError("A HubJob has no raw output stream.")
+
+    def _start(self):
+        pass
+
+    def _output(self, response):
+        for data, reader, callback in [
+                (response.stdout, self._stdout, self.on_stdout),
+                (response.stderr, self._stderr, self.on_stderr)]:
+            if not data:
+                continue
+            if callback is None:
+                reader._feed(data)
+                continue
+            try:
+                callback(self, data)
+            except Exception:
+                logging.getLogger('xenon').exception(
+                    "Exception in InteractiveHub output callback.")
+
+    def wait(self, timeout=None):
+        """Wait until the output streams are closed, which happens when the
+        job finished.
+
+        :return: `True` if the streams were closed within `timeout`."""
+        try:
+            self.finished.result(timeout)
+            return True
+        except TimeoutError:
+            return False
+
+
+class InteractiveHub(object):
+    """Runs many interactive jobs over a single :py:mod:`grpc.aio` channel,
+    driven by one event loop in one background thread. Unlike
+    :py:meth:`Scheduler.submit_interactive_job`, which needs threads for
+    every job to feed its input and read its output, the number of threads
+    does not grow with the number of jobs.
+
+    Output is either buffered in the :py:attr:`HubJob.stdout` and
+    :py:attr:`HubJob.stderr` readers, or, if callbacks are given, passed to
+    them as `callback(job, data)` from the thread of the hub. Callbacks
+    should not block.
+
+    .. code-block:: python
+
+        with InteractiveHub(scheduler) as hub:
+            jobs = [hub.submit(description) for _ in range(200)]
+            for job in jobs:
+                job.write(b'ping\\n')
+            replies = [job.stdout.readline(timeout=5) for job in jobs]
+
+    :param scheduler: the :py:class:`Scheduler` to submit to.
+    :param channel_factory: function returning a :py:mod:`grpc.aio` channel
+        to the Xenon-GRPC server, called inside the event loop of the hub;
+        defaults to :py:meth:`xenon.server.Server.aio_channel`.
+    :param max_pending_writes: number of written chunks per job that may be
+        waiting to be sent before :py:meth:`HubJob.write` blocks.
+    """
+    def __init__(self, scheduler, channel_factory=None, max_pending_writes=64):
+        if aio is None:
+            raise ImportError("`InteractiveHub` requires grpcio >= 1.32.")
+
+        self.scheduler = scheduler
+        self.max_pending_writes = max_pending_writes
+        self.jobs = []
+        self._runs = []
+
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(
+            target=self.loop.run_forever, name='xenon-interactive-hub',
+            daemon=True)
+        self._thread.start()
+
+        async def connect():
+            return (channel_factory or __server__.aio_channel)()
+
+        self.channel = self._call(connect()).result()
+        self.stub = xenon_pb2_grpc.SchedulerServiceStub(self.channel)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def _call(self, coroutine):
+        return asyncio.run_coroutine_threadsafe(coroutine, self.loop)
+
+    def submit(self, description, on_stdout=None, on_stderr=None):
+        """Submit an interactive job. The call returns immediately; the
+        :py:class:`Job` is available from :py:attr:`HubJob.started`, or as
+        :py:attr:`HubJob.job` once it is submitted. Input that is written
+        before then is sent as soon as possible.
+
+        :param description: the :py:class:`JobDescription`.
+        :param on_stdout: optional `callback(job, data)` receiving standard
+            output, instead of the :py:attr:`HubJob.stdout` reader.
+        :param on_stderr: optional `callback(job, data)` receiving standard
+            error, instead of the :py:attr:`HubJob.stderr` reader.
+        :return: a :py:class:`HubJob`."""
+        job = HubJob(self.scheduler, StdinWriter(self.max_pending_writes),
+                     on_stdout, on_stderr)
+        self.jobs.append(job)
+        self._runs.append(self._call(self._run(job, unwrap(description))))
+        return job
+
+    async def _pump(self, call, writer):
+        while True:
+            data = await writer.anext_chunk()
+            if data is None:
+                break
+            await call.write(xenon_pb2.SubmitInteractiveJobRequest(
+                stdin=data))
+        await call.done_writing()
+
+    async def _run(self, job, description):
+        call = self.stub.submitInteractiveJob()
+        pump = None
+        try:
+            await call.write(xenon_pb2.SubmitInteractiveJobRequest(
+                scheduler=unwrap(self.scheduler), description=description))
+            pump = self.loop.create_task(self._pump(call, job._stdin))
+
+            first = await call.read()
+            if first is aio.EOF:
+                raise RuntimeError("Interactive job stream closed early.")
+            job.job = Job(first.job.id)
+            job.started.set_result(job.job)
+
+            while True:
+                response = await call.read()
+                if response is aio.EOF:
+                    break
+                job._output(response)
+
+        except grpc.RpcError as e:
+            job.error = make_exception(self._run, e)
+        except Exception as e:
+            job.error = e
+
+        finally:
+            if pump is not None:
+                pump.cancel()
+            if not job.started.done():
+                job.started.set_exception(job.error or RuntimeError(
+                    "Interactive job was not started."))
+            job._stdout._close()
+            job._stderr._close()
+            job._stdin.close()
+            job.finished.set_result(job.error)
+
+    def close(self, cancel=False):
+        """Close the standard input of all jobs, wait until they are done
+        (unless `cancel` is set, in which case the streams are cut), and stop
+        the event loop."""
+        for job in self.jobs:
+            job.close_stdin()
+
+        if cancel:
+            for run in self._runs:
+                run.cancel()
+
+        for job in self.jobs:
+            job.finished.exception()
+
+        self._call(self.channel.close()).result()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+        self.loop.close()
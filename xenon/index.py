@@ -0,0 +1,321 @@
+"""
+Persistent index of remote directory trees.
+"""
+
+from collections import namedtuple
+import posixpath
+import re
+import sqlite3
+import time
+
+import grpc
+
+from .proto import xenon_pb2
+from .bulk import pipeline
+from .exceptions import (make_exception, NoSuchPathException)
+from .listing import permission_mask
+from .walk import (walk, list_directory, is_subdirectory)
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    extension TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    creation_time INTEGER NOT NULL,
+    last_access_time INTEGER NOT NULL,
+    last_modified_time INTEGER NOT NULL,
+    is_directory INTEGER NOT NULL,
+    is_regular INTEGER NOT NULL,
+    is_symbolic_link INTEGER NOT NULL,
+    owner TEXT NOT NULL,
+    "group" TEXT NOT NULL,
+    permissions INTEGER NOT NULL);
+CREATE INDEX IF NOT EXISTS entries_parent ON entries (parent);
+CREATE INDEX IF NOT EXISTS entries_name ON entries (name);
+CREATE INDEX IF NOT EXISTS entries_extension ON entries (extension);
+CREATE INDEX IF NOT EXISTS entries_size ON entries (size);
+CREATE INDEX IF NOT EXISTS entries_mtime ON entries (last_modified_time);
+
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    last_modified_time INTEGER NOT NULL,
+    listed_at REAL NOT NULL);
+
+CREATE TABLE IF NOT EXISTS roots (
+    path TEXT PRIMARY KEY);
+"""
+
+ENTRY_FIELDS = [
+    'path', 'parent', 'name', 'extension', 'size', 'creation_time',
+    'last_access_time', 'last_modified_time', 'is_directory', 'is_regular',
+    'is_symbolic_link', 'owner', 'group', 'permissions']
+
+IndexEntry = namedtuple('IndexEntry', ENTRY_FIELDS)
+
+EXTENSION_PATTERN = re.compile(r'^\*\.([^*?\[\]/.]+)$')
+
+
+def extension(name):
+    """Extension of a file name, without the leading dot."""
+    stem, dot, ext = name.rpartition('.')
+    return ext if dot and stem else ''
+
+
+def entry_row(attributes):
+    """Convert a `xenon_pb2.PathAttributes` message to a database row."""
+    path = attributes.path.path
+    parent, name = posixpath.split(path)
+    return (path, parent, name, extension(name), attributes.size,
+            attributes.creation_time, attributes.last_access_time,
+            attributes.last_modified_time, attributes.is_directory,
+            attributes.is_regular, attributes.is_symbolic_link,
+            attributes.owner, attributes.group,
+            permission_mask(attributes.permissions))
+
+
+def escape_glob(s):
+    """Escape GLOB meta-characters in `s`."""
+    return re.sub(r'([*?\[])', r'[\1]', s)
+
+
+class RemoteIndex(object):
+    """Local SQLite index of the contents of remote directory trees. After
+    an initial :py:meth:`crawl`, queries on name, extension, size and age are
+    answered from the database, and :py:meth:`refresh` re-lists only those
+    directories whose modification time changed.
+
+    Note that modifying a file in place does not change the modification
+    time of its directory; such changes are only picked up by a refresh with
+    `full=True`.
+
+    :param filesystem: the :py:class:`FileSystem` to index.
+    :param database: file name of the SQLite database, or ``':memory:'``.
+    :param max_workers: number of concurrent list requests while crawling.
+    :param max_in_flight: maximum number of concurrent attribute requests
+        while refreshing.
+    """
+    def __init__(self, filesystem, database, max_workers=8,
+                 max_in_flight=64):
+        self.filesystem = filesystem
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight
+        self.connection = sqlite3.connect(str(database))
+        self.connection.executescript(SCHEMA)
+
+    def close(self):
+        self.connection.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def __len__(self):
+        return self.connection.execute(
+            'SELECT COUNT(*) FROM entries').fetchone()[0]
+
+    @property
+    def roots(self):
+        """The directories that were crawled."""
+        return [r for r, in self.connection.execute(
+            'SELECT path FROM roots ORDER BY path')]
+
+    def _store_listing(self, directory, entries, last_modified_time):
+        db = self.connection
+        db.execute('DELETE FROM entries WHERE parent = ?', (directory,))
+        db.executemany(
+            'INSERT OR REPLACE INTO entries VALUES ({})'.format(
+                ', '.join('?' * len(ENTRY_FIELDS))),
+            (entry_row(e) for e in entries))
+        db.execute(
+            'INSERT OR REPLACE INTO directories VALUES (?, ?, ?)',
+            (directory, last_modified_time, time.time()))
+
+    def _remove_tree(self, directory):
+        prefix = escape_glob(directory.rstrip('/')) + '/*'
+        db = self.connection
+        db.execute('DELETE FROM entries WHERE path = ? OR path GLOB ?',
+                   (directory, prefix))
+        db.execute('DELETE FROM directories WHERE path = ? OR path GLOB ?',
+                   (directory, prefix))
+
+    def _get_attributes(self, path):
+        request = xenon_pb2.PathRequest(
+            filesystem=self.filesystem.__wrapped__,
+            path=xenon_pb2.Path(path=path, separator='/'))
+        try:
+            return self.filesystem.__service__.getAttributes(request)
+        except grpc.RpcError as e:
+            raise make_exception(self._get_attributes, e) from None
+
+    def _crawl(self, root, root_mtime):
+        mtimes = {root: root_mtime}
+        count = 0
+        for directory, entries in walk(
+                self.filesystem, root, max_workers=self.max_workers):
+            for e in entries:
+                if is_subdirectory(e):
+                    mtimes[e.path.path] = e.last_modified_time
+            self._store_listing(directory, entries, mtimes.pop(directory))
+            count += len(entries)
+        return count
+
+    def crawl(self, root):
+        """Index the complete tree below `root`, replacing any previous
+        contents of the index for that tree.
+
+        :return: the number of entries indexed."""
+        root = posixpath.normpath(str(root))
+        attributes = self._get_attributes(root)
+        with self.connection:
+            self._remove_tree(root)
+            self.connection.execute(
+                'INSERT OR REPLACE INTO roots VALUES (?)', (root,))
+            return self._crawl(root, attributes.last_modified_time)
+
+    def refresh(self, full=False):
+        """Bring the index up to date. The attributes of all known
+        directories are requested (pipelined over the channel), and only
+        those directories whose modification time changed are listed again.
+        New sub-directories are crawled, vanished ones removed.
+
+        :param full: crawl all roots from scratch instead.
+        :return: the number of directories that were listed again, or the
+            number of roots crawled if `full` is set."""
+        if full:
+            roots = self.roots
+            for root in roots:
+                self.crawl(root)
+            return len(roots)
+
+        known = dict(self.connection.execute(
+            'SELECT path, last_modified_time FROM directories'))
+        requests = (xenon_pb2.PathRequest(
+            filesystem=self.filesystem.__wrapped__,
+            path=xenon_pb2.Path(path=path, separator='/'))
+            for path in sorted(known))
+
+        listed = 0
+        with self.connection:
+            for request, attributes, error in pipeline(
+                    self.filesystem.__service__.getAttributes, requests,
+                    self.max_in_flight):
+                path = request.path.path
+                if error is not None:
+                    error = make_exception(self.refresh, error)
+                    if not isinstance(error, NoSuchPathException):
+                        raise error from None
+                    self._remove_tree(path)
+                    continue
+
+                if attributes.last_modified_time == known[path]:
+                    continue
+
+                entries = list_directory(self.filesystem, path)
+                listed += 1
+                current = {e.path.path: e for e in entries
+                           if is_subdirectory(e)}
+                previous = {p for p, in self.connection.execute(
+                    'SELECT path FROM entries '
+                    'WHERE parent = ? AND is_directory', (path,))}
+
+                for gone in previous - set(current):
+                    self._remove_tree(gone)
+                self._store_listing(
+                    path, entries, attributes.last_modified_time)
+                for new in set(current) - previous:
+                    self._crawl(new, current[new].last_modified_time)
+
+        return listed
+
+    def query(self, pattern=None, extension=None, min_size=None,
+              max_size=None, older_than=None, newer_than=None, type=None,
+              under=None, order_by=None, limit=None, now=None):
+        """Query the index.
+
+        :param pattern: glob pattern. A pattern without a ``/`` is matched
+            against the file name, otherwise against the full path.
+        :param extension: file extension, without the leading dot.
+        :param min_size: minimum size in bytes.
+        :param max_size: maximum size in bytes.
+        :param older_than: only entries last modified more than this many
+            seconds ago.
+        :param newer_than: only entries last modified less than this many
+            seconds ago.
+        :param type: ``'f'`` for regular files, ``'d'`` for directories,
+            ``'l'`` for symbolic links.
+        :param under: only entries below this directory.
+        :param order_by: column to sort on; prefix with ``-`` to sort in
+            descending order.
+        :param limit: maximum number of results.
+        :param now: reference time for the age criteria, in seconds since
+            the epoch; defaults to the current time.
+        :return: list of :py:class:`IndexEntry` named tuples.
+        """
+        where, args = [], []
+
+        if pattern is not None:
+            match = EXTENSION_PATTERN.match(pattern)
+            if match and extension is None:
+                # the name of a hidden file such as `.nc` has no extension,
+                # but does match the pattern
+                where.append('(extension = ? OR name = ?)')
+                args.extend([match.group(1), pattern[1:]])
+            elif '/' in pattern:
+                where.append('path GLOB ?')
+                args.append(pattern)
+            else:
+                where.append('name GLOB ?')
+                args.append(pattern)
+
+        if extension is not None:
+            where.append('extension = ?')
+            args.append(extension)
+
+        if min_size is not None:
+            where.append('size >= ?')
+            args.append(min_size)
+
+        if max_size is not None:
+            where.append('size <= ?')
+            args.append(max_size)
+
+        now = time.time() if now is None else now
+        if older_than is not None:
+            where.append('last_modified_time < ?')
+            args.append(int((now - older_than) * 1000))
+
+        if newer_than is not None:
+            where.append('last_modified_time >= ?')
+            args.append(int((now - newer_than) * 1000))
+
+        if type is not None:
+            where.append({'f': 'is_regular', 'd': 'is_directory',
+                          'l': 'is_symbolic_link'}[type])
+
+        if under is not None:
+            where.append('path GLOB ?')
+            args.append(escape_glob(str(under).rstrip('/')) + '/*')
+
+        sql = 'SELECT {} FROM entries'.format(
+            ', '.join('"{}"'.format(f) for f in ENTRY_FIELDS))
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+
+        if order_by is not None:
+            column = order_by.lstrip('-')
+            if column not in ENTRY_FIELDS:
+                raise ValueError("Unknown column: {}".format(column))
+            sql += ' ORDER BY "{}"{}'.format(
+                column, ' DESC' if order_by.startswith('-') else '')
+
+        if limit is not None:
+            sql += ' LIMIT ?'
+            args.append(limit)
+
+        return [IndexEntry(*row) for row in
+                self.connection.execute(sql, args)]
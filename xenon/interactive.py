@@ -0,0 +1,350 @@
+"""
+Non-blocking I/O on interactive jobs.
+"""
+
+import asyncio
+from collections import deque
+import threading
+import time
+
+import grpc
+
+from .exceptions import make_exception
+
+
+class Waiters(object):
+    """Threads and asyncio tasks waiting for a condition. Threads wait on a
+    :py:class:`threading.Condition`; tasks register a future, which is
+    resolved in its own event loop when :py:meth:`notify` is called."""
+    def __init__(self):
+        self.condition = threading.Condition()
+        self.futures = []
+
+    def wait(self, deadline):
+        """Wait for a notification, with the condition held, until
+        `deadline` (from :py:func:`time.monotonic`). Raise `TimeoutError` if
+        the deadline has passed."""
+        remaining = None if deadline is None else deadline - time.monotonic()
+        if remaining is not None and remaining <= 0:
+            raise TimeoutError()
+        self.condition.wait(remaining)
+
+    def future(self):
+        """A future for the running event loop, that is resolved on the next
+        notification. Call with the condition held, from a coroutine."""
+        loop = asyncio.get_event_loop()
+        future = loop.create_future()
+        self.futures.append((loop, future))
+        return future
+
+    def notify(self):
+        """Wake up all waiters. Call with the condition held."""
+        self.condition.notify_all()
+        for loop, future in self.futures:
+            loop.call_soon_threadsafe(
+                lambda f: f.done() or f.set_result(None), future)
+        self.futures.clear()
+
+
+def deadline(timeout):
+    return None if timeout is None else time.monotonic() + timeout
+
+
+class StdinWriter(object):
+    """Bounded buffer between :py:meth:`InteractiveJob.write` and the
+    request stream of the GRPC call. Writing blocks while `max_pending`
+    chunks are waiting to be sent, so a fast producer is slowed down to the
+    rate at which GRPC flow control lets data through."""
+    def __init__(self, max_pending=64):
+        self.max_pending = max_pending
+        self.closed = False
+        self._chunks = deque()
+        self._waiters = Waiters()
+
+    def _put(self, data):
+        if self.closed:
+            raise ValueError("write to closed stdin")
+        if len(self._chunks) >= self.max_pending:
+            return False
+        self._chunks.append(bytes(data))
+        self._waiters.notify()
+        return True
+
+    def write(self, data, timeout=None):
+        limit = deadline(timeout)
+        with self._waiters.condition:
+            while not self._put(data):
+                self._waiters.wait(limit)
+
+    async def awrite(self, data):
+        while True:
+            with self._waiters.condition:
+                if self._put(data):
+                    return
+                future = self._waiters.future()
+            await future
+
+    def close(self):
+        with self._waiters.condition:
+            self.closed = True
+            self._waiters.notify()
+
+    def chunks(self):
+        """Generate the chunks to send, until the writer is closed."""
+        while True:
+            with self._waiters.condition:
+                while not self._chunks and not self.closed:
+                    self._waiters.wait(None)
+                if not self._chunks:
+                    return
+                data = self._chunks.popleft()
+                self._waiters.notify()
+            yield data
+
+    async def anext_chunk(self):
+        """Asynchronous version of :py:meth:`chunks`, returning the next
+        chunk to send, or `None` once the writer is closed."""
+        while True:
+            with self._waiters.condition:
+                if self._chunks:
+                    data = self._chunks.popleft()
+                    self._waiters.notify()
+                    return data
+                if self.closed:
+                    return None
+                future = self._waiters.future()
+            await future
+
+
+class OutputReader(object):
+    """Buffered reader of the standard output or error of an
+    :py:class:`InteractiveJob`. Data is buffered as it arrives; all reading
+    methods take from the buffer. The blocking methods accept a `timeout` in
+    seconds and raise `TimeoutError` when it expires; the `a`-prefixed
+    methods are coroutines for use with :py:mod:`asyncio`.
+
+    At the end of the stream, reads return what is left in the buffer, and
+    then ``b''``.
+    """
+    def __init__(self):
+        self.eof = False
+        self._buffer = bytearray()
+        self._waiters = Waiters()
+
+    def _feed(self, data):
+        with self._waiters.condition:
+            self._buffer.extend(data)
+            self._waiters.notify()
+
+    def _close(self):
+        with self._waiters.condition:
+            self.eof = True
+            self._waiters.notify()
+
+    def _pop(self, n):
+        data = bytes(self._buffer[:n])
+        del self._buffer[:n]
+        return data
+
+    def _take(self, size):
+        if size is None or size < 0:
+            return self._pop(len(self._buffer)) if self.eof else None
+        if len(self._buffer) >= size or self.eof:
+            return self._pop(size)
+        return None
+
+    def _take_line(self):
+        index = self._buffer.find(b'\n')
+        if index >= 0:
+            return self._pop(index + 1)
+        if self.eof:
+            return self._pop(len(self._buffer))
+        return None
+
+    def _take_some(self):
+        if self._buffer or self.eof:
+            return self._pop(len(self._buffer))
+        return None
+
+    def _blocking(self, take, timeout):
+        limit = deadline(timeout)
+        with self._waiters.condition:
+            while True:
+                data = take()
+                if data is not None:
+                    return data
+                self._waiters.wait(limit)
+
+    async def _async(self, take):
+        while True:
+            with self._waiters.condition:
+                data = take()
+                if data is not None:
+                    return data
+                future = self._waiters.future()
+            await future
+
+    def read(self, size=-1, timeout=None):
+        """Read `size` bytes, or everything until the end of the stream if
+        `size` is negative."""
+        return self._blocking(lambda: self._take(size), timeout)
+
+    def readline(self, timeout=None):
+        """Read a line, including the trailing newline."""
+        return self._blocking(self._take_line, timeout)
+
+    def read_some(self, timeout=None):
+        """Read whatever is available, waiting for at least one byte."""
+        return self._blocking(self._take_some, timeout)
+
+    def read_nowait(self):
+        """Read whatever is available, without waiting."""
+        with self._waiters.condition:
+            return self._pop(len(self._buffer))
+
+    async def aread(self, size=-1):
+        return await self._async(lambda: self._take(size))
+
+    async def areadline(self):
+        return await self._async(self._take_line)
+
+    async def aread_some(self):
+        return await self._async(self._take_some)
+
+    def __iter__(self):
+        return iter(self.readline, b'')
+
+    def __aiter__(self):
+        return self
+
+    async def __anext__(self):
+        line = await self.areadline()
+        if not line:
+            raise StopAsyncIteration
+        return line
+
+
+class InteractiveJob(object):
+    """An interactive job, as returned by
+    :py:meth:`Scheduler.submit_interactive_job`.
+
+    Standard input is written with :py:meth:`write`, which blocks while too
+    much data is waiting to be sent. Standard output and error are read
+    through the buffered readers :py:attr:`stdout` and :py:attr:`stderr`.
+    A single background thread receives the output stream of the job and
+    feeds both readers; it is started when either reader is first used.
+
+    .. code-block:: python
+
+        job = scheduler.submit_interactive_job(description)
+        job.write(b'hello\\n')
+        print(job.stdout.readline(timeout=1.0))
+        job.close_stdin()
+
+    For backward compatibility, the object can be unpacked into the
+    :py:class:`Job` and the raw output stream of the call, as in
+    ``job, stream = scheduler.submit_interactive_job(...)``; the readers
+    cannot be used after that.
+
+    :ivar job: the :py:class:`Job`.
+    :ivar error: the exception that ended the output stream, if any.
+    """
+    def __init__(self, scheduler, job, responses, stdin=None):
+        self.scheduler = scheduler
+        self.job = job
+        self.error = None
+        self._responses = responses
+        self._stdin = stdin
+        self._stdout = OutputReader()
+        self._stderr = OutputReader()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._raw = False
+
+    @property
+    def id(self):
+        return self.job.id
+
+    def __iter__(self):
+        with self._lock:
+            if self._thread is not None:
+                raise RuntimeError(
+                    "The output stream is already being read.")
+            self._raw = True
+        yield self.job
+        yield self._responses
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close_stdin()
+
+    def _demultiplex(self):
+        try:
+            for response in self._responses:
+                if response.stdout:
+                    self._stdout._feed(response.stdout)
+                if response.stderr:
+                    self._stderr._feed(response.stderr)
+        except grpc.RpcError as e:
+            self.error = make_exception(self._demultiplex, e)
+        finally:
+            self._stdout._close()
+            self._stderr._close()
+            if self._stdin is not None:
+                self._stdin.close()
+
+    def _start(self):
+        with self._lock:
+            if self._raw:
+                raise RuntimeError(
+                    "The output stream was handed out as a raw stream.")
+            if self._thread is None:
+                self._thread = threading.Thread(
+                    target=self._demultiplex, daemon=True,
+                    name='xenon-interactive-{}'.format(self.job.id))
+                self._thread.start()
+
+    @property
+    def stdout(self):
+        """:py:class:`OutputReader` for the standard output."""
+        self._start()
+        return self._stdout
+
+    @property
+    def stderr(self):
+        """:py:class:`OutputReader` for the standard error."""
+        self._start()
+        return self._stderr
+
+    def _writer(self):
+        if self._stdin is None:
+            raise RuntimeError(
+                "This job reads its input from a user supplied stream.")
+        return self._stdin
+
+    def write(self, data, timeout=None):
+        """Send `data` to the standard input of the job. Blocks while the
+        buffer of unsent data is full; raises `TimeoutError` if that takes
+        longer than `timeout` seconds."""
+        self._writer().write(data, timeout)
+
+    async def awrite(self, data):
+        """Coroutine version of :py:meth:`write`."""
+        await self._writer().awrite(data)
+
+    def close_stdin(self):
+        """Close the standard input of the job, after sending what is
+        buffered."""
+        if self._stdin is not None:
+            self._stdin.close()
+
+    def wait(self, timeout=None):
+        """Wait until the output streams are closed, which happens when the
+        job finished.
+
+        :return: `True` if the streams were closed within `timeout`."""
+        self._start()
+        self._thread.join(timeout)
+        return not self._thread.is_alive()
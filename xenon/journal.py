@@ -0,0 +1,238 @@
+"""
+A crash-safe journal of submitted jobs, stored in SQLite.
+"""
+
+from collections import namedtuple
+import sqlite3
+import threading
+import time
+
+from .proto import xenon_pb2
+from . import bulk
+from .objects import Job
+from .oop import unwrap
+
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    description BLOB NOT NULL,
+    submitted REAL NOT NULL,
+    state TEXT,
+    done INTEGER NOT NULL DEFAULT 0,
+    exit_code INTEGER,
+    error_message TEXT,
+    updated REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_done ON jobs (done);
+"""
+
+
+Reconciliation = namedtuple(
+    'Reconciliation', ['running', 'finished', 'lost', 'unknown'])
+Reconciliation.__doc__ = """Outcome of :py:meth:`JobJournal.resume`.
+
+:ivar running: jobs of the journal that are still queued or running.
+:ivar finished: jobs that finished while nobody was watching.
+:ivar lost: jobs that the scheduler no longer knows; they are marked as
+    done in the journal, with an error message.
+:ivar unknown: jobs that the scheduler knows, but the journal does not.
+"""
+
+
+class JobJournal(object):
+    """Records submitted jobs, their descriptions and their last known
+    status in a local SQLite database, so that a campaign survives the
+    death of the process that runs it.
+
+    The database is opened in WAL mode. Submissions are written in one
+    transaction per call to :py:meth:`record_submissions` before it
+    returns, so no submitted job can be lost; status changes are buffered
+    and written in batches, since they can be recovered from the scheduler.
+
+    .. code-block:: python
+
+        journal = JobJournal('campaign.db', scheduler)
+        with JobMonitor(scheduler) as monitor:
+            journal.attach(monitor)
+            journal.resume(monitor)
+            journal.submit_many(descriptions)
+            monitor.wait()
+        journal.close()
+
+    :param path: the database file.
+    :param scheduler: the :py:class:`Scheduler` the jobs are submitted to.
+    :param flush_interval: longest time in seconds that status changes are
+        buffered.
+    :param batch_size: number of buffered status changes that triggers a
+        write, and number of jobs per status request in
+        :py:meth:`resume`.
+    """
+    def __init__(self, path, scheduler, flush_interval=1.0, batch_size=1000):
+        self.path = path
+        self.scheduler = scheduler
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+
+        self._lock = threading.RLock()
+        self._pending = {}
+        self._flushed = time.monotonic()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript(SCHEMA)
+        self._states = dict(self._db.execute(
+            'SELECT id, state FROM jobs WHERE NOT done'))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def close(self):
+        """Write buffered changes and close the database."""
+        self.flush()
+        with self._lock:
+            self._db.close()
+
+    def record_submissions(self, jobs, descriptions):
+        """Record submitted jobs, in a single transaction.
+
+        :param jobs: the :py:class:`Job` objects; `None` entries, as in the
+            result of :py:meth:`Scheduler.submit_many`, are skipped.
+        :param descriptions: the descriptions they were submitted with."""
+        now = time.time()
+        rows = [(job.id, unwrap(d).SerializeToString(), now)
+                for job, d in zip(jobs, descriptions) if job is not None]
+        with self._lock, self._db:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO jobs (id, description, submitted) '
+                'VALUES (?, ?, ?)', rows)
+            self._states.update((id_, None) for id_, _, _ in rows)
+
+    def record_statuses(self, statuses):
+        """Buffer the statuses of journalled jobs that changed state, and
+        write the buffer if it is full or old enough. The signature allows
+        it to be registered with :py:meth:`JobMonitor.on_poll`."""
+        with self._lock:
+            for status in statuses:
+                id_ = status.job.id
+                if id_ not in self._states:
+                    continue
+                if status.done:
+                    del self._states[id_]
+                elif self._states[id_] == status.state:
+                    continue
+                else:
+                    self._states[id_] = status.state
+                self._pending[id_] = (
+                    status.state, int(status.done), status.exit_code,
+                    status.error_message, time.time(), id_)
+
+            if len(self._pending) >= self.batch_size or \
+                    time.monotonic() - self._flushed >= self.flush_interval:
+                self.flush()
+
+    def flush(self):
+        """Write buffered status changes, in a single transaction."""
+        with self._lock:
+            rows, self._pending = list(self._pending.values()), {}
+            self._flushed = time.monotonic()
+            if not rows:
+                return
+            with self._db:
+                self._db.executemany(
+                    'UPDATE jobs SET state = ?, done = ?, exit_code = ?, '
+                    'error_message = ?, updated = ? WHERE id = ?', rows)
+
+    def submit_many(self, descriptions, max_in_flight=16):
+        """Submit jobs as :py:meth:`Scheduler.submit_many` does, and record
+        every job as soon as the scheduler returns its id, so that an
+        interrupted batch leaves no submitted job out of the journal.
+
+        :return: a :py:class:`xenon.bulk.SubmitResult`."""
+        return bulk.submit_many(
+            self.scheduler, descriptions, max_in_flight, Job,
+            lambda description, id_: self.record_submissions(
+                [Job(id_)], [description]))
+
+    def attach(self, monitor):
+        """Record the statuses polled by `monitor`."""
+        monitor.on_poll(self.record_statuses)
+
+    def unfinished(self):
+        """The journalled jobs that are not known to be done.
+
+        :return: list of :py:class:`Job`."""
+        with self._lock:
+            return [Job(id_) for id_ in self._states]
+
+    def description(self, job):
+        """The description `job` was submitted with.
+
+        :return: a `xenon_pb2.JobDescription`, or `None`."""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT description FROM jobs WHERE id = ?',
+                (job.id,)).fetchone()
+        return xenon_pb2.JobDescription.FromString(row[0]) \
+            if row is not None else None
+
+    def status(self, job):
+        """The last recorded state of `job`.
+
+        :return: a tuple `(state, done, exit_code, error_message)`, or
+            `None`."""
+        self.flush()
+        with self._lock:
+            return self._db.execute(
+                'SELECT state, done, exit_code, error_message FROM jobs '
+                'WHERE id = ?', (job.id,)).fetchone()
+
+    def resume(self, monitor=None):
+        """Reconcile the journal with the scheduler, after a restart. The
+        jobs of the scheduler are listed with :py:meth:`Scheduler.get_jobs`,
+        and the status of all unfinished jobs of the journal is requested in
+        batches. Jobs that are still running are watched by `monitor`, if
+        given.
+
+        :return: a :py:class:`xenon.journal.Reconciliation`."""
+        known = {j.id for j in self.scheduler.get_jobs(queues=[])}
+        jobs = self.unfinished()
+        result = Reconciliation([], [], [], [])
+
+        statuses = []
+        for i in range(0, len(jobs), self.batch_size):
+            statuses.extend(self.scheduler.get_job_statuses(
+                jobs=[unwrap(j) for j in jobs[i:i + self.batch_size]]))
+
+        lost = []
+        for job, status in zip(jobs, statuses):
+            if status.error_type == status.ErrorType.NOT_FOUND:
+                lost.append(job)
+            elif status.done:
+                result.finished.append(job)
+            else:
+                result.running.append(job)
+                if monitor is not None:
+                    monitor.watch(job)
+
+        self.record_statuses(statuses)
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "UPDATE jobs SET done = 1, error_message = ?, updated = ? "
+                "WHERE id = ?",
+                [("Job is not known to the scheduler.", now, job.id)
+                 for job in lost])
+            for job in lost:
+                self._states.pop(job.id, None)
+        self.flush()
+
+        with self._lock:
+            journalled = {row[0] for row in self._db.execute(
+                'SELECT id FROM jobs')}
+        result.lost.extend(lost)
+        result.unknown.extend(Job(id_) for id_ in sorted(known - journalled))
+        return result
@@ -0,0 +1,326 @@
+"""
+Columnar storage of large directory listings.
+"""
+
+from array import array
+import heapq
+import time
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+IS_DIRECTORY = 1
+IS_REGULAR = 2
+IS_SYMBOLIC_LINK = 4
+IS_OTHER = 8
+IS_HIDDEN = 16
+IS_EXECUTABLE = 32
+IS_READABLE = 64
+IS_WRITABLE = 128
+
+FLAG_FIELDS = [
+    (IS_DIRECTORY, 'is_directory'),
+    (IS_REGULAR, 'is_regular'),
+    (IS_SYMBOLIC_LINK, 'is_symbolic_link'),
+    (IS_OTHER, 'is_other'),
+    (IS_HIDDEN, 'is_hidden'),
+    (IS_EXECUTABLE, 'is_executable'),
+    (IS_READABLE, 'is_readable'),
+    (IS_WRITABLE, 'is_writable')]
+
+# typecodes of the numeric columns, with the equivalent numpy dtype
+COLUMNS = [
+    ('directory', 'I', 'u4'),
+    ('size', 'Q', 'u8'),
+    ('creation_time', 'Q', 'u8'),
+    ('last_access_time', 'Q', 'u8'),
+    ('last_modified_time', 'Q', 'u8'),
+    ('flags', 'B', 'u1'),
+    ('permissions', 'H', 'u2')]
+
+
+def permission_mask(permissions):
+    """Pack a list of :py:class:`PosixFilePermission` values into a bit
+    mask. Bit `n - 1` is set for permission value `n`, so that `OWNER_READ`
+    maps to bit 0 and `OTHERS_EXECUTE` to bit 8."""
+    mask = 0
+    for p in permissions:
+        if p:
+            mask |= 1 << (int(getattr(p, 'value', p)) - 1)
+    return mask
+
+
+class PathTable(object):
+    """Column oriented table of path attributes, as returned by
+    :py:meth:`FileSystem.list_table`.
+
+    Entries are stored in :py:mod:`array` columns. Parent directories are
+    interned in the `directories` list, while the base names are stored
+    back-to-back in a single UTF-8 encoded buffer. This takes a few dozen
+    bytes per entry, instead of several Python objects per entry.
+
+    If :py:mod:`numpy` is installed the numeric columns are exposed as
+    numpy arrays through :py:meth:`column`, and the query helpers are
+    vectorised over zero-copy views of the columns.
+
+    :ivar directories: list of unique parent directories.
+    :ivar directory: per entry index into `directories`.
+    :ivar size: size in bytes.
+    :ivar creation_time: creation time in milliseconds since the epoch.
+    :ivar last_access_time: access time in milliseconds since the epoch.
+    :ivar last_modified_time: modification time in milliseconds since the
+        epoch.
+    :ivar flags: bit mask of the `is_*` fields of `PathAttributes`; see
+        the `IS_*` constants in :py:mod:`xenon.listing`.
+    :ivar permissions: bit mask of POSIX permissions, see
+        :py:func:`permission_mask`.
+    """
+    def __init__(self):
+        self.directories = []
+        self._directory_index = {}
+        self._names = bytearray()
+        self._name_offsets = array('Q', [0])
+
+        for name, typecode, _ in COLUMNS:
+            setattr(self, name, array(typecode))
+
+    def __len__(self):
+        return len(self.size)
+
+    def _intern_directory(self, directory):
+        try:
+            return self._directory_index[directory]
+        except KeyError:
+            index = len(self.directories)
+            self.directories.append(directory)
+            self._directory_index[directory] = index
+            return index
+
+    def _append_row(self, directory, name, size, creation_time,
+                    last_access_time, last_modified_time, flags,
+                    permissions):
+        self.directory.append(self._intern_directory(directory))
+        self._names.extend(name)
+        self._name_offsets.append(len(self._names))
+        self.size.append(size)
+        self.creation_time.append(creation_time)
+        self.last_access_time.append(last_access_time)
+        self.last_modified_time.append(last_modified_time)
+        self.flags.append(flags)
+        self.permissions.append(permissions)
+
+    def append(self, attributes):
+        """Add a `xenon_pb2.PathAttributes` message to the table."""
+        directory, sep, name = attributes.path.path.rpartition('/')
+        flags = 0
+        for bit, field in FLAG_FIELDS:
+            if getattr(attributes, field):
+                flags |= bit
+
+        self._append_row(
+            directory or sep, name.encode(), attributes.size,
+            attributes.creation_time, attributes.last_access_time,
+            attributes.last_modified_time, flags,
+            permission_mask(attributes.permissions))
+
+    def extend(self, stream):
+        """Add all `xenon_pb2.PathAttributes` messages from `stream`."""
+        for attributes in stream:
+            self.append(attributes)
+        return self
+
+    def name(self, i):
+        """Base name of entry `i`."""
+        return self._names[
+            self._name_offsets[i]:self._name_offsets[i + 1]].decode()
+
+    def path_string(self, i):
+        """Full path of entry `i`, as a string."""
+        directory = self.directories[self.directory[i]]
+        if not directory:
+            return self.name(i)
+        return directory.rstrip('/') + '/' + self.name(i)
+
+    def path(self, i):
+        """Full path of entry `i`, as a :py:class:`xenon.Path`."""
+        from .objects import Path
+        return Path(self.path_string(i))
+
+    def paths(self, indices=None):
+        """Generate the full paths of all entries (or those in `indices`) as
+        strings."""
+        if indices is None:
+            indices = range(len(self))
+        return (self.path_string(i) for i in indices)
+
+    def column(self, name):
+        """Get a copy of a column by name, as a numpy array if `numpy` is
+        available, otherwise as an `array.array`."""
+        if numpy is None:
+            return array(getattr(self, name).typecode, getattr(self, name))
+        return self._view(name).copy()
+
+    def _view(self, name):
+        """Numpy array sharing memory with a column. While it exists, the
+        table cannot grow, so it must not outlive the calling method."""
+        data = getattr(self, name)
+        dtype = next(d for n, _, d in COLUMNS if n == name)
+        return numpy.frombuffer(data, dtype=dtype) if len(data) \
+            else numpy.zeros(0, dtype=dtype)
+
+    def where_flags(self, flags, value=True):
+        """Indices of entries where all bits in `flags` are set (or, when
+        `value` is `False`, where none of them are)."""
+        if numpy is not None:
+            hits = (self._view('flags') & flags) == (flags if value else 0)
+            return numpy.flatnonzero(hits)
+
+        target = flags if value else 0
+        return [i for i, f in enumerate(self.flags) if f & flags == target]
+
+    def select(self, indices):
+        """Create a new table containing only the entries in `indices`."""
+        result = PathTable()
+        result.directories = list(self.directories)
+        result._directory_index = dict(self._directory_index)
+
+        for i in indices:
+            i = int(i)
+            result.directory.append(self.directory[i])
+            result._names.extend(self._names[
+                self._name_offsets[i]:self._name_offsets[i + 1]])
+            result._name_offsets.append(len(result._names))
+            for name, _, _ in COLUMNS[1:]:
+                getattr(result, name).append(getattr(self, name)[i])
+
+        return result
+
+    def files(self):
+        """Sub-table of all entries that are not directories."""
+        return self.select(self.where_flags(IS_DIRECTORY, False))
+
+    def du(self):
+        """Total size of all entries that are not directories, in bytes."""
+        if numpy is not None:
+            is_dir = (self._view('flags') & IS_DIRECTORY) != 0
+            return int(self._view('size')[~is_dir].sum())
+
+        return sum(s for s, f in zip(self.size, self.flags)
+                   if not f & IS_DIRECTORY)
+
+    def du_by_directory(self):
+        """Cumulative size of all entries below each directory, like the
+        `du` command. Sizes of files are attributed to their parent and
+        every ancestor.
+
+        :return: dictionary mapping directory to size in bytes."""
+        if numpy is not None:
+            is_dir = (self._view('flags') & IS_DIRECTORY) != 0
+            direct = numpy.bincount(
+                self._view('directory')[~is_dir],
+                weights=self._view('size')[~is_dir],
+                minlength=len(self.directories))
+        else:
+            direct = [0] * len(self.directories)
+            for d, s, f in zip(self.directory, self.size, self.flags):
+                if not f & IS_DIRECTORY:
+                    direct[d] += s
+
+        result = {}
+        for directory, size in zip(self.directories, direct):
+            size = int(size)
+            path = directory
+            while True:
+                result[path] = result.get(path, 0) + size
+                if path in ('/', ''):
+                    break
+                path = path.rpartition('/')[0] or '/'
+
+        return result
+
+    def _time_cutoff(self, age, now):
+        if now is None:
+            now = time.time()
+        return int((now - age) * 1000)
+
+    def older_than(self, age, now=None, column='last_modified_time'):
+        """Sub-table of entries that were last modified more than `age`
+        seconds before `now` (default: the current time)."""
+        cutoff = self._time_cutoff(age, now)
+        if numpy is not None:
+            indices = numpy.flatnonzero(self._view(column) < cutoff)
+        else:
+            indices = [i for i, t in enumerate(getattr(self, column))
+                       if t < cutoff]
+        return self.select(indices)
+
+    def newer_than(self, age, now=None, column='last_modified_time'):
+        """Sub-table of entries that were last modified less than `age`
+        seconds before `now` (default: the current time)."""
+        cutoff = self._time_cutoff(age, now)
+        if numpy is not None:
+            indices = numpy.flatnonzero(self._view(column) >= cutoff)
+        else:
+            indices = [i for i, t in enumerate(getattr(self, column))
+                       if t >= cutoff]
+        return self.select(indices)
+
+    def largest(self, n, files_only=True):
+        """Find the `n` largest entries.
+
+        :param n: number of entries to return.
+        :param files_only: skip directories.
+        :return: list of `(path, size)` tuples, largest first."""
+        if n <= 0:
+            return []
+        if numpy is not None:
+            size = self._view('size')
+            candidates = self.where_flags(IS_DIRECTORY, False) \
+                if files_only else numpy.arange(len(self))
+            if len(candidates) > n:
+                part = numpy.argpartition(size[candidates], -n)[-n:]
+                candidates = candidates[part]
+            order = candidates[numpy.argsort(size[candidates])[::-1]]
+        else:
+            candidates = self.where_flags(IS_DIRECTORY, False) \
+                if files_only else range(len(self))
+            order = heapq.nlargest(n, candidates, key=self.size.__getitem__)
+
+        return [(self.path(int(i)), self.size[int(i)]) for i in order]
+
+    def to_numpy(self):
+        """Convert to a numpy structured array. The `path` field contains
+        the full path as a Python string."""
+        if numpy is None:
+            raise ImportError("`PathTable.to_numpy` requires numpy.")
+
+        dtype = [('path', object)] + [(n, d) for n, _, d in COLUMNS]
+        result = numpy.zeros(len(self), dtype=dtype)
+        result['path'] = list(self.paths())
+        for name, _, _ in COLUMNS:
+            result[name] = self.column(name)
+        return result
+
+    def to_dict(self):
+        """Convert to a dictionary of columns, with full paths in a `path`
+        column and the flags unpacked into boolean columns."""
+        result = {'path': list(self.paths())}
+        for name, _, _ in COLUMNS[1:]:
+            result[name] = self.column(name)
+        for bit, field in FLAG_FIELDS:
+            result[field] = [bool(f & bit) for f in self.flags] \
+                if numpy is None else (self._view('flags') & bit) != 0
+        return result
+
+    def to_pandas(self):
+        """Convert to a `pandas.DataFrame`."""
+        import pandas
+        return pandas.DataFrame(self.to_dict())
+
+    def to_arrow(self):
+        """Convert to a `pyarrow.Table`."""
+        import pyarrow
+        return pyarrow.table(self.to_dict())
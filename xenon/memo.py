@@ -0,0 +1,269 @@
+"""
+Memoisation of batch jobs, keyed by a hash of their description and inputs.
+"""
+
+import hashlib
+import json
+import os
+import threading
+
+from .proto import xenon_pb2
+from .bulk import pipeline
+from .objects import (Job, Path)
+from .oop import unwrap
+
+
+class MemoizedJob(Job):
+    """A job that was not submitted, because an earlier job with the same
+    description and inputs completed successfully and its outputs are still
+    present. The scheduler may no longer know its id.
+
+    :ivar exit_code: the exit code of the earlier job, or `None` if the
+        scheduler lost the job before its completion was recorded.
+    """
+    memoized = True
+
+    def __init__(self, id_, exit_code):
+        super(MemoizedJob, self).__init__(id_)
+        self.exit_code = exit_code
+
+
+class JobMemo(object):
+    """Opt-in memoisation of batch jobs. Every job submitted through the
+    memo is recorded in a local file, under a hash of its serialised
+    description and the fingerprints of its input files. Submitting a job
+    with the same hash again returns:
+
+    * a :py:class:`MemoizedJob`, if the earlier job completed with exit code
+      0 and all its outputs still exist;
+    * a :py:class:`MemoizedJob` without exit code, if the scheduler no
+      longer knows the earlier job (for instance after a restart) and all
+      its outputs exist;
+    * the earlier :py:class:`Job`, if it is still queued or running;
+    * a newly submitted :py:class:`Job` otherwise.
+
+    .. code-block:: python
+
+        memo = JobMemo(scheduler, filesystem, 'jobs.memo')
+        monitor.on_transition(memo.record)
+        job = memo.submit(description, inputs=['in.dat'],
+                          outputs=['out.dat'])
+
+    The fingerprint of an input is its size and modification time, or, with
+    `checksum` set, the SHA-256 of its content, which costs a full read of
+    every input. All fingerprints, output checks and status requests of a
+    call are pipelined over the channel.
+
+    The memo file is a log to which every change is appended as a line of
+    JSON; it is compacted by :py:meth:`save`, and when it is loaded.
+
+    :param scheduler: the :py:class:`Scheduler` to submit to.
+    :param filesystem: the :py:class:`FileSystem` holding the inputs and
+        outputs.
+    :param path: local file in which the memo is stored.
+    :param checksum: fingerprint inputs by content instead of attributes.
+    :param max_in_flight: maximum number of concurrent requests.
+    """
+    def __init__(self, scheduler, filesystem, path, checksum=False,
+                 max_in_flight=64):
+        self.scheduler = scheduler
+        self.filesystem = filesystem
+        self.path = path
+        self.checksum = checksum
+        self.max_in_flight = max_in_flight
+        self._lock = threading.Lock()
+
+        self.entries = {}
+        lines = 0
+        if os.path.exists(path):
+            with open(path) as f:
+                for line in f:
+                    lines += 1
+                    try:
+                        change = json.loads(line)
+                    except ValueError:
+                        continue
+                    key = change.pop('key')
+                    if change.get('deleted'):
+                        self.entries.pop(key, None)
+                    else:
+                        self.entries[key] = change
+        self._keys = {e['job']: k for k, e in self.entries.items()}
+        if lines > len(self.entries):
+            self.save()
+
+    @staticmethod
+    def _line(key, entry):
+        change = dict(entry or {'deleted': True}, key=key)
+        return json.dumps(change, sort_keys=True) + '\n'
+
+    def _append(self, keys):
+        """Append the current entries of `keys` to the memo file; must be
+        called with the lock held."""
+        if not keys:
+            return
+        with open(self.path, 'a') as f:
+            f.write(''.join(self._line(k, self.entries.get(k))
+                            for k in keys))
+
+    def save(self):
+        """Write the memo to its file, dropping superseded changes."""
+        temporary = self.path + '.tmp'
+        with self._lock:
+            with open(temporary, 'w') as f:
+                f.write(''.join(self._line(k, e)
+                                for k, e in self.entries.items()))
+            os.replace(temporary, self.path)
+
+    def _requests(self, paths):
+        return (xenon_pb2.PathRequest(
+            filesystem=self.filesystem.__wrapped__,
+            path=xenon_pb2.Path(path=str(p), separator='/')) for p in paths)
+
+    def _fingerprints(self, paths):
+        if self.checksum:
+            return {p: self._checksum(p) for p in paths}
+
+        fingerprints = {}
+        for request, response, error in pipeline(
+                self.filesystem.__service__.getAttributes,
+                self._requests(paths), self.max_in_flight):
+            fingerprints[request.path.path] = None if error is not None \
+                else [response.size, response.last_modified_time]
+        return fingerprints
+
+    def _checksum(self, path):
+        digest = hashlib.sha256()
+        try:
+            for chunk in self.filesystem.read_from_file(Path(str(path))):
+                digest.update(chunk)
+        except Exception:
+            return None
+        return digest.hexdigest()
+
+    def _missing(self, paths):
+        return {request.path.path for request, response, error in pipeline(
+                    self.filesystem.__service__.exists,
+                    self._requests(paths), self.max_in_flight)
+                if error is not None or not response.value}
+
+    def key(self, description, fingerprints):
+        """The hash of `description` and the fingerprints of its inputs."""
+        digest = hashlib.sha256(
+            unwrap(description).SerializeToString(deterministic=True))
+        digest.update(json.dumps(fingerprints).encode())
+        return digest.hexdigest()
+
+    def record(self, job, status, previous=None):
+        """Record the final status of `job`. The signature allows it to be
+        registered with :py:meth:`JobMonitor.on_transition`; jobs that
+        were not submitted through the memo are ignored.
+
+        A job that the scheduler no longer knows is marked as lost; whether
+        it completed is decided by the presence of its outputs."""
+        if not status.done and not status.error_message:
+            return
+        with self._lock:
+            key = self._keys.get(job.id)
+            if key is None:
+                return
+            entry = self.entries[key]
+            if entry['exit_code'] is not None:
+                return
+            if status.error_type == status.ErrorType.NOT_FOUND:
+                entry['lost'] = True
+            elif status.exit_code == 0 and not status.error_message:
+                entry['exit_code'] = status.exit_code
+            else:
+                del self.entries[key]
+                del self._keys[job.id]
+            self._append([key])
+
+    def refresh(self, keys=None):
+        """Request the status of the jobs of the memo (or of `keys`) that
+        have not completed, in one call, and record those that are done."""
+        with self._lock:
+            pending = [self.entries[k]['job'] for k in
+                       (keys if keys is not None else self.entries)
+                       if k in self.entries
+                       and self.entries[k]['exit_code'] is None
+                       and not self.entries[k].get('lost')]
+        if not pending:
+            return
+        for status in self.scheduler.get_job_statuses(
+                jobs=[xenon_pb2.Job(id=id_) for id_ in pending]):
+            self.record(status.job, status)
+
+    def submit(self, description, inputs=(), outputs=()):
+        """Submit a job, unless the memo has a matching job.
+
+        :param description: the :py:class:`JobDescription`.
+        :param inputs: paths of the input files, which are fingerprinted.
+        :param outputs: paths of the output files, which must exist for a
+            completed job to be reused.
+        :return: a :py:class:`Job` or :py:class:`MemoizedJob`."""
+        result = self.submit_many([(description, inputs, outputs)])
+        if result.errors:
+            raise result.errors[0]
+        return result.jobs[0]
+
+    def submit_many(self, tasks, max_in_flight=16):
+        """Submit many jobs, unless the memo has a matching job.
+
+        :param tasks: iterable of `(description, inputs, outputs)` tuples,
+            as the arguments of :py:meth:`submit`.
+        :param max_in_flight: maximum number of concurrent submissions.
+        :return: a :py:class:`xenon.bulk.SubmitResult`, in which
+            `memoized` counts the jobs that were reused."""
+        tasks = [(unwrap(d), [str(p) for p in i], [str(p) for p in o])
+                 for d, i, o in tasks]
+        fingerprints = self._fingerprints(
+            {p for _, inputs, _ in tasks for p in inputs})
+        keys = [self.key(d, [[p, fingerprints[p]] for p in inputs])
+                for d, inputs, _ in tasks]
+
+        self.refresh(keys)
+        with self._lock:
+            hits = {k: dict(self.entries[k]) for k in keys
+                    if k in self.entries}
+        completed = {k: e for k, e in hits.items()
+                     if e['exit_code'] is not None or e.get('lost')}
+        missing = self._missing({p for e in completed.values()
+                                 for p in e['outputs']})
+
+        jobs = []
+        for key in keys:
+            entry = hits.get(key)
+            if entry is None:
+                jobs.append(None)
+            elif key not in completed:
+                jobs.append(Job(entry['job']))
+            elif missing.intersection(entry['outputs']) or \
+                    entry['exit_code'] is None and not entry['outputs']:
+                jobs.append(None)
+            else:
+                jobs.append(MemoizedJob(entry['job'], entry['exit_code']))
+
+        todo = [i for i, job in enumerate(jobs) if job is None]
+        result = self.scheduler.submit_many(
+            (tasks[i][0] for i in todo), max_in_flight)
+        errors = {todo[i]: e for i, e in result.errors.items()}
+
+        with self._lock:
+            for i, job in zip(todo, result.jobs):
+                jobs[i] = job
+                if job is None:
+                    continue
+                previous = self.entries.get(keys[i])
+                if previous is not None:
+                    self._keys.pop(previous['job'], None)
+                self.entries[keys[i]] = {
+                    'job': job.id, 'outputs': tasks[i][2], 'exit_code': None}
+                self._keys[job.id] = keys[i]
+            self._append([keys[i] for i in todo if jobs[i] is not None])
+
+        result.memoized = len(jobs) - len(todo)
+        result.count += result.memoized
+        result.jobs = jobs
+        result.errors = errors
+        return result
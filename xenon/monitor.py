@@ -0,0 +1,244 @@
+"""
+Batched status polling for many jobs.
+"""
+
+from concurrent.futures import (Future, wait)
+import logging
+import threading
+
+from .oop import unwrap
+from .follow import OutputFollower
+
+
+class TrackedJob(object):
+    """Bookkeeping of a single job in a :py:class:`JobMonitor`.
+
+    :ivar job: the :py:class:`Job`.
+    :ivar future: a :py:class:`concurrent.futures.Future` that receives the
+        final :py:class:`JobStatus`.
+    :ivar status: the last known :py:class:`JobStatus`, or `None`.
+    :ivar callbacks: functions called on every state transition.
+    """
+    def __init__(self, job, callbacks):
+        self.job = job
+        self.future = Future()
+        self.status = None
+        self.callbacks = callbacks
+
+    @property
+    def state(self):
+        return self.status.state if self.status is not None else None
+
+
+class JobMonitor(object):
+    """Tracks the status of many jobs on a :py:class:`Scheduler`, using a
+    single background thread. All tracked jobs are polled together through
+    :py:meth:`Scheduler.get_job_statuses`, in batches of `batch_size`, so
+    one request per interval replaces a request per job.
+
+    The polling interval adapts to the observed activity: every round in
+    which a job changes state halves the interval (down to `min_interval`),
+    every quiet round multiplies it by `backoff` (up to `max_interval`).
+    Watching a new job resets the interval to `min_interval`.
+
+    .. code-block:: python
+
+        with JobMonitor(scheduler) as monitor:
+            futures = [monitor.watch(job) for job in jobs]
+            for future in concurrent.futures.as_completed(futures):
+                print(future.result().exit_code)
+
+    :param scheduler: the :py:class:`Scheduler` the jobs were submitted to.
+    :param min_interval: shortest time between polls in seconds.
+    :param max_interval: longest time between polls in seconds.
+    :param backoff: factor by which the interval grows in quiet rounds.
+    :param batch_size: maximum number of jobs per status request.
+    :ivar polls: number of polling rounds done.
+    :ivar requests: number of status requests sent.
+    """
+    def __init__(self, scheduler, min_interval=0.5, max_interval=30.0,
+                 backoff=1.5, batch_size=1000):
+        self.scheduler = scheduler
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.batch_size = batch_size
+        self.interval = min_interval
+        self.polls = 0
+        self.requests = 0
+
+        self._tracked = {}
+        self._transition_callbacks = []
+        self._poll_callbacks = []
+        self._followers = []
+        self._lock = threading.RLock()
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    def __len__(self):
+        with self._lock:
+            return len(self._tracked)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def watch(self, job, callback=None):
+        """Start tracking `job`.
+
+        :param job: the :py:class:`Job`.
+        :param callback: optional function that is called as
+            `callback(job, status, previous_state)` on every state transition
+            of this job, from the monitor thread.
+        :return: a :py:class:`concurrent.futures.Future` that is resolved
+            with the final :py:class:`JobStatus`. Cancelling the future stops
+            tracking the job (it does not cancel the job itself).
+        """
+        with self._lock:
+            tracked = self._tracked.get(job.id)
+            if tracked is None:
+                tracked = TrackedJob(job, [])
+                tracked.future.add_done_callback(
+                    lambda f: f.cancelled() and self.unwatch(job))
+                self._tracked[job.id] = tracked
+            if callback is not None:
+                tracked.callbacks.append(callback)
+
+        self.interval = self.min_interval
+        self._wake.set()
+        return tracked.future
+
+    def unwatch(self, job):
+        """Stop tracking `job`."""
+        with self._lock:
+            self._tracked.pop(job.id, None)
+
+    def status(self, job):
+        """The last known :py:class:`JobStatus` of a tracked job, or
+        `None`."""
+        with self._lock:
+            tracked = self._tracked.get(job.id)
+            return tracked.status if tracked is not None else None
+
+    def on_transition(self, callback):
+        """Register `callback(job, status, previous_state)` to be called on
+        every state transition of any tracked job."""
+        self._transition_callbacks.append(callback)
+
+    def on_poll(self, callback):
+        """Register `callback(statuses)` to be called after every polling
+        round, with the list of :py:class:`JobStatus` objects received."""
+        self._poll_callbacks.append(callback)
+
+    def follow_output(self, job, filesystem, description):
+        """Track `job` and follow its output files, reading what was added
+        after every polling round. The sizes of the output files of all
+        followed jobs on `filesystem` are requested together, and only files
+        that grew are read, so following many jobs costs little more than
+        tracking them.
+
+        :param job: the :py:class:`Job`.
+        :param filesystem: the :py:class:`FileSystem` holding the output.
+        :param description: the :py:class:`JobDescription` the job was
+            submitted with, giving the paths of `stdout` and `stderr`.
+        :return: a :py:class:`xenon.follow.FollowedOutput`."""
+        with self._lock:
+            for follower in self._followers:
+                if follower.filesystem == filesystem:
+                    break
+            else:
+                follower = OutputFollower(self, filesystem)
+                self._followers.append(follower)
+        return follower.follow(job, description)
+
+    def _call(self, callback, *args):
+        try:
+            callback(*args)
+        except Exception:
+            logging.getLogger('xenon').exception(
+                "Exception in JobMonitor callback.")
+
+    def poll(self):
+        """Poll the status of all tracked jobs once. This is called by the
+        background thread, but may be called directly if no thread is
+        running.
+
+        :return: the number of jobs that changed state."""
+        with self._lock:
+            tracked = list(self._tracked.values())
+
+        statuses = []
+        for i in range(0, len(tracked), self.batch_size):
+            batch = tracked[i:i + self.batch_size]
+            self.requests += 1
+            statuses.extend(self.scheduler.get_job_statuses(
+                jobs=[unwrap(t.job) for t in batch]))
+
+        changes = 0
+        for t, status in zip(tracked, statuses):
+            previous = t.state
+            t.status = status
+            if status.state != previous or status.done:
+                changes += 1
+                for callback in self._transition_callbacks + t.callbacks:
+                    self._call(callback, t.job, status, previous)
+
+            if status.done:
+                self.unwatch(t.job)
+                if t.future.set_running_or_notify_cancel():
+                    t.future.set_result(status)
+
+        self.polls += 1
+        for callback in self._poll_callbacks:
+            self._call(callback, statuses)
+
+        return changes
+
+    def _run(self):
+        logger = logging.getLogger('xenon')
+        while not self._stopped:
+            if len(self):
+                try:
+                    changes = self.poll()
+                except Exception:
+                    logger.exception("JobMonitor failed to poll statuses.")
+                    changes = 0
+
+                if changes:
+                    self.interval = max(self.min_interval, self.interval / 2)
+                else:
+                    self.interval = min(self.max_interval,
+                                        self.interval * self.backoff)
+
+            self._wake.wait(self.interval if len(self) else None)
+            self._wake.clear()
+
+    def start(self):
+        """Start the background polling thread."""
+        if self._thread is None:
+            self._stopped = False
+            self._thread = threading.Thread(
+                target=self._run, name='xenon-job-monitor', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background polling thread. Unresolved futures remain
+        pending."""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+    def wait(self, timeout=None):
+        """Wait until all currently tracked jobs are done.
+
+        :return: `True` if all jobs finished within `timeout` seconds."""
+        with self._lock:
+            futures = [t.future for t in self._tracked.values()]
+        _, not_done = wait(futures, timeout)
+        return not not_done
@@ -5,11 +5,16 @@ from .oop import (
 from .proto import (xenon_pb2, xenon_pb2_grpc)
 from .server import __server__
 from .exceptions import make_exception
+from .listing import PathTable
+from .monitor import JobMonitor
+from . import (
+    bulk, cache, interactive, packing, search, sweep, throttle)
 
 import grpc
 import pathlib
 import inspect
 import functools
+from collections.abc import Mapping
 
 try:
     from os import PathLike
@@ -62,10 +67,26 @@ class CopyOperation(OopProxy):
     pass
 
 
+def set_message_field(message, name, value):
+    """Set the field `name` of a protobuf `message` to `value`, for scalar,
+    repeated and map fields alike."""
+    if isinstance(value, (list, tuple, Mapping)):
+        message.ClearField(name)
+        if isinstance(value, Mapping):
+            getattr(message, name).update(value)
+        else:
+            getattr(message, name).extend(value)
+    elif name == 'working_directory':
+        setattr(message, name, str(value))
+    else:
+        setattr(message, name, value)
+
+
 class JobDescription(object):
     __is_proxy__ = True
     __servicer__ = None
     __fields__ = get_fields(xenon_pb2.JobDescription)
+    __slots__ = tuple(__fields__) + ('_message',)
 
     def __init__(self, **kwargs):
         for k, v in kwargs.items():
@@ -75,18 +96,73 @@ class JobDescription(object):
 
             setattr(self, k, v)
 
+    def __setattr__(self, name, value):
+        # Lists and dictionaries are copied, so that the caller can reuse
+        # them; in-place changes of the copies are noticed by `__wrapped__`.
+        if isinstance(value, list):
+            value = list(value)
+        elif isinstance(value, Mapping):
+            value = dict(value)
+        object.__setattr__(self, name, value)
+        object.__setattr__(self, '_message', None)
+
+    def __delattr__(self, name):
+        object.__delattr__(self, name)
+        object.__setattr__(self, '_message', None)
+
+    def _items(self):
+        for k in self.__fields__:
+            try:
+                yield k, getattr(self, k)
+            except AttributeError:
+                pass
+
+    def _containers(self):
+        """Copies of the list and dictionary fields, to detect in-place
+        changes after the message was built."""
+        return {k: list(v) if isinstance(v, list) else dict(v)
+                for k, v in self._items() if isinstance(v, (list, dict))}
+
+    def __repr__(self):
+        return 'JobDescription({})'.format(', '.join(
+            '{}={!r}'.format(k, v) for k, v in self._items()))
+
     @property
     def __wrapped__(self):
-        def get(k):
-            if k == "working_directory":
-                return str(getattr(self, k))
-            else:
-                return getattr(self, k)
+        """The `xenon_pb2.JobDescription` message. It is built on first use
+        and reused until a field is changed; do not modify it."""
+        message, containers = getattr(self, '_message', None) or (None, None)
+        if message is None or containers != self._containers():
+            message = xenon_pb2.JobDescription()
+            for k, v in self._items():
+                set_message_field(message, k, v)
+            object.__setattr__(
+                self, '_message', (message, self._containers()))
+        return message
+
+    def copy(self, **overrides):
+        """Create a copy of this description, with the fields given in
+        `overrides` changed. The protobuf message of the copy is cloned from
+        that of the original, so copying is cheap, also for many copies.
+
+        :return: a new :py:class:`JobDescription`."""
+        for k in overrides:
+            if k not in self.__fields__:
+                raise AttributeError(
+                    "{} is not a valid field in JobDescription.".format(k))
 
-        args = {
-            k: get(k) for k in self.__fields__ if k in dir(self)}
+        message = xenon_pb2.JobDescription()
+        message.CopyFrom(self.__wrapped__)
 
-        return xenon_pb2.JobDescription(**args)
+        new = object.__new__(type(self))
+        for k, v in self._items():
+            setattr(new, k, v)
+        for k, v in overrides.items():
+            setattr(new, k, v)
+            set_message_field(message, k, getattr(new, k))
+
+        object.__setattr__(new, '_message', (message, new._containers()))
+        return new
 
 
 JobDescription.__doc__ = \
@@ -205,6 +281,16 @@ class Path(PathLike):
         filename with `'.'`."""
         return self.name[0] == '.'
 
+    def glob(self, filesystem, pattern):
+        """Glob the given relative `pattern` in the directory represented by
+        this path, on `filesystem`. See :py:meth:`FileSystem.glob`."""
+        return filesystem.glob(self / pattern)
+
+    def rglob(self, filesystem, pattern):
+        """Like :py:meth:`glob`, but matching `pattern` in this directory
+        and all of its sub-directories."""
+        return filesystem.glob(self / '**' / pattern)
+
 
 def t_getattr(name):
     return lambda self, x: getattr(x, name)
@@ -217,6 +303,13 @@ def read_response_stream(self, stream):
         raise make_exception(read_response_stream, e) from None
 
 
+def list_response_stream(self, stream):
+    try:
+        yield from stream
+    except grpc.RpcError as e:
+        raise make_exception(list_response_stream, e) from None
+
+
 class FileSystem(OopProxy):
     """The Xenon `FileSystem` subsystem."""
     __servicer__ = xenon_pb2_grpc.FileSystemServiceServicer
@@ -251,14 +344,20 @@ class FileSystem(OopProxy):
             GrpcMethod(
                 'get_adaptor_name', output_transform=t_getattr('name')),
             GrpcMethod(
-                'rename', uses_request=True),
+                'rename', uses_request=True,
+                decorators=[cache.invalidating(
+                    ('source', None, cache.MISSING),
+                    ('target', None, cache.EXISTS))]),
             GrpcMethod(
-                'create_symbolic_link', uses_request=True),
+                'create_symbolic_link', uses_request=True,
+                decorators=[cache.invalidating(
+                    ('link', None, cache.EXISTS))]),
             GrpcMethod(
                 'get_working_directory',
                 output_transform=lambda self, x: Path(x)),
             GrpcMethod(
-                'set_working_directory', uses_request='PathRequest'),
+                'set_working_directory', uses_request='PathRequest',
+                decorators=[cache.tracking_working_directory]),
             GrpcMethod(
                 'is_open', output_transform=Is),
             GrpcMethod(
@@ -268,41 +367,63 @@ class FileSystem(OopProxy):
                 output_transform=CopyStatus),
             GrpcMethod(
                 'get_status', uses_request='CopyOperationRequest',
-                output_transform=CopyStatus),
+                output_transform=CopyStatus,
+                decorators=[cache.completing_copy]),
             GrpcMethod(
                 'wait_until_done', uses_request=True,
-                output_transform=CopyStatus),
+                output_transform=CopyStatus,
+                decorators=[cache.completing_copy]),
             GrpcMethod(
-                'create_directories', uses_request='PathRequest'),
+                'create_directories', uses_request='PathRequest',
+                decorators=[cache.invalidating(
+                    ('path', None, cache.EXISTS))]),
             GrpcMethod(
-                'create_directory', uses_request='PathRequest'),
+                'create_directory', uses_request='PathRequest',
+                decorators=[cache.invalidating(
+                    ('path', None, cache.EXISTS))]),
             GrpcMethod(
-                'create_file', uses_request='PathRequest'),
+                'create_file', uses_request='PathRequest',
+                decorators=[cache.invalidating(
+                    ('path', None, cache.EXISTS))]),
             GrpcMethod(
                 'exists', uses_request='PathRequest',
-                output_transform=Is),
+                output_transform=Is,
+                decorators=[cache.cached_exists(
+                    lambda s, x: Is(s, xenon_pb2.Is(value=x)))]),
             GrpcMethod(
                 'read_from_file', uses_request='PathRequest',
                 output_transform=read_response_stream),
             GrpcMethod(
                 'get_attributes', uses_request='PathRequest',
-                output_transform=PathAttributes),
+                output_transform=PathAttributes,
+                decorators=[cache.cached_get_attributes(PathAttributes)]),
             GrpcMethod(
                 'read_symbolic_link', uses_request='PathRequest',
                 output_transform=lambda self, x: Path(x)),
             GrpcMethod(
-                'write_to_file', input_transform=write_request_stream),
+                'write_to_file', input_transform=write_request_stream,
+                decorators=[cache.invalidating(
+                    ('path', None, cache.EXISTS))]),
             GrpcMethod(
-                'append_to_file', input_transform=append_request_stream),
+                'append_to_file', input_transform=append_request_stream,
+                decorators=[cache.invalidating(('path', None, None))]),
             GrpcMethod(
-                'delete', uses_request=True),
+                'delete', uses_request=True,
+                decorators=[cache.invalidating(
+                    ('path', None, cache.MISSING))]),
             GrpcMethod(
-                'copy', uses_request=True, output_transform=CopyOperation),
+                'copy', uses_request=True, output_transform=CopyOperation,
+                decorators=[
+                    cache.invalidating(
+                        ('destination', 'destination_filesystem', None)),
+                    cache.tracking_copy]),
             GrpcMethod(
-                'set_posix_file_permissions', uses_request=True),
+                'set_posix_file_permissions', uses_request=True,
+                decorators=[cache.invalidating(('path', None, None))]),
             GrpcMethod(
                 'list', uses_request=True,
-                output_transform=transform_map(PathAttributes)),
+                output_transform=transform_map(PathAttributes),
+                decorators=[cache.caching_list]),
 
             GrpcMethod(
                 'get_path_separator', output_transform=t_getattr('separator'))
@@ -314,6 +435,8 @@ class FileSystem(OopProxy):
 
     def __init__(self, service, wrapped):
         super(FileSystem, self).__init__(service, wrapped)
+        self._cache = None
+        self._copies = {}
 
     def __enter__(self):
         return self
@@ -324,6 +447,129 @@ class FileSystem(OopProxy):
     def __eq__(self, other):
         return self.__wrapped__ == other.__wrapped__
 
+    def list_table(self, dir, recursive=True):
+        """List the contents of a directory into a columnar
+        :py:class:`PathTable`. Unlike :py:meth:`list`, this does not create a
+        Python object for every entry, making it suitable for directory
+        trees with millions of entries.
+
+        :param dir: the directory to list.
+        :type dir: Path
+        :param recursive: also list the contents of sub-directories.
+        :return: a :py:class:`PathTable`."""
+        request = xenon_pb2.ListRequest(
+            filesystem=self.__wrapped__, dir=unwrap(Path(dir)),
+            recursive=recursive)
+        return PathTable().extend(list_response_stream(
+            self, self.__service__.list(request)))
+
+    def glob(self, pattern, max_workers=8):
+        """Find all paths matching a glob pattern. Besides the usual
+        wildcards, the component ``**`` matches any number of nested
+        directories. Only directories that can contain matches are listed,
+        several at a time, and matches are generated as soon as they are
+        found.
+
+        :param pattern: the pattern; relative patterns are taken relative to
+            the working directory.
+        :param max_workers: maximum number of concurrent list requests.
+        :return: generator of :py:class:`Path` objects."""
+        return (Path(p) for p in search.glob(self, pattern, max_workers))
+
+    def find(self, root, name=None, size=None, mtime=None, type=None,
+             maxdepth=None, prune=None, max_workers=8):
+        """Search a directory tree, in the manner of the `find` command.
+        All given criteria have to match.
+
+        :param root: the directory to search.
+        :param name: glob pattern on the file name.
+        :param size: size in bytes, a `(minimum, maximum)` tuple, or a
+            `find` style string like ``'+1G'`` or ``'-10k'``.
+        :param mtime: age in days, a `(minimum, maximum)` tuple, or a `find`
+            style string like ``'+30'`` (older than 30 days) or ``'-1'``.
+        :param type: ``'f'`` (regular file), ``'d'`` (directory) or ``'l'``
+            (symbolic link).
+        :param maxdepth: do not descend more than this many levels; the
+            entries of `root` are at level 1, so ``0`` finds nothing.
+        :param prune: glob pattern of directory names not to descend into.
+        :param max_workers: maximum number of concurrent list requests.
+        :return: generator of `PathAttributes`."""
+        return (PathAttributes(self.__service__, x) for x in search.find(
+            self, root, name=name, size=size, mtime=mtime, type=type,
+            maxdepth=maxdepth, prune=prune, max_workers=max_workers))
+
+    def delete_many(self, paths, recursive=False, max_in_flight=64):
+        """Delete many paths, keeping up to `max_in_flight` delete requests
+        outstanding at a time. Failures do not stop the operation; they are
+        collected in the result.
+
+        :param paths: iterable of paths.
+        :param recursive: delete directories recursively.
+        :param max_in_flight: maximum number of concurrent requests.
+        :return: a :py:class:`xenon.bulk.BulkResult`."""
+        return bulk.delete_many(self, paths, recursive, max_in_flight)
+
+    def create_directories_many(self, paths, max_in_flight=64):
+        """Create many directories, including missing parents, as
+        :py:meth:`create_directories` does. Every distinct directory is
+        created exactly once: the paths are merged into a trie, which is
+        created level by level, with concurrent requests for the
+        directories on each level. Directories that already exist are
+        skipped silently.
+
+        :param paths: iterable of directory paths.
+        :param max_in_flight: maximum number of concurrent requests.
+        :return: a :py:class:`xenon.bulk.BulkResult` counting the created
+            directories."""
+        return bulk.create_directories_many(self, paths, max_in_flight)
+
+    def delete_tree(self, path, strategy='auto', scheduler=None,
+                    threshold=100000, max_in_flight=64, max_workers=8):
+        """Delete a directory tree. Two strategies are available:
+
+        * ``'parallel'``: list the tree concurrently and delete its entries
+          leaf-first, with concurrent delete requests.
+        * ``'remote'``: submit an ``rm -rf`` job to `scheduler`, which must
+          run on the host this file system lives on.
+
+        With ``'auto'`` the number of entries is estimated from a partial
+        listing, and the remote strategy is chosen if a scheduler is given
+        and the estimate exceeds `threshold`.
+
+        :return: a :py:class:`xenon.bulk.DeleteResult`; for the remote
+            strategy its count is `None`, since the number of deleted
+            entries is unknown."""
+        return bulk.delete_tree(
+            self, path, strategy=strategy, scheduler=scheduler,
+            threshold=threshold, max_in_flight=max_in_flight,
+            max_workers=max_workers)
+
+    def enable_cache(self, ttl=10.0):
+        """Cache path attributes on the client side. Once enabled,
+        :py:meth:`exists` and :py:meth:`get_attributes` are answered locally
+        for paths that were seen less than `ttl` seconds ago, either through
+        these methods or through :py:meth:`list`. Mutating calls made
+        through this object invalidate the affected entries; changes made by
+        others are only noticed once entries expire.
+
+        :param ttl: time-to-live of cache entries in seconds.
+        :return: the :py:class:`xenon.cache.AttributeCache`, which keeps hit
+            and miss counts."""
+        if self._cache is None:
+            self._cache = cache.AttributeCache(ttl)
+        else:
+            self._cache.ttl = ttl
+        return self._cache
+
+    def disable_cache(self):
+        """Stop caching path attributes and drop the cache."""
+        self._cache = None
+
+    @property
+    def cache(self):
+        """The attribute cache, or `None` if caching is disabled."""
+        return self._cache
+
 
 def input_request_stream(self, description, stdin_stream):
     try:
@@ -387,16 +633,19 @@ class Scheduler(OopProxy):
                 'close'),
             GrpcMethod(
                 'submit_batch_job', uses_request=True,
-                output_transform=lambda s, x: Job(x.id)),
+                output_transform=lambda s, x: Job(x.id),
+                decorators=[throttle.throttled_submit]),
             GrpcMethod(
                 'submit_interactive_job', input_transform=input_request_stream,
                 output_transform=interactive_job_response),
             GrpcMethod(
                 'cancel_job', uses_request='JobRequest',
-                output_transform=JobStatus),
+                output_transform=JobStatus,
+                decorators=[throttle.observing()]),
             GrpcMethod(
                 'wait_until_done', uses_request='WaitRequest',
-                output_transform=JobStatus),
+                output_transform=JobStatus,
+                decorators=[throttle.observing()]),
             GrpcMethod(
                 'wait_until_running', uses_request='WaitRequest',
                 output_transform=JobStatus),
@@ -409,11 +658,13 @@ class Scheduler(OopProxy):
 
             GrpcMethod(
                 'get_job_status', uses_request='JobRequest',
-                output_transform=JobStatus),
+                output_transform=JobStatus,
+                decorators=[throttle.observing()]),
             GrpcMethod(
                 'get_job_statuses', uses_request=True,
                 output_transform=lambda s, x:
-                    [JobStatus(s, j) for j in x.statuses]),
+                    [JobStatus(s, j) for j in x.statuses],
+                decorators=[throttle.observing(many=True)]),
 
             # smells like tenenkaas
             GrpcMethod(
@@ -424,6 +675,7 @@ class Scheduler(OopProxy):
 
     def __init__(self, service, wrapped):
         super(Scheduler, self).__init__(service, wrapped)
+        self._throttle = None
 
     @staticmethod
     def __stub__(server):
@@ -434,3 +686,180 @@ class Scheduler(OopProxy):
 
     def __exit__(self, exc_type, exc_value, exc_tb):
         self.close()
+
+    def submit_many(self, descriptions, max_in_flight=16):
+        """Submit many batch jobs. Submissions are pipelined over the
+        channel, with up to `max_in_flight` requests outstanding, so the
+        round-trip to the scheduler is paid concurrently. Failing
+        submissions, for instance with an
+        `InvalidJobDescriptionException`, do not stop the others.
+
+        :param descriptions: iterable of :py:class:`JobDescription`; it is
+            consumed lazily.
+        :param max_in_flight: maximum number of concurrent submissions.
+        :return: a :py:class:`xenon.bulk.SubmitResult`, holding the
+            :py:class:`Job` list in input order, the errors by index and the
+            number of submissions per second."""
+        return bulk.submit_many(self, descriptions, max_in_flight, Job)
+
+    def submit_packed(self, tasks, cores_per_job, tasks_per_job=None,
+                      working_directory='.', filesystem=None,
+                      python='python3', description=None, max_in_flight=16):
+        """Submit many small tasks packed into multi-core jobs. The tasks
+        are grouped `tasks_per_job` at a time; every group becomes a
+        single-node job asking for `cores_per_job` cores, running a launcher
+        that executes the tasks of the group concurrently, at most
+        `cores_per_job` at a time. The launcher records the exit code and
+        output of every task, which are retrieved with
+        :py:meth:`xenon.packing.PackedJob.results`.
+
+        Of the task descriptions, only `executable`, `arguments`,
+        `environment`, `working_directory`, `stdin`, `stdout` and `stderr`
+        are used. The output of tasks that do not set `stdout` or `stderr`
+        is captured in the directory of the pack.
+
+        :param tasks: iterable of :py:class:`JobDescription`.
+        :param cores_per_job: number of cores to request for each job.
+        :param tasks_per_job: number of tasks in each job; defaults to
+            `cores_per_job`.
+        :param working_directory: directory below which the manifests,
+            results and captured outputs are stored, one sub-directory per
+            job.
+        :param filesystem: a :py:class:`FileSystem` giving access to
+            `working_directory`; defaults to
+            :py:meth:`Scheduler.get_file_system`.
+        :param python: the Python interpreter to run the launcher with.
+        :param description: a :py:class:`JobDescription` with additional
+            settings for the jobs, such as `queue_name` or `max_runtime`.
+        :param max_in_flight: maximum number of concurrent submissions.
+        :return: list of :py:class:`xenon.packing.PackedJob`."""
+        return packing.submit_packed(
+            self, tasks, cores_per_job, tasks_per_job, working_directory,
+            filesystem, python, description, max_in_flight, Job)
+
+    def submit_sweep(self, template, grid, mode='product', max_in_flight=16,
+                     array='auto', max_array_size=1000):
+        """Submit a parameter sweep. Descriptions are rendered from
+        `template` for every parameter set in `grid` as they are submitted,
+        so the sweep is never held in memory as a whole.
+
+        For the ``slurm``, ``torque`` and ``gridengine`` adaptors, the sweep
+        is submitted as native array jobs of up to `max_array_size` tasks,
+        through `scheduler_arguments`; every task selects its command from
+        the array index. This requires that `stdin`, `stdout`, `stderr` and
+        `working_directory` of the template have no placeholders.
+
+        :param template: a :py:class:`xenon.sweep.JobTemplate`.
+        :param grid: dictionary mapping parameter names to lists of values,
+            or an iterable of dictionaries of parameters.
+        :param mode: ``'product'`` to sweep all combinations of the values,
+            ``'zip'`` to combine the n-th values of all parameters.
+        :param max_in_flight: maximum number of concurrent submissions.
+        :param array: ``'auto'`` to use array jobs where possible, `True` to
+            require them, `False` to submit a job per parameter set.
+        :param max_array_size: maximum number of tasks per array job.
+        :return: a :py:class:`xenon.bulk.SubmitResult`; with array jobs, it
+            holds one :py:class:`Job` per array."""
+        return sweep.submit_sweep(
+            self, template, grid, mode, max_in_flight, array,
+            max_array_size, Job)
+
+    def follow_output(self, job, filesystem, description, monitor=None):
+        """Follow the `stdout` and `stderr` files of a running batch job.
+        After every status poll, the sizes of the files are requested, and
+        only what was added since the previous poll is passed on. Iteration
+        stops when the job is done and its output is read completely.
+
+        .. code-block:: python
+
+            for name, data in scheduler.follow_output(job, fs, description):
+                print(name, data.decode(), end='')
+
+        The service cannot read part of a file, so when a file grew, it is
+        streamed from the start and the consumed part is discarded on the
+        client.
+
+        :param job: the :py:class:`Job`.
+        :param filesystem: the :py:class:`FileSystem` holding the output
+            files.
+        :param description: the :py:class:`JobDescription` the job was
+            submitted with, giving the paths of the output files; relative
+            paths are taken relative to its `working_directory`.
+        :param monitor: a running :py:class:`JobMonitor` to align the polls
+            with; when following many jobs, pass the same monitor to have
+            their statuses and file sizes requested together. By default, a
+            monitor is started for this job alone.
+        :return: a :py:class:`xenon.follow.FollowedOutput`, iterating over
+            `(name, data)` tuples, where `name` is ``'stdout'`` or
+            ``'stderr'``."""
+        if monitor is not None:
+            return monitor.follow_output(job, filesystem, description)
+
+        monitor = JobMonitor(self)
+        output = monitor.follow_output(job, filesystem, description)
+        output._closers.append(monitor.stop)
+        monitor.start()
+        return output
+
+    def enable_throttle(self, rate=None, burst=1, max_queued=None,
+                        max_queued_per_queue=None):
+        """Limit the submissions of batch jobs through this object, with
+        :py:meth:`submit_batch_job` and the bulk methods built on it. A
+        submission waits for a token of a bucket refilled at `rate` per
+        second, and for a place among the unfinished jobs. Places are freed
+        when :py:meth:`get_job_status`, :py:meth:`get_job_statuses`,
+        :py:meth:`wait_until_done` or :py:meth:`cancel_job` show that a job
+        is done, so poll the jobs, for instance with a
+        :py:class:`JobMonitor`.
+
+        :param rate: submissions per second, or `None` for no rate limit.
+        :param burst: number of submissions that may be made at once.
+        :param max_queued: largest number of unfinished jobs.
+        :param max_queued_per_queue: largest number of unfinished jobs per
+            queue, as a number or a dictionary mapping queue names to
+            numbers.
+        :return: the :py:class:`xenon.throttle.Throttle`, whose
+            :py:meth:`~xenon.throttle.Throttle.budget` shows its state."""
+        self._throttle = throttle.Throttle(
+            rate, burst, max_queued, max_queued_per_queue)
+        return self._throttle
+
+    def disable_throttle(self):
+        """Stop limiting submissions."""
+        self._throttle = None
+
+    @property
+    def throttle(self):
+        """The submission throttle, or `None` if it is disabled."""
+        return self._throttle
+
+
+def submit_interactive_job(submit):
+    @functools.wraps(submit, assigned=('__module__', '__name__'))
+    def wrapper(self, description, stdin_stream=None, max_pending_writes=64):
+        """Submit an interactive job.
+
+        :param description: the :py:class:`JobDescription`.
+        :param stdin_stream: optional iterable of bytes to send to the
+            standard input of the job. If it is not given, input is written
+            with :py:meth:`InteractiveJob.write`.
+        :param max_pending_writes: number of written chunks that may be
+            waiting to be sent before :py:meth:`InteractiveJob.write`
+            blocks.
+        :return: an :py:class:`xenon.interactive.InteractiveJob`, which can
+            also be unpacked into the :py:class:`Job` and the raw output
+            stream."""
+        writer = None
+        if stdin_stream is None:
+            writer = interactive.StdinWriter(max_pending_writes)
+            stdin_stream = writer.chunks()
+
+        job, responses = submit(
+            self, description=description, stdin_stream=stdin_stream)
+        return interactive.InteractiveJob(self, job, responses, writer)
+
+    return wrapper
+
+
+Scheduler.submit_interactive_job = submit_interactive_job(
+    Scheduler.submit_interactive_job)
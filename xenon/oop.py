@@ -84,16 +84,19 @@ class GrpcMethod:
         method's arguments.
     :ivar output_transform: custom method to extract the return value from
         the return value.
+    :ivar decorators: functions that are applied in order to the generated
+        method, to add client side behaviour.
     """
     def __init__(self, name, uses_request=False, field_name=None,
                  input_transform=None, output_transform=None,
-                 static=False):
+                 static=False, decorators=()):
         self.name = name
         self.uses_request = uses_request
         self.field_name = field_name
         self.input_transform = input_transform
         self.output_transform = output_transform
         self.static = static
+        self.decorators = decorators
 
     @property
     def is_simple(self):
@@ -337,6 +340,9 @@ class OopMeta(type):
 
             f.__name__ = m.name
 
+            for decorator in m.decorators:
+                f = decorator(f)
+
             if m.static:
                 setattr(cls, m.name, classmethod(f))
             else:
@@ -0,0 +1,216 @@
+"""
+Packing many small tasks into multi-core jobs.
+"""
+
+import itertools
+import json
+import posixpath
+import uuid
+
+from .proto import xenon_pb2
+from .exceptions import PathAlreadyExistsException
+from .oop import unwrap
+from .pilot import TaskResult
+from . import bulk
+
+
+# Runs on the remote side as `python -c LAUNCHER manifest cores`, in the
+# directory of the pack. Runs the tasks in the manifest with at most `cores`
+# at a time, appending a line of JSON to the results file for every task
+# that finishes.
+LAUNCHER = """
+import contextlib, json, os, subprocess, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+
+base = os.getcwd()
+with open(sys.argv[1]) as f:
+    manifest = json.load(f)
+lock = threading.Lock()
+results = open(manifest['results'], 'a')
+
+def run(index, task):
+    cwd = task['working_directory'] or base
+    stdout = os.path.join(cwd, task['stdout'] or
+                          os.path.join(base, '%d.out' % index))
+    stderr = os.path.join(cwd, task['stderr'] or
+                          os.path.join(base, '%d.err' % index))
+    env = dict(os.environ)
+    env.update(task['environment'])
+    try:
+        with contextlib.ExitStack() as files:
+            stdin = files.enter_context(open(
+                os.path.join(cwd, task['stdin']), 'rb')) \\
+                if task['stdin'] else subprocess.DEVNULL
+            exit_code = subprocess.call(
+                [task['executable']] + task['arguments'], cwd=cwd, env=env,
+                stdin=stdin, stdout=files.enter_context(open(stdout, 'wb')),
+                stderr=files.enter_context(open(stderr, 'wb')))
+        result = {'index': index, 'exit_code': exit_code,
+                  'stdout': stdout, 'stderr': stderr}
+    except Exception as e:
+        result = {'index': index, 'error': repr(e)}
+    with lock:
+        results.write(json.dumps(result) + '\\n')
+        results.flush()
+
+with ThreadPoolExecutor(int(sys.argv[2])) as pool:
+    for index, task in enumerate(manifest['tasks']):
+        pool.submit(run, index, task)
+"""
+
+MANIFEST = 'manifest.json'
+RESULTS = 'results.jsonl'
+
+
+def task_entry(task):
+    """Convert a task description to its entry in the manifest."""
+    task = unwrap(task)
+    if not task.executable:
+        raise ValueError("Task without executable: {}".format(task))
+    return {'executable': task.executable,
+            'arguments': list(task.arguments),
+            'environment': dict(task.environment),
+            'working_directory': task.working_directory,
+            'stdin': task.stdin, 'stdout': task.stdout,
+            'stderr': task.stderr}
+
+
+class PackedJob(object):
+    """A job running a pack of tasks, as returned by
+    :py:meth:`Scheduler.submit_packed`.
+
+    :ivar job: the :py:class:`Job`, or `None` if submission failed.
+    :ivar error: the exception raised by the submission, or `None`.
+    :ivar directory: the directory holding the manifest, results and
+        outputs of the pack.
+    :ivar count: number of tasks in the pack.
+    :ivar offset: index of the first task of the pack in the list of all
+        tasks given to :py:meth:`Scheduler.submit_packed`.
+    """
+    def __init__(self, scheduler, filesystem, directory, count, offset):
+        self.scheduler = scheduler
+        self.filesystem = filesystem
+        self.directory = directory
+        self.count = count
+        self.offset = offset
+        self.job = None
+        self.error = None
+
+    def __repr__(self):
+        return 'PackedJob(job={}, count={}, offset={})'.format(
+            self.job.id if self.job else None, self.count, self.offset)
+
+    def _read(self, path):
+        from .objects import Path
+        return b''.join(self.filesystem.read_from_file(Path(path)))
+
+    def results(self, wait=True):
+        """Retrieve the results of the tasks in this pack.
+
+        :param wait: wait until the job is done first.
+        :return: list of :py:class:`TaskResult`, in task order. The entry of
+            a task that did not finish (yet) is `None`; a task that could not
+            be started has an `exit_code` of `None` and the error message in
+            `stderr`.
+        """
+        if self.error is not None:
+            raise self.error
+        if wait:
+            self.scheduler.wait_until_done(self.job)
+
+        results = [None] * self.count
+        try:
+            lines = self._read(
+                posixpath.join(self.directory, RESULTS)).splitlines()
+        except Exception:
+            return results
+
+        for line in lines:
+            entry = json.loads(line.decode())
+            if 'error' in entry:
+                results[entry['index']] = TaskResult(
+                    None, b'', entry['error'].encode())
+            else:
+                results[entry['index']] = TaskResult(
+                    entry['exit_code'], self._read(entry['stdout']),
+                    self._read(entry['stderr']))
+
+        return results
+
+    def cleanup(self):
+        """Delete the directory of the pack."""
+        return self.filesystem.delete_tree(self.directory)
+
+
+def submit_packed(scheduler, tasks, cores_per_job, tasks_per_job,
+                  working_directory, filesystem, python, description,
+                  max_in_flight, job_type):
+    """Implements :py:meth:`Scheduler.submit_packed`; `job_type` is called
+    with the id of every submitted job."""
+    from .objects import Path
+    if filesystem is None:
+        filesystem = scheduler.get_file_system()
+    tasks_per_job = tasks_per_job or cores_per_job
+    template = unwrap(description) if description is not None \
+        else xenon_pb2.JobDescription()
+    prefix = uuid.uuid4().hex[:8]
+
+    tasks = iter(tasks)
+    chunks = []
+    while True:
+        chunk = [task_entry(t) for t in
+                 itertools.islice(tasks, tasks_per_job)]
+        if not chunk:
+            break
+        chunks.append(chunk)
+
+    directories = [
+        posixpath.join(str(working_directory),
+                       'pack-{}-{}'.format(prefix, n))
+        for n in range(len(chunks))]
+    created = filesystem.create_directories_many(directories)
+    for path, error in created.errors.items():
+        if not isinstance(error, PathAlreadyExistsException):
+            raise error
+
+    descriptions = []
+    for directory, chunk in zip(directories, chunks):
+        manifest = {'results': RESULTS, 'tasks': chunk}
+        filesystem.write_to_file(
+            Path(posixpath.join(directory, MANIFEST)),
+            [json.dumps(manifest).encode()])
+
+        d = xenon_pb2.JobDescription()
+        d.CopyFrom(template)
+        d.executable = python
+        d.arguments[:] = ['-c', LAUNCHER, MANIFEST, str(cores_per_job)]
+        d.working_directory = directory
+        d.node_count = 1
+        d.processes_per_node = cores_per_job
+        d.start_single_process = True
+        d.stdout = 'launcher.out'
+        d.stderr = 'launcher.err'
+        d.name = d.name or posixpath.basename(directory)
+        descriptions.append(d)
+
+    submitted = bulk.submit_many(
+        scheduler, descriptions, max_in_flight, job_type)
+
+    packs = []
+    offset = 0
+    for index, (directory, chunk, job) in enumerate(
+            zip(directories, chunks, submitted.jobs)):
+        pack = PackedJob(scheduler, filesystem, directory, len(chunk),
+                         offset)
+        pack.job = job
+        pack.error = submitted.errors.get(index)
+        packs.append(pack)
+        offset += len(chunk)
+
+    return packs
+
+
+def results(packs, wait=True):
+    """Concatenate the results of a list of :py:class:`PackedJob`, giving
+    the results of all tasks in their original order."""
+    return [r for pack in packs for r in pack.results(wait)]
@@ -0,0 +1,281 @@
+"""
+Pilot jobs: a farm of long-lived workers, fed with tasks over the stdin
+stream of interactive jobs.
+"""
+
+import base64
+from collections import (deque, namedtuple)
+from concurrent.futures import (Future, wait)
+import itertools
+import json
+import logging
+import threading
+import queue
+
+import grpc
+
+from .proto import xenon_pb2
+from .exceptions import make_exception
+from .oop import unwrap
+
+
+# Runs on the remote side as `python -c WORKER slots`. Every line on stdin is
+# a JSON task; every line written to stdout is the JSON result of a task.
+WORKER = """
+import base64, json, os, subprocess, sys, threading
+from concurrent.futures import ThreadPoolExecutor
+
+lock = threading.Lock()
+
+def run(task):
+    try:
+        env = dict(os.environ)
+        env.update(task['environment'])
+        p = subprocess.run(
+            task['command'], input=base64.b64decode(task['stdin']),
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+            cwd=task['working_directory'] or None, env=env)
+        result = {'id': task['id'], 'exit_code': p.returncode,
+                  'stdout': base64.b64encode(p.stdout).decode('ascii'),
+                  'stderr': base64.b64encode(p.stderr).decode('ascii')}
+    except Exception as e:
+        result = {'id': task['id'], 'error': repr(e)}
+    line = json.dumps(result) + '\\n'
+    with lock:
+        sys.stdout.write(line)
+        sys.stdout.flush()
+
+with ThreadPoolExecutor(int(sys.argv[1])) as pool:
+    for line in sys.stdin:
+        if line.strip():
+            pool.submit(run, json.loads(line))
+"""
+
+TaskResult = namedtuple('TaskResult', ['exit_code', 'stdout', 'stderr'])
+TaskResult.__doc__ = """Result of a task run by a :py:class:`TaskFarm`:
+the exit code and the standard output and error as bytes."""
+
+
+class WorkerLost(Exception):
+    """Raised through the futures of tasks that were running on a worker
+    that exited or lost its connection."""
+    pass
+
+
+class Worker(object):
+    """A pilot job of a :py:class:`TaskFarm`.
+
+    :ivar job: the :py:class:`Job`, once it is submitted.
+    :ivar in_flight: dictionary of task ids to futures of the tasks sent to
+        this worker.
+    :ivar alive: whether the worker accepts tasks.
+    """
+    def __init__(self):
+        self.job = None
+        self.stdin = queue.Queue()
+        self.in_flight = {}
+        self.alive = True
+        self.stderr = deque(maxlen=64)
+        self.thread = None
+
+
+class TaskFarm(object):
+    """Runs many short commands on a few long-lived pilot jobs, to avoid
+    paying the scheduler overhead and queue time for each of them.
+
+    Every worker is an interactive job (see
+    :py:meth:`Scheduler.submit_interactive_job`) running a small Python
+    program. Tasks are sent to the workers as lines of JSON on their stdin
+    stream, and results come back on their stdout stream. The client-side
+    dispatcher keeps at most `slots` tasks on each worker, so that tasks go
+    to whichever worker has capacity; the worker runs that many tasks
+    concurrently.
+
+    .. code-block:: python
+
+        with TaskFarm(scheduler, workers=4, slots=8) as farm:
+            futures = [farm.submit('gzip', ['-9', name]) for name in names]
+            for future in concurrent.futures.as_completed(futures):
+                print(future.result().exit_code)
+
+    :param scheduler: the :py:class:`Scheduler` to start the workers on.
+    :param workers: number of pilot jobs to start.
+    :param slots: number of concurrent tasks per worker.
+    :param python: the Python interpreter to run on the remote side.
+    :param description: a :py:class:`JobDescription` with additional
+        settings for the pilot jobs, such as `queue_name` or `max_runtime`.
+    """
+    def __init__(self, scheduler, workers=1, slots=1, python='python3',
+                 description=None):
+        self.scheduler = scheduler
+        self.slots = slots
+        self.python = python
+        self.template = unwrap(description) if description is not None \
+            else xenon_pb2.JobDescription()
+
+        self.workers = []
+        self._pending = deque()
+        self._counter = itertools.count()
+        self._lock = threading.RLock()
+        self._closed = False
+
+        for _ in range(workers):
+            self.add_worker()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.shutdown()
+
+    def add_worker(self):
+        """Start another pilot job.
+
+        :return: the :py:class:`Worker`."""
+        description = xenon_pb2.JobDescription()
+        description.CopyFrom(self.template)
+        description.executable = self.python
+        description.arguments[:] = ['-c', WORKER, str(self.slots)]
+        description.name = description.name or 'pyxenon-pilot'
+
+        worker = Worker()
+        worker.thread = threading.Thread(
+            target=self._run_worker, args=(worker, description),
+            name='xenon-pilot', daemon=True)
+        with self._lock:
+            self.workers.append(worker)
+        worker.thread.start()
+        self._dispatch()
+        return worker
+
+    def _run_worker(self, worker, description):
+        try:
+            worker.job, responses = self.scheduler.submit_interactive_job(
+                description=description,
+                stdin_stream=iter(worker.stdin.get, None))
+
+            buffer = b''
+            for response in responses:
+                if response.stderr:
+                    worker.stderr.append(response.stderr)
+                if not response.stdout:
+                    continue
+
+                *lines, buffer = (buffer + response.stdout).split(b'\n')
+                for line in lines:
+                    self._complete(worker, json.loads(line.decode()))
+                self._dispatch()
+
+            error = WorkerLost("Worker {} exited: {}".format(
+                worker.job.id,
+                b''.join(worker.stderr).decode(errors='replace')))
+        except grpc.RpcError as e:
+            error = make_exception(self._run_worker, e)
+        except Exception as e:
+            error = e
+
+        with self._lock:
+            worker.alive = False
+            lost = list(worker.in_flight.values())
+            worker.in_flight.clear()
+            if not any(w.alive for w in self.workers):
+                lost.extend(future for _, _, future in self._pending)
+                self._pending.clear()
+
+        if lost and not isinstance(error, WorkerLost):
+            logging.getLogger('xenon').error(
+                "Pilot job failed: %s", error)
+        for future in lost:
+            if not future.done():
+                future.set_exception(error)
+
+        self._dispatch()
+
+    def _complete(self, worker, result):
+        with self._lock:
+            future = worker.in_flight.pop(result['id'], None)
+        if future is None:
+            return
+
+        if 'error' in result:
+            future.set_exception(RuntimeError(result['error']))
+        else:
+            future.set_result(TaskResult(
+                result['exit_code'], base64.b64decode(result['stdout']),
+                base64.b64decode(result['stderr'])))
+
+    def _dispatch(self):
+        """Hand pending tasks to workers that have free slots."""
+        with self._lock:
+            for worker in self.workers:
+                while worker.alive and self._pending and \
+                        len(worker.in_flight) < self.slots:
+                    task_id, message, future = self._pending.popleft()
+                    if future.set_running_or_notify_cancel():
+                        worker.in_flight[task_id] = future
+                        worker.stdin.put(message)
+
+    def submit(self, executable, arguments=(), environment=None,
+               working_directory=None, stdin=b''):
+        """Queue a command for execution on one of the workers.
+
+        :param executable: the program to run.
+        :param arguments: list of arguments.
+        :param environment: dictionary of additional environment variables.
+        :param working_directory: directory to run the command in.
+        :param stdin: bytes to send to the standard input of the command.
+        :return: a :py:class:`concurrent.futures.Future` that is resolved
+            with a :py:class:`TaskResult`.
+        """
+        if self._closed:
+            raise RuntimeError("cannot submit tasks after shutdown")
+
+        task_id = next(self._counter)
+        message = json.dumps({
+            'id': task_id,
+            'command': [executable] + list(arguments),
+            'environment': dict(environment or {}),
+            'working_directory': working_directory,
+            'stdin': base64.b64encode(stdin).decode('ascii')}) + '\n'
+
+        future = Future()
+        with self._lock:
+            if not any(w.alive for w in self.workers):
+                raise WorkerLost("No workers are running.")
+            self._pending.append((task_id, message.encode(), future))
+        self._dispatch()
+        return future
+
+    @property
+    def pending(self):
+        """Number of tasks waiting for a free slot."""
+        return len(self._pending)
+
+    def shutdown(self, wait_for_tasks=True, cancel_pending=False):
+        """Stop the workers, after the queued tasks are done.
+
+        :param wait_for_tasks: wait until all tasks are done, and the pilot
+            jobs have exited.
+        :param cancel_pending: cancel the tasks that were not yet sent to a
+            worker.
+        """
+        self._closed = True
+        with self._lock:
+            if cancel_pending:
+                for _, _, future in self._pending:
+                    future.cancel()
+                self._pending.clear()
+            futures = [f for _, _, f in self._pending] + \
+                [f for w in self.workers for f in w.in_flight.values()]
+
+        if wait_for_tasks:
+            wait(futures)
+
+        with self._lock:
+            for worker in self.workers:
+                worker.alive = False
+                worker.stdin.put(None)
+
+        if wait_for_tasks:
+            for worker in self.workers:
+                worker.thread.join()
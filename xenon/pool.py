@@ -0,0 +1,234 @@
+"""
+Load balancing of batch jobs over several schedulers and queues.
+"""
+
+import logging
+import threading
+import time
+
+from .proto import xenon_pb2
+from .objects import Job
+from .oop import unwrap
+
+
+class PoolJob(Job):
+    """A job submitted through a :py:class:`SchedulerPool`.
+
+    :ivar member: the :py:class:`xenon.pool.Member` it was routed to; its
+        `scheduler` is the one to ask about the job.
+    """
+    def __init__(self, id_, member):
+        super(PoolJob, self).__init__(id_)
+        self.member = member
+
+
+class Member(object):
+    """A scheduler and queue in a :py:class:`SchedulerPool`.
+
+    :ivar scheduler: the :py:class:`Scheduler`.
+    :ivar queue: the queue name, or `None` for the default queue.
+    :ivar max_jobs: the largest number of jobs this member may have, or
+        `None`.
+    :ivar slots: the relative number of jobs the member runs at a time.
+    :ivar jobs: number of jobs in the queue at the last sample.
+    :ivar submitted: number of jobs submitted since the last sample.
+    :ivar error: the error of the last sample, if it failed.
+    """
+    def __init__(self, scheduler, queue=None, max_jobs=None, slots=1):
+        self.scheduler = scheduler
+        self.queue = queue
+        self.max_jobs = max_jobs
+        self.slots = slots
+        self.jobs = 0
+        self.submitted = 0
+        self.error = None
+
+    def __repr__(self):
+        return 'Member(queue={!r}, jobs={}, submitted={})'.format(
+            self.queue, self.jobs, self.submitted)
+
+    @property
+    def available(self):
+        """Whether the member can take another job."""
+        return self.error is None and (
+            self.max_jobs is None or
+            self.jobs + self.submitted < self.max_jobs)
+
+    @property
+    def expected_wait(self):
+        """Estimate of the wait of the next job, relative to the other
+        members: the number of jobs ahead of it, per slot."""
+        return (self.jobs + self.submitted + 1) / self.slots
+
+
+class SchedulerPool(object):
+    """Routes batch jobs to the least loaded of several schedulers and
+    queues. The load of every member is sampled every `interval` seconds
+    in a background thread, from the jobs listed by
+    :py:meth:`Scheduler.get_jobs` for its queue, after checking its queue
+    with :py:meth:`Scheduler.get_queue_statuses`. Between samples, jobs
+    submitted through the pool are added to the estimate, so routing is a
+    local decision that costs no requests.
+
+    The standard queue status has no load figures, so the estimate is the
+    number of jobs in the queue divided by the `slots` of the member; set
+    `slots` to the relative capacity of the members.
+
+    .. code-block:: python
+
+        pool = SchedulerPool(interval=60)
+        pool.add(cluster_a, 'normal', max_jobs=500, slots=200)
+        pool.add(cluster_b, 'short', max_jobs=100, slots=50)
+        with pool:
+            jobs = [pool.submit_batch_job(d) for d in descriptions]
+
+    :param interval: seconds between samples.
+    """
+    def __init__(self, interval=30.0):
+        self.interval = interval
+        self.members = []
+        self._condition = threading.Condition()
+        self._stopped = False
+        self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def add(self, scheduler, queue=None, max_jobs=None, slots=1):
+        """Add a member to the pool.
+
+        :param scheduler: the :py:class:`Scheduler`.
+        :param queue: the queue to submit to; by default the default queue
+            of the scheduler.
+        :param max_jobs: the largest number of jobs in the queue, including
+            those of others, before the member is skipped.
+        :param slots: the relative capacity of the member.
+        :return: the :py:class:`xenon.pool.Member`."""
+        member = Member(scheduler, queue, max_jobs, slots)
+        with self._condition:
+            self.members.append(member)
+        return member
+
+    def sample(self):
+        """Sample the load of all members once. This is called by the
+        background thread, but may be called directly if no thread is
+        running."""
+        with self._condition:
+            members = list(self.members)
+            # submissions made while sampling may be missing from the
+            # sample, so only those counted now are dropped afterwards
+            counted = {id(m): m.submitted for m in members}
+
+        schedulers = {}
+        for member in members:
+            schedulers.setdefault(id(member.scheduler), []).append(member)
+
+        for group in schedulers.values():
+            scheduler = group[0].scheduler
+            errors = {}
+            try:
+                # jobs submitted without a queue go to the default queue
+                default = scheduler.get_default_queue_name() \
+                    if any(m.queue is None for m in group) else None
+                queues = [m.queue if m.queue is not None else default
+                          for m in group]
+                errors = {s.name: s.error_message for s in
+                          scheduler.get_queue_statuses(queues=queues)
+                          if s.error_message}
+                samples = []
+                for m, queue in zip(group, queues):
+                    if queue in errors:
+                        samples.append((m, errors[queue]))
+                        continue
+                    jobs = scheduler.get_jobs(queues=[queue])
+                    samples.append((m, len(jobs)))
+            except Exception as e:
+                logging.getLogger('xenon').warning(
+                    "SchedulerPool could not sample queues %s: %s",
+                    [m.queue for m in group], e)
+                samples = [(m, e) for m in group]
+
+            with self._condition:
+                for member, sample in samples:
+                    if isinstance(sample, int):
+                        member.jobs, member.error = sample, None
+                    else:
+                        member.error = sample
+                    member.submitted = max(
+                        0, member.submitted - counted[id(member)])
+                self._condition.notify_all()
+
+    def choose(self):
+        """The available member with the lowest expected wait, or
+        `None`."""
+        with self._condition:
+            candidates = [m for m in self.members if m.available]
+            if not candidates:
+                return None
+            return min(candidates, key=lambda m: m.expected_wait)
+
+    def submit_batch_job(self, description, timeout=None):
+        """Submit a job to the member with the lowest expected wait. If all
+        members are at their job limit, wait for the next sample that frees
+        one.
+
+        :param description: the :py:class:`JobDescription`; its
+            `queue_name` is replaced by the queue of the member.
+        :param timeout: longest time to wait for a member in seconds;
+            `TimeoutError` is raised when it expires.
+        :return: a :py:class:`xenon.pool.PoolJob`."""
+        limit = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            while True:
+                member = self.choose()
+                if member is not None:
+                    member.submitted += 1
+                    break
+                remaining = None if limit is None \
+                    else limit - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    raise TimeoutError(
+                        "All members of the pool are at their job limit.")
+                self._condition.wait(remaining)
+
+        copy = xenon_pb2.JobDescription()
+        copy.CopyFrom(unwrap(description))
+        if member.queue is not None:
+            copy.queue_name = member.queue
+        try:
+            job = member.scheduler.submit_batch_job(copy)
+        except Exception:
+            with self._condition:
+                member.submitted -= 1
+            raise
+        return PoolJob(job.id, member)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                if self._condition.wait_for(
+                        lambda: self._stopped, self.interval):
+                    return
+            self.sample()
+
+    def start(self):
+        """Sample the members, and start the background sampling thread."""
+        if self._thread is None:
+            self._stopped = False
+            self.sample()
+            self._thread = threading.Thread(
+                target=self._run, name='xenon-scheduler-pool', daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop the background sampling thread."""
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,411 @@
+"""
+Recording of the GRPC traffic of a client, and replay of a recording by a
+stand-in server, to reproduce a workload without the remote resources it
+ran on.
+
+A recording is a binary log of length-prefixed records, each holding a call
+id, the kind of record, the time in seconds since the recording started,
+and a serialized protobuf message (or, for the first and last record of a
+call, the method name and the final status).
+
+.. code-block:: python
+
+    # in production
+    xenon.init()
+    with Recorder('workload.xrpc').attach():
+        run_workload()
+
+    # later, on a laptop
+    xenon.init(backend='replay', path='workload.xrpc')
+    run_workload()
+"""
+
+from collections import deque
+import functools
+import itertools
+import logging
+import struct
+import threading
+import time
+from concurrent import futures
+
+import grpc
+
+from .proto import xenon_pb2_grpc
+
+
+MAGIC = b'XRPC\x01'
+
+RECORD = struct.Struct('<IBdI')
+
+CALL = 0
+REQUEST = 1
+RESPONSE = 2
+END = 3
+
+CARDINALITIES = {
+    (False, False): 'unary_unary',
+    (False, True): 'unary_stream',
+    (True, False): 'stream_unary',
+    (True, True): 'stream_stream'}
+
+
+class RecordedCall(object):
+    """A call read from a recording; times are in seconds since the start
+    of the call.
+
+    :ivar method: the full method name, such as
+        ``'/xenon.FileSystemService/exists'``.
+    :ivar request_streaming: whether the client sends a stream.
+    :ivar response_streaming: whether the server sends a stream.
+    :ivar start: the time of the call since the start of the recording.
+    :ivar requests: `(time, bytes)` pairs of the serialized requests.
+    :ivar responses: `(time, bytes)` pairs of the serialized responses.
+    :ivar code: the final :py:class:`grpc.StatusCode`, or `None` if the
+        call was not finished when the recording stopped.
+    :ivar details: the details of the final status.
+    :ivar duration: time of the final status.
+    """
+    def __init__(self, method, request_streaming, response_streaming, start):
+        self.method = method
+        self.request_streaming = request_streaming
+        self.response_streaming = response_streaming
+        self.start = start
+        self.requests = []
+        self.responses = []
+        self.code = None
+        self.details = ''
+        self.duration = None
+
+    def __repr__(self):
+        return 'RecordedCall({!r}, responses={}, code={})'.format(
+            self.method, len(self.responses), self.code)
+
+
+def read_records(path):
+    """Iterate over the `(call_id, kind, time, payload)` records of a
+    recording."""
+    with open(path, 'rb') as f:
+        if f.read(len(MAGIC)) != MAGIC:
+            raise ValueError("Not a Xenon RPC recording: {}".format(path))
+        while True:
+            header = f.read(RECORD.size)
+            if len(header) < RECORD.size:
+                return
+            call_id, kind, t, length = RECORD.unpack(header)
+            payload = f.read(length)
+            if len(payload) < length:
+                return
+            yield call_id, kind, t, payload
+
+
+def load(path):
+    """Read the calls of a recording, in the order they were started.
+
+    :return: a list of :py:class:`RecordedCall`."""
+    calls = {}
+    for call_id, kind, t, payload in read_records(path):
+        if kind == CALL:
+            calls[call_id] = RecordedCall(
+                payload[2:].decode(), bool(payload[0]), bool(payload[1]), t)
+            continue
+        call = calls[call_id]
+        if kind == REQUEST:
+            call.requests.append((t - call.start, payload))
+        elif kind == RESPONSE:
+            call.responses.append((t - call.start, payload))
+        elif kind == END:
+            code, _, details = payload.decode().partition('\n')
+            call.code = grpc.StatusCode[code]
+            call.details = details
+            call.duration = t - call.start
+    return list(calls.values())
+
+
+class RecordedStream(object):
+    """Response stream of a recorded call; records every response as the
+    client reads it, and otherwise behaves like the wrapped call."""
+    def __init__(self, recorder, call_id, call):
+        self._recorder = recorder
+        self._call_id = call_id
+        self._call = call
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        try:
+            response = next(self._call)
+        except StopIteration:
+            self._recorder.end(self._call_id, self._call)
+            raise
+        except grpc.RpcError as e:
+            self._recorder.end(self._call_id, e)
+            raise
+        self._recorder.write(self._call_id, RESPONSE, response)
+        return response
+
+    def __getattr__(self, name):
+        return getattr(self._call, name)
+
+
+class Recorder(grpc.UnaryUnaryClientInterceptor,
+               grpc.UnaryStreamClientInterceptor,
+               grpc.StreamUnaryClientInterceptor,
+               grpc.StreamStreamClientInterceptor):
+    """Client interceptor that writes every call through a channel to the
+    recording at `path`, with all requests and responses, including every
+    chunk of a stream.
+
+    :py:meth:`attach` puts the recorder between the objects of this package
+    and the server. Only file systems, schedulers and other proxies created
+    after that are recorded; the asynchronous channel of an
+    :py:class:`InteractiveHub` is not.
+
+    :param path: the file to write the recording to; it is overwritten.
+    """
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, 'wb')
+        self._file.write(MAGIC)
+        self._lock = threading.Lock()
+        self._ids = itertools.count()
+        self._start = time.monotonic()
+        self._restore = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def write(self, call_id, kind, payload):
+        """Append a record; `payload` is a message or bytes."""
+        if not isinstance(payload, bytes):
+            payload = payload.SerializeToString()
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(RECORD.pack(
+                call_id, kind, time.monotonic() - self._start,
+                len(payload)))
+            self._file.write(payload)
+
+    def begin(self, method, request_streaming, response_streaming):
+        """Record the start of a call, and return its id."""
+        call_id = next(self._ids)
+        self.write(call_id, CALL, bytes(
+            [request_streaming, response_streaming]) + method.encode())
+        return call_id
+
+    def end(self, call_id, call):
+        """Record the final status of a call, given the call or the
+        :py:class:`grpc.RpcError` it raised."""
+        self.write(call_id, END, '{}\n{}'.format(
+            call.code().name, call.details() or '').encode())
+
+    def _requests(self, call_id, request_iterator):
+        for request in request_iterator:
+            self.write(call_id, REQUEST, request)
+            yield request
+
+    def _done(self, call_id, future):
+        if future.exception() is None:
+            self.write(call_id, RESPONSE, future.result())
+        self.end(call_id, future)
+
+    def intercept_unary_unary(self, continuation, client_call_details,
+                              request):
+        call_id = self.begin(client_call_details.method, False, False)
+        self.write(call_id, REQUEST, request)
+        response = continuation(client_call_details, request)
+        response.add_done_callback(functools.partial(self._done, call_id))
+        return response
+
+    def intercept_unary_stream(self, continuation, client_call_details,
+                               request):
+        call_id = self.begin(client_call_details.method, False, True)
+        self.write(call_id, REQUEST, request)
+        return RecordedStream(
+            self, call_id, continuation(client_call_details, request))
+
+    def intercept_stream_unary(self, continuation, client_call_details,
+                               request_iterator):
+        call_id = self.begin(client_call_details.method, True, False)
+        response = continuation(
+            client_call_details, self._requests(call_id, request_iterator))
+        response.add_done_callback(functools.partial(self._done, call_id))
+        return response
+
+    def intercept_stream_stream(self, continuation, client_call_details,
+                                request_iterator):
+        call_id = self.begin(client_call_details.method, True, True)
+        return RecordedStream(self, call_id, continuation(
+            client_call_details, self._requests(call_id, request_iterator)))
+
+    def attach(self, server=None):
+        """Route the calls of `server` (by default the one started by
+        :py:func:`xenon.init`) through this recorder, until
+        :py:meth:`close`."""
+        if server is None:
+            from .server import __server__ as server
+        self._restore = (
+            server, server.file_system_stub, server.scheduler_stub)
+        channel = grpc.intercept_channel(server.channel, self)
+        server.file_system_stub = \
+            xenon_pb2_grpc.FileSystemServiceStub(channel)
+        server.scheduler_stub = \
+            xenon_pb2_grpc.SchedulerServiceStub(channel)
+        return self
+
+    def close(self):
+        """Stop recording, and restore the stubs of the server it was
+        attached to."""
+        if self._restore is not None:
+            server, server.file_system_stub, server.scheduler_stub = \
+                self._restore
+            self._restore = None
+        with self._lock:
+            self._file.close()
+
+
+class ReplayServer(grpc.GenericRpcHandler):
+    """GRPC server that answers calls from a recording made by a
+    :py:class:`Recorder`, with the recorded responses at the recorded
+    times. Calls are matched to recorded calls of the same method in the
+    order they were made; their requests are not interpreted, but those
+    that differ from the recording are counted in `mismatches`. A call of
+    which no recorded instance is left fails with
+    ``FAILED_PRECONDITION``.
+
+    Since the server side takes as long as it did when the workload was
+    recorded, differences in the run time of a replayed workload are
+    caused by the client.
+
+    Usually it is started through
+    ``xenon.init(backend='replay', path=...)``.
+
+    :param path: the recording.
+    :param port: the port to listen on; by default a free port is chosen.
+    :param max_workers: number of threads handling calls.
+    :param speed: factor by which recorded delays are shortened; with
+        ``speed=float('inf')`` responses are sent immediately.
+    :ivar port: the port the server listens on.
+    :ivar mismatches: a dictionary of the number of calls per method whose
+        requests differ from the recording.
+    """
+    def __init__(self, path, port=0, max_workers=64, speed=1.0):
+        self.speed = speed
+        self.mismatches = {}
+        self.calls = {}
+        for call in load(path):
+            self.calls.setdefault(call.method, deque()).append(call)
+
+        self._lock = threading.Lock()
+        self.server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=max_workers),
+            handlers=[self])
+        self.port = self.server.add_insecure_port('[::]:{}'.format(port))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        """Start serving."""
+        self.server.start()
+        return self
+
+    def stop(self):
+        """Stop serving, cancelling running calls."""
+        self.server.stop(None)
+
+    def service(self, handler_call_details):
+        """Implements :py:class:`grpc.GenericRpcHandler`. Methods that were
+        never recorded are left to GRPC, which answers ``UNIMPLEMENTED``."""
+        calls = self.calls.get(handler_call_details.method)
+        if calls is None:
+            return None
+        if not calls:
+            return grpc.stream_stream_rpc_method_handler(
+                lambda request, context: self._next(
+                    handler_call_details.method, context))
+        call = calls[0]
+        handler = getattr(grpc, '{}_rpc_method_handler'.format(
+            CARDINALITIES[call.request_streaming, call.response_streaming]))
+        method = call.method
+        if call.response_streaming:
+            return handler(
+                lambda request, context: self._stream(method, request,
+                                                      context))
+        return handler(
+            lambda request, context: self._unary(method, request, context))
+
+    def _next(self, method, context):
+        with self._lock:
+            calls = self.calls[method]
+            if calls:
+                return calls.popleft()
+        context.abort(grpc.StatusCode.FAILED_PRECONDITION,
+                      "No recorded call of {} left.".format(method))
+
+    def _mismatch(self, call, requests):
+        if requests != [payload for _, payload in call.requests]:
+            with self._lock:
+                self.mismatches[call.method] = \
+                    self.mismatches.get(call.method, 0) + 1
+
+    def _consume(self, call, request):
+        """Read the requests of a call; streams are read on a separate
+        thread, which is returned."""
+        if not call.request_streaming:
+            self._mismatch(call, [request])
+            return None
+
+        def drain():
+            try:
+                self._mismatch(call, list(request))
+            except Exception:
+                logging.getLogger('xenon').debug(
+                    "Replayed request stream of %s broken.", call.method)
+
+        thread = threading.Thread(target=drain, daemon=True)
+        thread.start()
+        return thread
+
+    def _sleep_until(self, start, offset):
+        delay = start + offset / self.speed - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+    def _finish(self, call, start, context):
+        if call.duration is not None:
+            self._sleep_until(start, call.duration)
+        if call.code not in (None, grpc.StatusCode.OK):
+            context.abort(call.code, call.details)
+
+    def _unary(self, method, request, context):
+        start = time.monotonic()
+        call = self._next(method, context)
+        drain = self._consume(call, request)
+        if drain is not None:
+            drain.join()
+        if not call.responses:
+            self._finish(call, start, context)
+            context.abort(grpc.StatusCode.CANCELLED,
+                          "Recorded call of {} was not finished.".format(
+                              method))
+        self._sleep_until(start, call.responses[0][0])
+        self._finish(call, start, context)
+        return call.responses[0][1]
+
+    def _stream(self, method, request, context):
+        start = time.monotonic()
+        call = self._next(method, context)
+        self._consume(call, request)
+        for offset, response in call.responses:
+            self._sleep_until(start, offset)
+            yield response
+        self._finish(call, start, context)
@@ -0,0 +1,231 @@
+"""
+Pattern matching on remote directory trees.
+"""
+
+import fnmatch
+import posixpath
+import re
+import time
+
+from .exceptions import NoSuchPathException
+from .walk import (walk, is_subdirectory)
+
+
+MAGIC = re.compile(r'[*?\[]')
+
+SIZE_UNITS = {'': 1, 'c': 1, 'k': 1 << 10, 'M': 1 << 20, 'G': 1 << 30,
+              'T': 1 << 40}
+
+SIZE_SPEC = re.compile(r'^([+-]?)(\d+)([ckMGT]?)$')
+
+
+def skip_missing(error, directory):
+    """Error handler for :py:func:`walk` that ignores directories that do
+    not exist (anymore)."""
+    if not isinstance(error, NoSuchPathException):
+        raise error
+
+
+class GlobPattern(object):
+    """A glob pattern compiled into a literal prefix, from where the
+    search starts, and a list of per-component regular expressions. The
+    component ``**`` matches any number of directories.
+
+    The state of a partial match is a set of indices into the list of
+    components, namely those components that are to be matched next.
+    """
+    def __init__(self, pattern):
+        parts = [p for p in str(pattern).split('/') if p not in ('', '.')]
+        prefix = []
+        while parts and not MAGIC.search(parts[0]) and len(parts) > 1:
+            prefix.append(parts.pop(0))
+
+        self.root = posixpath.join('/', *prefix) \
+            if str(pattern).startswith('/') else posixpath.join('.', *prefix)
+        self.components = parts
+        self.regexes = [
+            None if p == '**' else re.compile(fnmatch.translate(p))
+            for p in parts]
+
+    def closure(self, states):
+        """Add the states reachable by letting ``**`` match nothing."""
+        result = set()
+        for i in states:
+            while i < len(self.components) and self.regexes[i] is None:
+                result.add(i)
+                i += 1
+            result.add(i)
+        return frozenset(result)
+
+    @property
+    def initial(self):
+        return self.closure({0})
+
+    def step(self, states, name, is_directory):
+        """Match the entry `name` against `states`.
+
+        :return: tuple of whether the entry matches the pattern and the
+            states for the contents of the entry, if it is a directory that
+            should be descended into (or `None`)."""
+        n = len(self.components)
+        matched = False
+        following = set()
+        for i in states:
+            if i == n:
+                continue
+            if self.regexes[i] is None:
+                if is_directory:
+                    following.add(i)
+            elif self.regexes[i].match(name):
+                if i == n - 1:
+                    matched = True
+                elif is_directory:
+                    following.add(i + 1)
+
+        following = self.closure(following)
+        if is_directory and n in following:
+            matched = True
+
+        if not is_directory or not any(i < n for i in following):
+            return matched, None
+
+        return matched, following
+
+
+def glob(filesystem, pattern, max_workers=8):
+    """Implements :py:meth:`FileSystem.glob`.
+
+    :return: generator of path strings."""
+    pattern = str(pattern)
+    if not pattern.startswith('/'):
+        pattern = posixpath.join(
+            str(filesystem.get_working_directory()), pattern)
+
+    # listings report normalised paths, which must match the states
+    compiled = GlobPattern(posixpath.normpath(pattern))
+    states = {compiled.root: compiled.initial}
+
+    def descend(entry):
+        current = states.get(posixpath.dirname(entry.path.path))
+        if current is None:
+            return False
+        _, following = compiled.step(
+            current, posixpath.basename(entry.path.path),
+            is_subdirectory(entry))
+        if following is None:
+            return False
+        states[entry.path.path] = following
+        return True
+
+    for directory, entries in walk(
+            filesystem, compiled.root, descend, max_workers,
+            onerror=skip_missing):
+        current = states.pop(directory, None)
+        if current is None:
+            continue
+        for entry in entries:
+            matched, _ = compiled.step(
+                current, posixpath.basename(entry.path.path),
+                is_subdirectory(entry))
+            if matched:
+                yield entry.path.path
+
+
+def size_predicate(size):
+    """Create a predicate on sizes. `size` may be an integer (exact match),
+    a `(minimum, maximum)` tuple, where either may be `None`, or a string in
+    the style of the `find` command: ``'+1G'``, ``'-10k'`` or ``'100c'``.
+    Units are powers of 1024; without a unit the value is in bytes."""
+    if isinstance(size, tuple):
+        low, high = size
+        return lambda s: (low is None or s >= low) and \
+            (high is None or s <= high)
+
+    if isinstance(size, int):
+        return lambda s: s == size
+
+    match = SIZE_SPEC.match(size)
+    if not match:
+        raise ValueError("Invalid size specification: {}".format(size))
+    sign, value, unit = match.groups()
+    value = int(value) * SIZE_UNITS[unit]
+    return {'+': lambda s: s > value,
+            '-': lambda s: s < value,
+            '': lambda s: s == value}[sign]
+
+
+def mtime_predicate(mtime, now):
+    """Create a predicate on modification times in milliseconds. `mtime`
+    is an age in days in the style of the `find` command: ``'+30'`` means
+    more than 30 days ago, ``'-1'`` less than a day ago. A number is taken
+    to mean ``'+number'``. A `(minimum, maximum)` tuple gives an age range
+    in days."""
+    def age(t):
+        return (now - t / 1000) / 86400
+
+    if isinstance(mtime, tuple):
+        low, high = mtime
+        return lambda t: (low is None or age(t) >= low) and \
+            (high is None or age(t) <= high)
+
+    mtime = str(mtime)
+    if mtime.startswith('-'):
+        limit = float(mtime[1:])
+        return lambda t: age(t) < limit
+
+    limit = float(mtime.lstrip('+'))
+    return lambda t: age(t) > limit
+
+
+TYPE_FIELDS = {'f': 'is_regular', 'd': 'is_directory',
+               'l': 'is_symbolic_link'}
+
+
+def find(filesystem, root, name=None, size=None, mtime=None, type=None,
+         maxdepth=None, prune=None, max_workers=8, now=None):
+    """Implements :py:meth:`FileSystem.find`.
+
+    :return: generator of `xenon_pb2.PathAttributes` messages."""
+    if maxdepth is not None and maxdepth < 1:
+        return
+
+    root = str(root)
+    if not root.startswith('/'):
+        root = posixpath.join(str(filesystem.get_working_directory()), root)
+    root = posixpath.normpath(root)
+
+    predicates = []
+    if name is not None:
+        regex = re.compile(fnmatch.translate(name))
+        predicates.append(
+            lambda e: regex.match(posixpath.basename(e.path.path)))
+    if size is not None:
+        match_size = size_predicate(size)
+        predicates.append(lambda e: match_size(e.size))
+    if mtime is not None:
+        match_mtime = mtime_predicate(
+            mtime, time.time() if now is None else now)
+        predicates.append(lambda e: match_mtime(e.last_modified_time))
+    if type is not None:
+        field = TYPE_FIELDS[type]
+        predicates.append(lambda e: getattr(e, field))
+
+    prune_regex = re.compile(fnmatch.translate(prune)) if prune else None
+    base_depth = root.rstrip('/').count('/')
+
+    def descend(entry):
+        path = entry.path.path
+        if not is_subdirectory(entry):
+            return False
+        if maxdepth is not None and \
+                path.count('/') - base_depth >= maxdepth:
+            return False
+        if prune_regex and prune_regex.match(posixpath.basename(path)):
+            return False
+        return True
+
+    for _, entries in walk(filesystem, root, descend, max_workers,
+                           onerror=skip_missing):
+        for entry in entries:
+            if all(p(entry) for p in predicates):
+                yield entry
@@ -12,6 +12,10 @@ from pathlib import Path
 from contextlib import closing
 
 import grpc
+try:
+    from grpc import aio
+except ImportError:
+    aio = None
 from xdg import BaseDirectory
 
 from .proto import (xenon_pb2_grpc)
@@ -25,19 +29,23 @@ def check_socket(host, port):
         return sock.connect_ex((host, port)) == 0
 
 
-def get_secure_channel(port=50051):
-    """Try to connect over a secure channel."""
+def get_channel_credentials():
+    """Credentials for a secure channel, using the certificate and key of
+    the Xenon-GRPC server."""
     config_dir = Path(BaseDirectory.xdg_config_home) / 'xenon-grpc'
     crt_file = config_dir / 'server.crt'
     key_file = config_dir / 'server.key'
 
-    creds = grpc.ssl_channel_credentials(
+    return grpc.ssl_channel_credentials(
         root_certificates=open(str(crt_file), 'rb').read(),
         private_key=open(str(key_file), 'rb').read(),
         certificate_chain=open(str(crt_file), 'rb').read())
 
+
+def get_secure_channel(port=50051):
+    """Try to connect over a secure channel."""
     address = "{}:{}".format(socket.gethostname(), port)
-    channel = grpc.secure_channel(address, creds)
+    channel = grpc.secure_channel(address, get_channel_credentials())
     return channel
 
 
@@ -58,13 +66,22 @@ def print_stream(file, name):
 class Server(object):
     """Xenon Server. This tries to find a running Xenon-GRPC server,
     or start one if not found. This implementation may only work on Unix.
+
+    With the ``'inprocess'`` backend, a
+    :py:class:`xenon.testing.FakeXenonServer` is started in this process
+    instead, with `options` passed to it. The ``'replay'`` backend likewise
+    starts a :py:class:`xenon.replay.ReplayServer`.
     """
-    def __init__(self, port=50051, disable_tls=False):
+    def __init__(self, port=50051, disable_tls=False, backend='java',
+                 **options):
         self.port = port
         self.process = None
+        self.fake = None
         self.channel = None
         self.threads = []
         self.disable_tls = disable_tls
+        self.backend = backend
+        self.options = options
 
         # Xenon proxies
         self.scheduler_stub = None
@@ -73,7 +90,21 @@ class Server(object):
     def __enter__(self):
         logger = logging.getLogger('xenon')
 
-        if check_socket(socket.gethostname(), self.port):
+        if self.backend == 'inprocess':
+            from .testing import FakeXenonServer
+            logger.info('Starting in-process Xenon server.')
+            self.fake = FakeXenonServer(self.port, **self.options).start()
+            self.port = self.fake.port
+            self.disable_tls = True
+        elif self.backend == 'replay':
+            from .replay import ReplayServer
+            logger.info('Starting Xenon replay server.')
+            self.fake = ReplayServer(port=self.port, **self.options).start()
+            self.port = self.fake.port
+            self.disable_tls = True
+        elif self.backend != 'java':
+            raise ValueError("Unknown backend: {}".format(self.backend))
+        elif check_socket(socket.gethostname(), self.port):
             logger.info('Xenon-GRPC servers seems to be running.')
         else:
             logger.info('Starting Xenon-GRPC server.')
@@ -107,17 +138,32 @@ class Server(object):
             xenon_pb2_grpc.SchedulerServiceStub(self.channel)
         return self
 
+    def aio_channel(self):
+        """Open a :py:mod:`grpc.aio` channel to the server, for use in an
+        :py:mod:`asyncio` event loop. Must be called from within the loop
+        that will use the channel."""
+        if aio is None:
+            raise ImportError("Asynchronous channels require grpcio >= 1.32.")
+        address = '{}:{}'.format(socket.gethostname(), self.port)
+        if self.disable_tls:
+            return aio.insecure_channel(address)
+        return aio.secure_channel(address, get_channel_credentials())
+
     def __exit__(self, exc_type, exc_value, exc_tb):
         if self.process:
             kill_process(self.process)
+        if self.fake:
+            self.fake.stop()
 
         self.process = None
+        self.fake = None
 
 
 __server__ = Server()
 
 
-def init(port=None, do_not_exit=False, disable_tls=False, log_level='WARNING'):
+def init(port=None, do_not_exit=False, disable_tls=False, log_level='WARNING',
+         backend='java', **options):
     """Start the Xenon GRPC server on the specified port, or, if a service
     is already running on that port, connect to that.
 
@@ -128,7 +174,15 @@ def init(port=None, do_not_exit=False, disable_tls=False, log_level='WARNING'):
     :param port: the port number
     :param do_not_exit: by default the GRPC server is shut down after Python
         exits (through the `atexit` module), setting this value to `True` will
-        prevent that from happening."""
+        prevent that from happening.
+    :param backend: ``'java'`` to run the Xenon-GRPC server, or
+        ``'inprocess'`` to run a :py:class:`xenon.testing.FakeXenonServer`
+        inside this process, which supports only the ``file`` and ``local``
+        adaptors, and needs no Java runtime, or ``'replay'`` to answer
+        calls from a recording with a :py:class:`xenon.replay.ReplayServer`.
+    :param options: passed to :py:class:`xenon.testing.FakeXenonServer`,
+        such as `latency` and `bandwidth`, or to
+        :py:class:`xenon.replay.ReplayServer`, such as `path`."""
     logger = logging.getLogger('xenon')
     logger.setLevel(logging.INFO)
 
@@ -140,13 +194,15 @@ def init(port=None, do_not_exit=False, disable_tls=False, log_level='WARNING'):
     if port is None:
         port = find_free_port()
 
-    if __server__.process is not None:
+    if __server__.process is not None or __server__.fake is not None:
         logger.warning(
             "You tried to run init(), but the server is already running.")
         return __server__
 
     __server__.port = port
     __server__.disable_tls = disable_tls
+    __server__.backend = backend
+    __server__.options = options
     __server__.__enter__()
 
     if not do_not_exit:
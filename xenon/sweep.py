@@ -0,0 +1,179 @@
+"""
+Parameter sweeps: job descriptions generated lazily from a template.
+"""
+
+import itertools
+import shlex
+import string
+
+from .proto import xenon_pb2
+from .oop import get_fields
+from . import bulk
+
+
+TEMPLATE_FIELDS = ('arguments', 'environment', 'stdin', 'stdout', 'stderr',
+                   'working_directory', 'name')
+
+# Fields that may not vary between the tasks of a native array job.
+ARRAY_FIXED_FIELDS = ('stdin', 'stdout', 'stderr', 'working_directory')
+
+# Per adaptor: the scheduler arguments that make a job an array job, the
+# environment variable holding the index of the task, and the first index.
+ARRAY_ADAPTORS = {
+    'slurm': (['--array={first}-{last}'], 'SLURM_ARRAY_TASK_ID', 0),
+    'torque': (['-t', '{first}-{last}'], 'PBS_ARRAYID', 0),
+    'gridengine': (['-t', '{first}-{last}'], 'SGE_TASK_ID', 1)}
+
+
+def placeholders(value):
+    """The names of the placeholders in a format string."""
+    return {name for _, name, _, _ in string.Formatter().parse(value)
+            if name is not None}
+
+
+class JobTemplate(object):
+    """A :py:class:`JobDescription` with placeholders. The `arguments`,
+    the values of `environment`, `stdin`, `stdout`, `stderr`,
+    `working_directory` and `name` may contain placeholders in the syntax
+    of :py:meth:`str.format`, such as ``'{alpha}'``.
+
+    The fixed part of the description is converted to protobuf once;
+    rendering only fills in the placeholders.
+
+    .. code-block:: python
+
+        template = JobTemplate(
+            executable='simulate', arguments=['--alpha={alpha}', '{seed}'],
+            stdout='out-{alpha}-{seed}.txt')
+        scheduler.submit_sweep(
+            template, {'alpha': [0.1, 0.2, 0.5], 'seed': range(100)})
+    """
+    __fields__ = get_fields(xenon_pb2.JobDescription)
+
+    def __init__(self, **kwargs):
+        fixed = {}
+        self.templated = {}
+        for k, v in kwargs.items():
+            if k not in self.__fields__:
+                raise AttributeError(
+                    "{} is not a valid field in JobDescription.".format(k))
+            if k == 'working_directory':
+                v = str(v)
+            if k in TEMPLATE_FIELDS and self._names(k, v):
+                self.templated[k] = v
+            else:
+                fixed[k] = v
+
+        self.base = xenon_pb2.JobDescription(**fixed)
+        self.placeholders = set().union(
+            *(self._names(k, v) for k, v in self.templated.items()))
+
+    @staticmethod
+    def _names(field, value):
+        if field == 'arguments':
+            return set().union(*(placeholders(a) for a in value))
+        if field == 'environment':
+            return set().union(*(placeholders(v) for v in value.values()))
+        return placeholders(value)
+
+    def render(self, **parameters):
+        """Fill in the placeholders.
+
+        :return: a `xenon_pb2.JobDescription` message, which can be passed
+            to :py:meth:`Scheduler.submit_batch_job`."""
+        description = xenon_pb2.JobDescription()
+        description.CopyFrom(self.base)
+        for field, value in self.templated.items():
+            if field == 'arguments':
+                description.arguments[:] = [
+                    a.format(**parameters) for a in value]
+            elif field == 'environment':
+                description.environment.update({
+                    k: v.format(**parameters) for k, v in value.items()})
+            else:
+                setattr(description, field, value.format(**parameters))
+        return description
+
+
+def parameter_grid(grid, mode='product'):
+    """Generate the parameter sets of a sweep lazily.
+
+    :param grid: a dictionary mapping parameter names to lists of values, or
+        an iterable of dictionaries that is passed through unchanged.
+    :param mode: ``'product'`` for all combinations of the values, ``'zip'``
+        to combine the n-th values of all parameters.
+    :return: iterator of dictionaries."""
+    if not isinstance(grid, dict):
+        return iter(grid)
+
+    names = list(grid)
+    if mode == 'product':
+        combinations = itertools.product(*(grid[n] for n in names))
+    elif mode == 'zip':
+        combinations = zip(*(grid[n] for n in names))
+    else:
+        raise ValueError("Unknown mode: {}".format(mode))
+
+    return (dict(zip(names, values)) for values in combinations)
+
+
+def array_script(descriptions, variable, first):
+    """A Bash script that runs the command of `descriptions[i]`, where `i`
+    is the value of the environment variable `variable` minus `first`."""
+    lines = ['case "${}" in'.format(variable)]
+    for index, d in enumerate(descriptions):
+        environment = sorted(dict(d.environment).items())
+        command = ['env'] + ['{}={}'.format(k, v) for k, v in environment] \
+            + [d.executable] + list(d.arguments)
+        lines.append('{}) exec {} ;;'.format(
+            index + first, ' '.join(shlex.quote(c) for c in command)))
+    lines.append('*) echo "Invalid array index: ${}" >&2; exit 1 ;;'
+                 .format(variable))
+    lines.append('esac')
+    return '\n'.join(lines) + '\n'
+
+
+def array_description(template, descriptions, adaptor):
+    """A description for a native array job running `descriptions`."""
+    arguments, variable, first = ARRAY_ADAPTORS[adaptor]
+    description = xenon_pb2.JobDescription()
+    description.CopyFrom(template.base)
+    description.executable = '/bin/bash'
+    description.arguments[:] = ['-c', array_script(
+        descriptions, variable, first)]
+    description.ClearField('environment')
+    description.scheduler_arguments.extend(
+        a.format(first=first, last=first + len(descriptions) - 1)
+        for a in arguments)
+    if 'name' in template.templated:
+        description.name = descriptions[0].name
+    return description
+
+
+def submit_sweep(scheduler, template, grid, mode, max_in_flight, array,
+                 max_array_size, job_type):
+    """Implements :py:meth:`Scheduler.submit_sweep`; `job_type` is called
+    with the id of every submitted job."""
+    parameters = parameter_grid(grid, mode)
+    descriptions = (template.render(**p) for p in parameters)
+
+    if array:
+        fixed = not any(f in template.templated for f in ARRAY_FIXED_FIELDS)
+        adaptor = scheduler.get_adaptor_name()
+        if adaptor not in ARRAY_ADAPTORS or not fixed:
+            if array != 'auto':
+                raise ValueError(
+                    "Cannot submit an array job for this template to a "
+                    "scheduler of type {}.".format(adaptor))
+            array = False
+
+    if not array:
+        return bulk.submit_many(
+            scheduler, descriptions, max_in_flight, job_type)
+
+    arrays = iter(lambda: list(itertools.islice(
+        descriptions, max_array_size)), [])
+    return bulk.submit_many(
+        scheduler, (array_description(template, chunk, adaptor)
+                    for chunk in arrays),
+        max_in_flight, job_type)
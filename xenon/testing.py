@@ -0,0 +1,979 @@
+"""
+An in-process stand-in for the Xenon-GRPC server, for tests and benchmarks.
+
+It implements the ``file`` file system adaptor on the local disk and the
+``local`` scheduler adaptor with :py:mod:`subprocess`, so the client can be
+exercised without a Java runtime. Latency and bandwidth of the connection
+can be simulated, which keeps the cost of the server constant when the
+client is measured.
+
+The same simulation can be put in front of a real Xenon-GRPC server with a
+:py:class:`WanProxy`, per method.
+"""
+
+import functools
+import itertools
+import os
+import queue
+import random
+import shutil
+import stat
+import subprocess
+import threading
+import time
+from concurrent import futures
+
+import grpc
+from google.protobuf.message import Message
+
+from .proto import (xenon_pb2, xenon_pb2_grpc)
+
+
+CHUNK_SIZE = 64 * 1024
+
+PERMISSION_BITS = [
+    (xenon_pb2.OWNER_READ, stat.S_IRUSR),
+    (xenon_pb2.OWNER_WRITE, stat.S_IWUSR),
+    (xenon_pb2.OWNER_EXECUTE, stat.S_IXUSR),
+    (xenon_pb2.GROUP_READ, stat.S_IRGRP),
+    (xenon_pb2.GROUP_WRITE, stat.S_IWGRP),
+    (xenon_pb2.GROUP_EXECUTE, stat.S_IXGRP),
+    (xenon_pb2.OTHERS_READ, stat.S_IROTH),
+    (xenon_pb2.OTHERS_WRITE, stat.S_IWOTH),
+    (xenon_pb2.OTHERS_EXECUTE, stat.S_IXOTH)]
+
+
+class XenonError(Exception):
+    """Error to be reported to the client, mimicking the way Xenon-GRPC
+    encodes Java exceptions in the status details."""
+    def __init__(self, code, name, msg):
+        super(XenonError, self).__init__(msg)
+        self.code = code
+        self.name = name
+        self.msg = msg
+
+    def abort(self, context):
+        context.abort(self.code, "nl.esciencecenter.xenon.{}: {}".format(
+            self.name, self.msg))
+
+
+def no_such_path(path):
+    return XenonError(grpc.StatusCode.NOT_FOUND, 'NoSuchPathException',
+                      'file adaptor: Path does not exist: {}'.format(path))
+
+
+def path_exists(path):
+    return XenonError(grpc.StatusCode.ALREADY_EXISTS,
+                      'PathAlreadyExistsException',
+                      'file adaptor: Path already exists: {}'.format(path))
+
+
+def copy_tree(source, target):
+    """Copy the directory `source` to `target`, merging it with whatever
+    `target` already contains (`shutil.copytree` only does that from
+    Python 3.8 on)."""
+    os.makedirs(target, exist_ok=True)
+    for name in os.listdir(source):
+        path = os.path.join(source, name)
+        if os.path.isdir(path):
+            copy_tree(path, os.path.join(target, name))
+        else:
+            shutil.copy2(path, os.path.join(target, name))
+    shutil.copystat(source, target)
+
+
+class Link(object):
+    """Simulated connection between the client and the server. Every call
+    is delayed by `latency` seconds plus a random fraction of `jitter`, and
+    every message by its size divided by `bandwidth`; the bandwidth applies
+    to each call separately. A fraction `error_rate` of the calls fails
+    with `error_code` before it reaches the server.
+
+    :ivar latency: round-trip time in seconds.
+    :ivar jitter: largest extra delay of a call in seconds.
+    :ivar bandwidth: bytes per second, or `None` for no limit.
+    :ivar error_rate: probability that a call fails.
+    :ivar error_code: the :py:class:`grpc.StatusCode` of failed calls.
+    :ivar random: the :py:class:`random.Random` instance drawing jitter and
+        errors, seeded with `seed`.
+    """
+    def __init__(self, latency=0.0, bandwidth=None, jitter=0.0,
+                 error_rate=0.0, error_code=grpc.StatusCode.UNAVAILABLE,
+                 seed=None):
+        self.latency = latency
+        self.bandwidth = bandwidth
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_code = error_code
+        self.random = random.Random(seed)
+
+    def delay(self):
+        delay = self.latency
+        if self.jitter:
+            delay += self.random.uniform(0, self.jitter)
+        if delay:
+            time.sleep(delay)
+
+    def fault(self, context):
+        """Abort the call of `context` with probability `error_rate`."""
+        if self.error_rate and self.random.random() < self.error_rate:
+            context.abort(self.error_code, "Fault injected by test link.")
+
+    def transfer(self, message):
+        """Delay a message, which may also be serialized as bytes."""
+        if self.bandwidth:
+            size = len(message) if isinstance(message, bytes) \
+                else message.ByteSize()
+            time.sleep(size / self.bandwidth)
+        return message
+
+    def messages(self, iterator):
+        for message in iterator:
+            yield self.transfer(message)
+
+
+def rpc(f):
+    """Translate `XenonError` exceptions into aborted calls, and apply the
+    link of the service. Both unary and client streaming methods are
+    decorated with this."""
+    def wrapper(self, request, context):
+        self.link.delay()
+        self.link.fault(context)
+        if isinstance(request, Message):
+            self.link.transfer(request)
+        else:
+            request = self.link.messages(request)
+        try:
+            return self.link.transfer(f(self, request, context))
+        except XenonError as e:
+            e.abort(context)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+
+def stream_rpc(f):
+    """Translate `XenonError` exceptions into aborted calls, and apply the
+    link of the service, for methods returning a stream."""
+    def wrapper(self, request, context):
+        self.link.delay()
+        self.link.fault(context)
+        if isinstance(request, Message):
+            self.link.transfer(request)
+        else:
+            request = self.link.messages(request)
+        try:
+            yield from self.link.messages(f(self, request, context))
+        except XenonError as e:
+            e.abort(context)
+
+    wrapper.__name__ = f.__name__
+    return wrapper
+
+
+class FakeFileSystemService(xenon_pb2_grpc.FileSystemServiceServicer):
+    """Implements the `file` adaptor on the local disk."""
+    def __init__(self, link=None):
+        self.link = link or Link()
+        self.lock = threading.Lock()
+        self.counter = itertools.count()
+        self.working_directories = {}
+        self.copies = {}
+
+    def new_filesystem(self, adaptor='file'):
+        if adaptor not in ('file', 'local'):
+            raise XenonError(
+                grpc.StatusCode.INVALID_ARGUMENT, 'UnknownAdaptorException',
+                'Adaptor {} is not supported.'.format(adaptor))
+
+        fs = xenon_pb2.FileSystem(id='file://{}'.format(next(self.counter)))
+        self.working_directories[fs.id] = os.getcwd()
+        return fs
+
+    def resolve(self, filesystem, path):
+        if filesystem.id not in self.working_directories:
+            raise XenonError(
+                grpc.StatusCode.NOT_FOUND, 'NotConnectedException',
+                'file adaptor: File system is closed.')
+        return os.path.join(self.working_directories[filesystem.id],
+                            path.path)
+
+    def attributes(self, path):
+        try:
+            st = os.lstat(path)
+        except FileNotFoundError:
+            raise no_such_path(path) from None
+
+        mode = st.st_mode
+        return xenon_pb2.PathAttributes(
+            path=xenon_pb2.Path(path=path, separator='/'),
+            creation_time=int(st.st_ctime * 1000),
+            is_directory=stat.S_ISDIR(mode),
+            is_executable=os.access(path, os.X_OK),
+            is_hidden=os.path.basename(path).startswith('.'),
+            is_other=not (stat.S_ISDIR(mode) or stat.S_ISREG(mode) or
+                          stat.S_ISLNK(mode)),
+            is_readable=os.access(path, os.R_OK),
+            is_regular=stat.S_ISREG(mode),
+            is_symbolic_link=stat.S_ISLNK(mode),
+            is_writable=os.access(path, os.W_OK),
+            last_access_time=int(st.st_atime * 1000),
+            last_modified_time=int(st.st_mtime * 1000),
+            owner=str(st.st_uid),
+            group=str(st.st_gid),
+            permissions=[p for p, bit in PERMISSION_BITS if mode & bit],
+            size=st.st_size)
+
+    @rpc
+    def getAdaptorNames(self, request, context):
+        return xenon_pb2.AdaptorNames(name=['file'])
+
+    @rpc
+    def create(self, request, context):
+        return self.new_filesystem(request.adaptor)
+
+    @rpc
+    def localFileSystems(self, request, context):
+        return xenon_pb2.FileSystems(filesystems=[self.new_filesystem()])
+
+    @rpc
+    def listFileSystems(self, request, context):
+        return xenon_pb2.FileSystems(filesystems=[
+            xenon_pb2.FileSystem(id=k) for k in self.working_directories])
+
+    @rpc
+    def getAdaptorName(self, request, context):
+        return xenon_pb2.AdaptorName(name='file')
+
+    @rpc
+    def getLocation(self, request, context):
+        return xenon_pb2.Location(location='/')
+
+    @rpc
+    def getProperties(self, request, context):
+        return xenon_pb2.Properties()
+
+    @rpc
+    def getPathSeparator(self, request, context):
+        return xenon_pb2.GetPathSeparatorResponse(separator='/')
+
+    @rpc
+    def isOpen(self, request, context):
+        return xenon_pb2.Is(value=request.id in self.working_directories)
+
+    @rpc
+    def close(self, request, context):
+        self.working_directories.pop(request.id, None)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def getWorkingDirectory(self, request, context):
+        return xenon_pb2.Path(
+            path=self.resolve(request, xenon_pb2.Path(path='.')).rstrip('.')
+            .rstrip('/') or '/', separator='/')
+
+    @rpc
+    def setWorkingDirectory(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        if not os.path.isdir(path):
+            raise no_such_path(path)
+        self.working_directories[request.filesystem.id] = path
+        return xenon_pb2.Empty()
+
+    @rpc
+    def createDirectories(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        if os.path.lexists(path):
+            raise path_exists(path)
+        os.makedirs(path)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def createDirectory(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        try:
+            os.mkdir(path)
+        except FileExistsError:
+            raise path_exists(path) from None
+        except FileNotFoundError:
+            raise no_such_path(os.path.dirname(path)) from None
+        return xenon_pb2.Empty()
+
+    @rpc
+    def createFile(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        try:
+            open(path, 'x').close()
+        except FileExistsError:
+            raise path_exists(path) from None
+        except FileNotFoundError:
+            raise no_such_path(os.path.dirname(path)) from None
+        return xenon_pb2.Empty()
+
+    @rpc
+    def createSymbolicLink(self, request, context):
+        link = self.resolve(request.filesystem, request.link)
+        if os.path.lexists(link):
+            raise path_exists(link)
+        os.symlink(request.target.path, link)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def readSymbolicLink(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        if not os.path.islink(path):
+            raise XenonError(
+                grpc.StatusCode.INVALID_ARGUMENT, 'InvalidPathException',
+                'file adaptor: Not a symbolic link: {}'.format(path))
+        return xenon_pb2.Path(path=os.readlink(path), separator='/')
+
+    @rpc
+    def rename(self, request, context):
+        source = self.resolve(request.filesystem, request.source)
+        target = self.resolve(request.filesystem, request.target)
+        if not os.path.lexists(source):
+            raise no_such_path(source)
+        if os.path.lexists(target):
+            raise path_exists(target)
+        os.rename(source, target)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def delete(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        if not os.path.lexists(path):
+            raise no_such_path(path)
+        if os.path.isdir(path) and not os.path.islink(path):
+            if request.recursive:
+                shutil.rmtree(path)
+            else:
+                try:
+                    os.rmdir(path)
+                except OSError:
+                    raise XenonError(
+                        grpc.StatusCode.FAILED_PRECONDITION,
+                        'DirectoryNotEmptyException',
+                        'file adaptor: Directory not empty: {}'.format(
+                            path)) from None
+        else:
+            os.unlink(path)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def exists(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        return xenon_pb2.Is(value=os.path.lexists(path))
+
+    @rpc
+    def getAttributes(self, request, context):
+        return self.attributes(
+            self.resolve(request.filesystem, request.path))
+
+    @rpc
+    def setPosixFilePermissions(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        if not os.path.lexists(path):
+            raise no_such_path(path)
+        mode = 0
+        for p, bit in PERMISSION_BITS:
+            if p in request.permissions:
+                mode |= bit
+        os.chmod(path, mode)
+        return xenon_pb2.Empty()
+
+    @stream_rpc
+    def readFromFile(self, request, context):
+        path = self.resolve(request.filesystem, request.path)
+        try:
+            f = open(path, 'rb')
+        except FileNotFoundError:
+            raise no_such_path(path) from None
+
+        with f:
+            for chunk in iter(lambda: f.read(CHUNK_SIZE), b''):
+                yield xenon_pb2.ReadFromFileResponse(buffer=chunk)
+
+    def _write(self, request_iterator, mode):
+        first = next(request_iterator)
+        path = self.resolve(first.filesystem, first.path)
+        if mode == 'xb' and os.path.lexists(path):
+            raise path_exists(path)
+        if mode == 'ab' and not os.path.lexists(path):
+            raise no_such_path(path)
+        try:
+            f = open(path, mode)
+        except FileNotFoundError:
+            raise no_such_path(os.path.dirname(path)) from None
+
+        with f:
+            f.write(first.buffer)
+            for msg in request_iterator:
+                f.write(msg.buffer)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def writeToFile(self, request_iterator, context):
+        return self._write(request_iterator, 'xb')
+
+    @rpc
+    def appendToFile(self, request_iterator, context):
+        return self._write(request_iterator, 'ab')
+
+    @stream_rpc
+    def list(self, request, context):
+        path = self.resolve(request.filesystem, request.dir)
+        if not os.path.isdir(path):
+            raise no_such_path(path)
+
+        if request.recursive:
+            for root, dirs, files in os.walk(path):
+                for name in dirs + files:
+                    yield self.attributes(os.path.join(root, name))
+        else:
+            for entry in os.scandir(path):
+                yield self.attributes(entry.path)
+
+    def copy_path(self, source, target, request, status):
+        if not os.path.lexists(source):
+            raise no_such_path(source)
+        if os.path.lexists(target):
+            if request.mode == xenon_pb2.CopyRequest.CREATE:
+                raise path_exists(target)
+            if request.mode == xenon_pb2.CopyRequest.IGNORE:
+                return
+        if os.path.isdir(source):
+            if not request.recursive:
+                raise XenonError(
+                    grpc.StatusCode.INVALID_ARGUMENT,
+                    'InvalidPathException',
+                    'file adaptor: Source is a directory: {}'.format(
+                        source))
+            copy_tree(source, target)
+        else:
+            shutil.copyfile(source, target)
+        status.bytes_copied = status.bytes_to_copy = \
+            os.path.getsize(target)
+
+    @rpc
+    def copy(self, request, context):
+        source = self.resolve(request.filesystem, request.source)
+        target = self.resolve(request.destination_filesystem,
+                              request.destination)
+        copy_id = 'COPY-{}'.format(next(self.counter))
+        status = xenon_pb2.CopyStatus(
+            copy_operation=xenon_pb2.CopyOperation(id=copy_id),
+            done=True, state='DONE')
+
+        try:
+            self.copy_path(source, target, request, status)
+        except XenonError as e:
+            status.state = 'FAILED'
+            status.error_message = e.msg
+            status.error_type = xenon_pb2.CopyStatus.ALREADY_EXISTS \
+                if e.name == 'PathAlreadyExistsException' \
+                else xenon_pb2.CopyStatus.NOT_FOUND
+
+        self.copies[copy_id] = status
+        return status.copy_operation
+
+    def copy_status(self, request):
+        try:
+            return self.copies[request.copy_operation.id]
+        except KeyError:
+            raise XenonError(
+                grpc.StatusCode.NOT_FOUND, 'NoSuchCopyException',
+                'file adaptor: No such copy: {}'.format(
+                    request.copy_operation.id)) from None
+
+    @rpc
+    def getStatus(self, request, context):
+        return self.copy_status(request)
+
+    @rpc
+    def cancel(self, request, context):
+        return self.copy_status(request)
+
+    @rpc
+    def waitUntilDone(self, request, context):
+        return self.copy_status(request)
+
+
+class FakeJob(object):
+    """A job running as a local subprocess."""
+    def __init__(self, job_id, description, process, stdin=None):
+        self.id = job_id
+        self.description = description
+        self.process = process
+        self.stdin = stdin
+        self.cancelled = False
+        self.finished = threading.Event()
+
+    def status(self):
+        returncode = self.process.poll()
+        status = xenon_pb2.JobStatus(
+            job=xenon_pb2.Job(id=self.id), name=self.description.name)
+
+        if returncode is None:
+            status.state = 'RUNNING'
+            status.running = True
+        elif self.cancelled:
+            status.state = 'KILLED'
+            status.done = True
+            status.exit_code = returncode
+            status.error_type = xenon_pb2.JobStatus.CANCELLED
+            status.error_message = 'Process cancelled by user.'
+        else:
+            status.state = 'DONE'
+            status.done = True
+            status.exit_code = returncode
+
+        return status
+
+
+def no_such_job(job_id):
+    return XenonError(grpc.StatusCode.NOT_FOUND, 'NoSuchJobException',
+                      'local adaptor: Job not found: {}'.format(job_id))
+
+
+class FakeSchedulerService(xenon_pb2_grpc.SchedulerServiceServicer):
+    """Implements the `local` scheduler adaptor using `subprocess`."""
+    queues = ['single', 'multi', 'unlimited']
+
+    def __init__(self, filesystem_service, link=None):
+        self.filesystem_service = filesystem_service
+        self.link = link or Link()
+        self.counter = itertools.count()
+        self.schedulers = {}
+        self.jobs = {}
+
+    def new_scheduler(self, adaptor='local'):
+        if adaptor != 'local':
+            raise XenonError(
+                grpc.StatusCode.INVALID_ARGUMENT, 'UnknownAdaptorException',
+                'Adaptor {} is not supported.'.format(adaptor))
+
+        scheduler = xenon_pb2.Scheduler(
+            id='local://{}'.format(next(self.counter)))
+        self.schedulers[scheduler.id] = \
+            self.filesystem_service.new_filesystem()
+        return scheduler
+
+    def get_job(self, job):
+        try:
+            return self.jobs[job.id]
+        except KeyError:
+            raise no_such_job(job.id) from None
+
+    def start(self, description, interactive=False):
+        if not description.executable:
+            raise XenonError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                'IncompleteJobDescriptionException',
+                'local adaptor: Executable missing in JobDescription!')
+
+        cwd = description.working_directory or None
+        if cwd and not os.path.isdir(cwd):
+            raise XenonError(
+                grpc.StatusCode.INVALID_ARGUMENT,
+                'InvalidJobDescriptionException',
+                'local adaptor: Working directory does not exist: {}'.format(
+                    cwd))
+
+        def redirect(name, mode):
+            if not name:
+                return subprocess.DEVNULL
+            return open(os.path.join(cwd or '', name), mode)
+
+        env = dict(os.environ)
+        env.update(description.environment)
+        cmd = [description.executable] + list(description.arguments)
+
+        if interactive:
+            files = dict(stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+                         stderr=subprocess.PIPE)
+        else:
+            files = dict(stdin=redirect(description.stdin, 'rb'),
+                         stdout=redirect(description.stdout, 'wb'),
+                         stderr=redirect(description.stderr, 'wb'))
+
+        try:
+            process = subprocess.Popen(cmd, cwd=cwd, env=env, **files)
+        except OSError as e:
+            raise XenonError(
+                grpc.StatusCode.INTERNAL, 'XenonException',
+                'local adaptor: Failed to start process: {}'.format(
+                    e)) from None
+        finally:
+            if not interactive:
+                for f in files.values():
+                    if hasattr(f, 'close'):
+                        f.close()
+
+        job = FakeJob('local-{}'.format(next(self.counter)),
+                      description, process)
+        self.jobs[job.id] = job
+        return job
+
+    @rpc
+    def getAdaptorNames(self, request, context):
+        return xenon_pb2.AdaptorNames(name=['local'])
+
+    @rpc
+    def create(self, request, context):
+        return self.new_scheduler(request.adaptor)
+
+    @rpc
+    def localScheduler(self, request, context):
+        return self.new_scheduler()
+
+    @rpc
+    def listSchedulers(self, request, context):
+        return xenon_pb2.Schedulers(schedulers=[
+            xenon_pb2.Scheduler(id=k) for k in self.schedulers])
+
+    @rpc
+    def getAdaptorName(self, request, context):
+        return xenon_pb2.AdaptorName(name='local')
+
+    @rpc
+    def getLocation(self, request, context):
+        return xenon_pb2.Location(location='')
+
+    @rpc
+    def getProperties(self, request, context):
+        return xenon_pb2.Properties()
+
+    @rpc
+    def isOpen(self, request, context):
+        return xenon_pb2.Is(value=request.id in self.schedulers)
+
+    @rpc
+    def close(self, request, context):
+        self.schedulers.pop(request.id, None)
+        return xenon_pb2.Empty()
+
+    @rpc
+    def getFileSystem(self, request, context):
+        return self.schedulers[request.id]
+
+    @rpc
+    def getQueueNames(self, request, context):
+        return xenon_pb2.Queues(name=self.queues)
+
+    @rpc
+    def getDefaultQueueName(self, request, context):
+        return xenon_pb2.Queue(name='single')
+
+    def queue_status(self, name):
+        if name not in self.queues:
+            raise XenonError(
+                grpc.StatusCode.NOT_FOUND, 'NoSuchQueueException',
+                'local adaptor: No such queue: {}'.format(name))
+        return xenon_pb2.QueueStatus(name=name)
+
+    @rpc
+    def getQueueStatus(self, request, context):
+        return self.queue_status(request.queue)
+
+    @rpc
+    def getQueueStatuses(self, request, context):
+        return xenon_pb2.QueueStatuses(statuses=[
+            self.queue_status(q) for q in request.queues or self.queues])
+
+    @rpc
+    def getJobs(self, request, context):
+        queues = set(request.queues)
+        return xenon_pb2.Jobs(jobs=[
+            xenon_pb2.Job(id=job.id) for job in list(self.jobs.values())
+            if job.process.poll() is None and
+            (not queues or (job.description.queue_name or 'single')
+             in queues)])
+
+    @rpc
+    def submitBatchJob(self, request, context):
+        job = self.start(request.description)
+        return xenon_pb2.Job(id=job.id)
+
+    @stream_rpc
+    def submitInteractiveJob(self, request_iterator, context):
+        first = next(request_iterator)
+        job = self.start(first.description, interactive=True)
+        outputs = queue.Queue()
+
+        def feed_stdin():
+            try:
+                if first.stdin:
+                    job.process.stdin.write(first.stdin)
+                    job.process.stdin.flush()
+                for msg in request_iterator:
+                    job.process.stdin.write(msg.stdin)
+                    job.process.stdin.flush()
+            except (BrokenPipeError, ValueError, grpc.RpcError):
+                pass
+            finally:
+                try:
+                    job.process.stdin.close()
+                except BrokenPipeError:
+                    pass
+
+        def read_output(name, stream):
+            for chunk in iter(lambda: os.read(stream.fileno(), 4096), b''):
+                outputs.put((name, chunk))
+            outputs.put((name, None))
+
+        threading.Thread(target=feed_stdin, daemon=True).start()
+        for name in ('stdout', 'stderr'):
+            threading.Thread(
+                target=read_output,
+                args=(name, getattr(job.process, name)),
+                daemon=True).start()
+
+        yield xenon_pb2.SubmitInteractiveJobResponse(
+            job=xenon_pb2.Job(id=job.id))
+
+        open_streams = 2
+        while open_streams:
+            name, chunk = outputs.get()
+            if chunk is None:
+                open_streams -= 1
+                continue
+            yield xenon_pb2.SubmitInteractiveJobResponse(**{name: chunk})
+
+    def job_status(self, job):
+        try:
+            return self.get_job(job).status()
+        except XenonError as e:
+            return xenon_pb2.JobStatus(
+                job=job, state='UNKNOWN', done=True, error_message=e.msg,
+                error_type=xenon_pb2.JobStatus.NOT_FOUND)
+
+    @rpc
+    def getJobStatus(self, request, context):
+        return self.get_job(request.job).status()
+
+    @rpc
+    def getJobStatuses(self, request, context):
+        return xenon_pb2.GetJobStatusesResponse(statuses=[
+            self.job_status(job) for job in request.jobs])
+
+    @rpc
+    def cancelJob(self, request, context):
+        job = self.get_job(request.job)
+        if job.process.poll() is None:
+            job.cancelled = True
+            job.process.kill()
+            job.process.wait()
+        return job.status()
+
+    def wait(self, request, done):
+        job = self.get_job(request.job)
+        deadline = None if not request.timeout \
+            else time.monotonic() + request.timeout / 1000
+        while not done(job):
+            if deadline is not None and time.monotonic() > deadline:
+                break
+            time.sleep(0.01)
+        return job.status()
+
+    @rpc
+    def waitUntilDone(self, request, context):
+        return self.wait(request, lambda job: job.process.poll() is not None)
+
+    @rpc
+    def waitUntilRunning(self, request, context):
+        return self.wait(request, lambda job: True)
+
+
+class FakeXenonServer(object):
+    """In-process GRPC server implementing the file system and scheduler
+    services, with the ``file`` and ``local`` adaptors.
+
+    .. code-block:: python
+
+        server = FakeXenonServer(latency=0.01).start()
+        ...
+        server.stop()
+
+    Usually it is started through ``xenon.init(backend='inprocess')``.
+
+    :param port: the port to listen on; by default a free port is chosen.
+    :param max_workers: number of threads handling calls. Every running
+        interactive job occupies one.
+    :param latency: simulated round-trip time of every call in seconds.
+    :param bandwidth: simulated bandwidth per call in bytes per second.
+    :ivar port: the port the server listens on.
+    :ivar link: the :py:class:`Link`; its settings may be changed while the
+        server runs.
+    """
+    def __init__(self, port=0, max_workers=64, latency=0.0, bandwidth=None):
+        self.link = Link(latency, bandwidth)
+        self.filesystem_service = FakeFileSystemService(self.link)
+        self.scheduler_service = FakeSchedulerService(
+            self.filesystem_service, self.link)
+        self.server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=max_workers))
+        xenon_pb2_grpc.add_FileSystemServiceServicer_to_server(
+            self.filesystem_service, self.server)
+        xenon_pb2_grpc.add_SchedulerServiceServicer_to_server(
+            self.scheduler_service, self.server)
+        self.port = self.server.add_insecure_port('[::]:{}'.format(port))
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.stop()
+
+    def start(self):
+        """Start serving."""
+        self.server.start()
+        return self
+
+    def stop(self):
+        """Stop serving, cancelling running calls, and kill the jobs that
+        are still running."""
+        self.server.stop(None)
+        for job in list(self.scheduler_service.jobs.values()):
+            if job.process.poll() is None:
+                job.process.kill()
+                job.process.wait()
+
+
+def method_cardinalities():
+    """Map the full name of every method of the Xenon-GRPC services to its
+    cardinality, ``'unary_unary'``, ``'unary_stream'``, ``'stream_unary'``
+    or ``'stream_stream'``, as named by the methods of
+    :py:class:`grpc.Channel`."""
+    class Channel(object):
+        def __init__(self):
+            self.methods = {}
+
+        def __getattr__(self, cardinality):
+            def multi_callable(method, *args, **kwargs):
+                self.methods[method] = cardinality
+            return multi_callable
+
+    channel = Channel()
+    xenon_pb2_grpc.FileSystemServiceStub(channel)
+    xenon_pb2_grpc.SchedulerServiceStub(channel)
+    return channel.methods
+
+
+class WanProxy(grpc.GenericRpcHandler):
+    """GRPC proxy that forwards calls to a Xenon-GRPC server over `channel`,
+    through a simulated wide area connection. Calls pass the :py:class:`Link`
+    of their method in `links`, or the default `link`, which delays them,
+    limits their bandwidth and lets a fraction of them fail.
+
+    .. code-block:: python
+
+        proxy = WanProxy(latency=0.08, jitter=0.01).attach()
+        proxy.links['readFromFile'] = Link(latency=0.08, bandwidth=1e7)
+        ...
+        proxy.close()
+
+    :param channel: the channel to the server; :py:meth:`attach` sets it.
+    :param port: the port to listen on; by default a free port is chosen.
+    :param max_workers: number of threads handling calls.
+    :param options: settings of the default :py:class:`Link`.
+    :ivar port: the port the proxy listens on.
+    :ivar link: the default :py:class:`Link`.
+    :ivar links: a dictionary from method names, such as
+        ``'readFromFile'`` or ``'waitUntilDone'``, to the :py:class:`Link`
+        of that method. Both may be changed while the proxy runs.
+    """
+    def __init__(self, channel=None, port=0, max_workers=64, **options):
+        self.channel = channel
+        self.link = Link(**options)
+        self.links = {}
+        self.cardinalities = method_cardinalities()
+        self.server = grpc.server(
+            futures.ThreadPoolExecutor(max_workers=max_workers),
+            handlers=[self])
+        self.port = self.server.add_insecure_port('[::]:{}'.format(port))
+        self._started = False
+        self._restore = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, exc_tb):
+        self.close()
+
+    def start(self):
+        """Start serving, unless the proxy already is."""
+        if not self._started:
+            self.server.start()
+            self._started = True
+        return self
+
+    def close(self):
+        """Stop serving, and restore the channel of the server it was
+        attached to."""
+        self.server.stop(None)
+        if self._restore is not None:
+            server, server.channel, server.file_system_stub, \
+                server.scheduler_stub = self._restore
+            self._restore = None
+
+    def attach(self, server=None):
+        """Start the proxy, and route the calls of `server` (by default the
+        one started by :py:func:`xenon.init`) through it, until
+        :py:meth:`close`. Only file systems, schedulers and other proxies
+        created after that use the proxy."""
+        if server is None:
+            from .server import __server__ as server
+        self._restore = (server, server.channel, server.file_system_stub,
+                         server.scheduler_stub)
+        self.channel = server.channel
+        self.start()
+        server.channel = grpc.insecure_channel(
+            'localhost:{}'.format(self.port))
+        server.file_system_stub = \
+            xenon_pb2_grpc.FileSystemServiceStub(server.channel)
+        server.scheduler_stub = \
+            xenon_pb2_grpc.SchedulerServiceStub(server.channel)
+        return self
+
+    def service(self, handler_call_details):
+        """Implements :py:class:`grpc.GenericRpcHandler`."""
+        method = handler_call_details.method
+        cardinality = self.cardinalities.get(method)
+        if cardinality is None:
+            return None
+        upstream = getattr(self.channel, cardinality)(method)
+        link = self.links.get(method.rsplit('/', 1)[-1], self.link)
+        handler = getattr(grpc, '{}_rpc_method_handler'.format(cardinality))
+        if cardinality.endswith('stream'):
+            return handler(functools.partial(
+                self._stream, upstream, link))
+        return handler(functools.partial(self._unary, upstream, link))
+
+    def _forward(self, upstream, link, request, context):
+        link.delay()
+        link.fault(context)
+        if isinstance(request, bytes):
+            link.transfer(request)
+        else:
+            request = link.messages(request)
+        # calls without a deadline report an enormous time remaining
+        timeout = context.time_remaining()
+        metadata = [(m.key, m.value) for m in context.invocation_metadata()
+                    if m.key != 'user-agent']
+        return upstream(request, metadata=metadata,
+                        timeout=timeout if timeout < 1e9 else None)
+
+    def _unary(self, upstream, link, request, context):
+        try:
+            return link.transfer(
+                self._forward(upstream, link, request, context))
+        except grpc.RpcError as e:
+            context.abort(e.code(), e.details())
+
+    def _stream(self, upstream, link, request, context):
+        try:
+            call = self._forward(upstream, link, request, context)
+            context.add_callback(call.cancel)
+            yield from link.messages(call)
+        except grpc.RpcError as e:
+            context.abort(e.code(), e.details())
@@ -0,0 +1,214 @@
+"""
+Client side rate limiting of job submissions.
+"""
+
+from collections import Counter
+import functools
+import threading
+import time
+
+from .exceptions import (UnknownRpcException, XenonRuntimeException)
+from .oop import unwrap
+from .proto import xenon_pb2
+
+
+POLL_INTERVAL = 0.5
+
+# errors with which the scheduler refuses a submission for lack of capacity
+# or availability, rather than for what was submitted
+REJECTIONS = (XenonRuntimeException, UnknownRpcException)
+
+
+class Throttle(object):
+    """Limits the submissions of a :py:class:`Scheduler`, as enabled with
+    :py:meth:`Scheduler.enable_throttle`. Submissions take a token from a
+    bucket that refills at `rate` tokens per second, up to `burst` tokens,
+    and a place among the queued jobs of the scheduler and of the queue of
+    the job. A place is freed when a status request through the scheduler,
+    such as the polls of a :py:class:`JobMonitor`, shows that the job is
+    done. Submissions block until both are available; meanwhile the jobs
+    holding the places are polled, so that a submission cannot wait forever
+    for a job that nobody else watches.
+
+    When the scheduler rejects a submission, with a
+    :py:class:`XenonRuntimeException` or an unknown error such as an
+    unavailable server, the bucket is emptied, so the next submission waits
+    for a refill. Errors in the submitted description are not counted.
+
+    :ivar rate: tokens added per second, or `None` for no rate limit.
+    :ivar burst: size of the bucket.
+    :ivar max_queued: largest number of unfinished jobs, or `None`.
+    :ivar max_queued_per_queue: largest number of unfinished jobs per queue,
+        either as a number for every queue or as a dictionary mapping queue
+        names to numbers; the default queue is named ``''``.
+    """
+    def __init__(self, rate=None, burst=1, max_queued=None,
+                 max_queued_per_queue=None):
+        self.rate = rate
+        self.burst = burst
+        self.max_queued = max_queued
+        self.max_queued_per_queue = max_queued_per_queue
+        self.tokens = float(burst)
+        self.rejected = 0
+
+        self._updated = time.monotonic()
+        self._queues = Counter()
+        self._jobs = {}
+        self._waiting = 0
+        self._condition = threading.Condition()
+
+    def _refill(self):
+        now = time.monotonic()
+        if self.rate is not None:
+            self.tokens = min(
+                self.burst, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _queue_limit(self, queue):
+        limit = self.max_queued_per_queue
+        if isinstance(limit, dict):
+            return limit.get(queue)
+        return limit
+
+    def _wait_time(self, queue):
+        """Seconds until a submission to `queue` can proceed: zero if it can
+        proceed now, `None` if it waits for a completion."""
+        if self.max_queued is not None and \
+                sum(self._queues.values()) >= self.max_queued:
+            return None
+        limit = self._queue_limit(queue)
+        if limit is not None and self._queues[queue] >= limit:
+            return None
+        if self.rate is None or self.tokens >= 1:
+            return 0
+        return (1 - self.tokens) / self.rate
+
+    def acquire(self, queue='', timeout=None):
+        """Take a token and a place in `queue`, waiting until both are
+        available. Raise `TimeoutError` if that takes longer than `timeout`
+        seconds."""
+        limit = None if timeout is None else time.monotonic() + timeout
+        with self._condition:
+            self._waiting += 1
+            try:
+                while True:
+                    self._refill()
+                    wait = self._wait_time(queue)
+                    if wait == 0:
+                        break
+                    if limit is not None:
+                        remaining = limit - time.monotonic()
+                        if remaining <= 0:
+                            raise TimeoutError(
+                                "Submission throttled for too long.")
+                        wait = remaining if wait is None \
+                            else min(wait, remaining)
+                    self._condition.wait(wait)
+            finally:
+                self._waiting -= 1
+
+            if self.rate is not None:
+                self.tokens -= 1
+            self._queues[queue] += 1
+
+    def settle(self, queue, job_id=None, error=None):
+        """Conclude a submission to `queue` for which :py:meth:`acquire`
+        was called: record the id of the submitted job, or, on `error`, give
+        back the place in the queue."""
+        with self._condition:
+            if job_id is not None:
+                self._jobs[job_id] = queue
+                return
+            self._queues[queue] -= 1
+            if isinstance(error, REJECTIONS):
+                self.rejected += 1
+                self.tokens = min(self.tokens, 0.0)
+            self._condition.notify_all()
+
+    def observe(self, statuses):
+        """Free the places of the jobs that are done in `statuses`."""
+        with self._condition:
+            freed = False
+            for status in statuses:
+                queue = self._jobs.pop(status.job.id, None) \
+                    if status.done else None
+                if queue is not None:
+                    self._queues[queue] -= 1
+                    freed = True
+            if freed:
+                self._condition.notify_all()
+
+    def unfinished(self):
+        """The ids of the submitted jobs that hold a place, as far as the
+        throttle knows."""
+        with self._condition:
+            return list(self._jobs)
+
+    def budget(self):
+        """The current state of the throttle.
+
+        :return: a dictionary with the available `tokens`, the number of
+            unfinished jobs in total (`queued`) and per queue (`queues`),
+            and the number of submissions `waiting`."""
+        with self._condition:
+            self._refill()
+            return {
+                'tokens': self.tokens if self.rate is not None else None,
+                'queued': sum(self._queues.values()),
+                'queues': {q: n for q, n in self._queues.items() if n},
+                'waiting': self._waiting}
+
+
+def wait_for_place(scheduler, throttle, queue):
+    """Acquire a place in `queue` for a submission to `scheduler`. The
+    places may be held by jobs that nobody else polls, such as those of a
+    batch that is still being submitted, so while waiting the statuses of
+    the throttled jobs are requested, which frees those that are done."""
+    while True:
+        try:
+            return throttle.acquire(queue, POLL_INTERVAL)
+        except TimeoutError:
+            jobs = throttle.unfinished()
+            if jobs:
+                scheduler.get_job_statuses(
+                    jobs=[xenon_pb2.Job(id=id_) for id_ in jobs])
+
+
+def throttled_submit(method):
+    """Decorate :py:meth:`Scheduler.submit_batch_job` to pass through the
+    throttle of the scheduler, if any."""
+    @functools.wraps(method)
+    def submit_batch_job(self, *args, **kwargs):
+        throttle = self._throttle
+        if throttle is None:
+            return method(self, *args, **kwargs)
+
+        description = kwargs.get('description', args[0] if args else None)
+        queue = unwrap(description).queue_name
+        wait_for_place(self, throttle, queue)
+        try:
+            job = method(self, *args, **kwargs)
+        except Exception as e:
+            throttle.settle(queue, error=e)
+            raise
+        throttle.settle(queue, job.id)
+        return job
+
+    return submit_batch_job
+
+
+def observing(many=False):
+    """Decorator for a :py:class:`Scheduler` method returning a
+    :py:class:`JobStatus`, or a list of them if `many` is set, to report the
+    statuses to the throttle of the scheduler, if any."""
+    def decorator(method):
+        @functools.wraps(method)
+        def observe(self, *args, **kwargs):
+            result = method(self, *args, **kwargs)
+            if self._throttle is not None:
+                self._throttle.observe(result if many else [result])
+            return result
+
+        return observe
+
+    return decorator
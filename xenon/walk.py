@@ -0,0 +1,77 @@
+"""
+Concurrent traversal of remote directory trees.
+"""
+
+from concurrent.futures import (ThreadPoolExecutor, wait, FIRST_COMPLETED)
+
+import grpc
+
+from .proto import xenon_pb2
+from .exceptions import make_exception
+
+
+def list_directory(filesystem, path):
+    """List the direct contents of `path`, returning the raw
+    `xenon_pb2.PathAttributes` messages. This bypasses the proxy objects
+    created by :py:meth:`FileSystem.list`."""
+    request = xenon_pb2.ListRequest(
+        filesystem=filesystem.__wrapped__,
+        dir=xenon_pb2.Path(path=str(path), separator='/'),
+        recursive=False)
+    try:
+        return list(filesystem.__service__.list(request))
+    except grpc.RpcError as e:
+        raise make_exception(list_directory, e) from None
+
+
+def is_subdirectory(attributes):
+    """Check whether a `PathAttributes` message describes a directory that
+    should be descended into; symbolic links are not followed."""
+    return attributes.is_directory and not attributes.is_symbolic_link
+
+
+def walk(filesystem, root, descend=is_subdirectory, max_workers=8,
+         onerror=None):
+    """Walk a remote directory tree, listing directories concurrently.
+
+    Directory listings are generated in the order in which they complete,
+    so that results stream in while the rest of the tree is being listed.
+    Closing the generator stops the walk.
+
+    :param filesystem: the :py:class:`FileSystem` to walk.
+    :param root: the directory to start in.
+    :param descend: predicate on `xenon_pb2.PathAttributes`, deciding which
+        sub-directories are listed in turn.
+    :param max_workers: maximum number of concurrent list requests.
+    :param onerror: if given, this is called with the exception and the
+        directory when listing a directory fails, and the walk continues;
+        otherwise the exception is raised.
+    :return: generator of `(directory, entries)` tuples, where `directory`
+        is a string and `entries` a list of `xenon_pb2.PathAttributes`.
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        pending = {executor.submit(list_directory, filesystem, root):
+                   str(root)}
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    directory = pending.pop(future)
+                    try:
+                        entries = future.result()
+                    except Exception as e:
+                        if onerror is None:
+                            raise
+                        onerror(e, directory)
+                        continue
+
+                    for entry in entries:
+                        if descend(entry):
+                            pending[executor.submit(
+                                list_directory, filesystem,
+                                entry.path.path)] = entry.path.path
+
+                    yield directory, entries
+        finally:
+            for future in pending:
+                future.cancel()
@@ -0,0 +1,301 @@
+"""
+A workflow of batch jobs, run as a directed acyclic graph.
+"""
+
+from collections import (Counter, deque)
+from concurrent.futures import ThreadPoolExecutor
+import logging
+import threading
+
+from .monitor import JobMonitor
+from .objects import Path
+from .oop import unwrap
+
+
+CHUNK_SIZE = 1 << 20
+
+WAITING = 'waiting'
+STAGING_IN = 'staging-in'
+READY = 'ready'
+SUBMITTED = 'submitted'
+RUNNING = 'running'
+STAGING_OUT = 'staging-out'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+FINAL_STATES = (DONE, FAILED, SKIPPED)
+
+
+def read_chunks(path):
+    with open(path, 'rb') as f:
+        yield from iter(lambda: f.read(CHUNK_SIZE), b'')
+
+
+class Node(object):
+    """A job in a :py:class:`Workflow`.
+
+    :ivar name: the name of the node.
+    :ivar description: the :py:class:`JobDescription` of the job.
+    :ivar parents: the nodes that must be done before this one starts.
+    :ivar inputs: `(local, remote)` pairs of files to upload before the job
+        is submitted.
+    :ivar outputs: `(remote, local)` pairs of files to download after the
+        job completed.
+    :ivar state: one of ``'waiting'``, ``'staging-in'``, ``'ready'``,
+        ``'submitted'``, ``'running'``, ``'staging-out'``, ``'done'``,
+        ``'failed'`` and ``'skipped'``.
+    :ivar job: the :py:class:`Job`, once it is submitted.
+    :ivar status: the final :py:class:`JobStatus` of the job.
+    :ivar error: the exception that made the node fail, if any.
+    """
+    def __init__(self, name, description, parents, inputs, outputs):
+        self.name = name
+        self.description = description
+        self.parents = parents
+        self.children = []
+        self.inputs = inputs
+        self.outputs = outputs
+        self.state = WAITING
+        self.job = None
+        self.status = None
+        self.error = None
+
+    def __repr__(self):
+        return 'Node({!r}, state={!r})'.format(self.name, self.state)
+
+
+class Workflow(object):
+    """Runs a graph of batch jobs on a :py:class:`Scheduler`. A node is
+    submitted as soon as all its parents are done; independent branches
+    run concurrently, up to `max_jobs` jobs at a time. Input files are
+    uploaded and output files downloaded through the :py:class:`FileSystem`
+    on a separate pool of `max_transfers` threads, so transfers overlap
+    with running jobs. Jobs are submitted by a thread of their own, so that
+    slow submissions do not hold up the monitor. The status of all jobs is
+    polled by a single :py:class:`JobMonitor`.
+
+    When a job fails (it ends with an error or a non-zero exit code), or a
+    transfer fails, all its descendants are skipped; other branches
+    continue.
+
+    .. code-block:: python
+
+        workflow = Workflow(scheduler, filesystem, max_jobs=100)
+        workflow.add('prepare', prepare, inputs=[('mesh.dat', 'run/mesh')])
+        for i in range(50):
+            workflow.add('sim-{}'.format(i), simulations[i],
+                         after=['prepare'])
+        workflow.add('reduce', reduce,
+                     after=['sim-{}'.format(i) for i in range(50)],
+                     outputs=[('run/result.csv', 'result.csv')])
+        workflow.run()
+
+    :param scheduler: the :py:class:`Scheduler` to submit to.
+    :param filesystem: the :py:class:`FileSystem` to stage files on.
+    :param max_jobs: maximum number of submitted jobs that are not done.
+    :param max_transfers: number of concurrent staging threads.
+    :param monitor: a :py:class:`JobMonitor` to watch the jobs with; by
+        default one is started for the duration of the run.
+    """
+    def __init__(self, scheduler, filesystem, max_jobs=16, max_transfers=4,
+                 monitor=None):
+        self.scheduler = scheduler
+        self.filesystem = filesystem
+        self.max_jobs = max_jobs
+        self.max_transfers = max_transfers
+        self.monitor = monitor
+        self.nodes = {}
+
+        self._callbacks = []
+        self._lock = threading.RLock()
+        self._finished = threading.Event()
+        self._transfers = None
+        self._submitter = None
+        self._own_monitor = False
+
+        # bookkeeping of the run, updated by `_set_state`
+        self._blocked = {}
+        self._startable = []
+        self._ready = deque()
+        self._active = 0
+        self._remaining = 0
+
+    def add(self, name, description, after=(), inputs=(), outputs=()):
+        """Add a node.
+
+        :param name: a unique name.
+        :param description: the :py:class:`JobDescription`.
+        :param after: names of the nodes this one depends on; they must have
+            been added before.
+        :param inputs: `(local, remote)` pairs of files to upload before the
+            job is submitted.
+        :param outputs: `(remote, local)` pairs of files to download after
+            the job completed.
+        :return: the :py:class:`xenon.workflow.Node`."""
+        if name in self.nodes:
+            raise ValueError("Duplicate node name: {}".format(name))
+        parents = [self.nodes[p] for p in after]
+        node = Node(name, unwrap(description), parents, list(inputs),
+                    list(outputs))
+        for parent in parents:
+            parent.children.append(node)
+        self.nodes[name] = node
+        return node
+
+    def on_change(self, callback):
+        """Register `callback(node, previous_state)` to be called whenever a
+        node changes state."""
+        self._callbacks.append(callback)
+
+    def status(self):
+        """The number of nodes in every state.
+
+        :return: a :py:class:`collections.Counter`."""
+        with self._lock:
+            return Counter(node.state for node in self.nodes.values())
+
+    def _set_state(self, node, state):
+        previous, node.state = node.state, state
+        active = (SUBMITTED, RUNNING)
+        self._active += (state in active) - (previous in active)
+        if state in FINAL_STATES and previous not in FINAL_STATES:
+            self._remaining -= 1
+        if state == READY:
+            self._ready.append(node)
+        elif state == DONE:
+            for child in node.children:
+                self._blocked[child] -= 1
+                if not self._blocked[child] and child.state == WAITING:
+                    self._startable.append(child)
+        for callback in self._callbacks:
+            try:
+                callback(node, previous)
+            except Exception:
+                logging.getLogger('xenon').exception(
+                    "Exception in Workflow callback.")
+
+    def _fail(self, node, error=None):
+        node.error = error
+        self._set_state(node, FAILED)
+        pending = list(node.children)
+        while pending:
+            child = pending.pop()
+            if child.state == WAITING:
+                self._set_state(child, SKIPPED)
+                pending.extend(child.children)
+
+    def start(self):
+        """Start running the workflow in the background."""
+        if self.monitor is None:
+            self.monitor = JobMonitor(self.scheduler).start()
+            self._own_monitor = True
+        with self._lock:
+            self._blocked = {node: len(node.parents)
+                             for node in self.nodes.values()}
+            self._startable = [node for node in self.nodes.values()
+                               if not node.parents]
+            self._remaining = len(self.nodes)
+        self._transfers = ThreadPoolExecutor(self.max_transfers)
+        self._submitter = ThreadPoolExecutor(1)
+        self._advance()
+        return self
+
+    def wait(self, timeout=None):
+        """Wait until all nodes are done, failed or skipped.
+
+        :return: `True` if all nodes succeeded."""
+        if not self._finished.wait(timeout):
+            return False
+        return all(node.state == DONE for node in self.nodes.values())
+
+    def run(self, timeout=None):
+        """Run the workflow and wait for it.
+
+        :return: `True` if all nodes succeeded."""
+        self.start()
+        return self.wait(timeout)
+
+    def _advance(self):
+        """Stage in the nodes whose parents are done, and hand staged nodes
+        to the submitting thread while fewer than `max_jobs` jobs are
+        active."""
+        with self._lock:
+            startable, self._startable = self._startable, []
+            for node in startable:
+                self._set_state(node, STAGING_IN)
+                self._transfers.submit(self._stage_in, node)
+
+            while self._ready and self._active < self.max_jobs:
+                node = self._ready.popleft()
+                if node.state != READY:
+                    continue
+                self._set_state(node, SUBMITTED)
+                self._submitter.submit(self._submit, node)
+
+            finished = not self._remaining and not self._finished.is_set()
+            if finished:
+                self._finished.set()
+
+        if finished:
+            self._transfers.shutdown(wait=False)
+            self._submitter.shutdown(wait=False)
+            if self._own_monitor:
+                threading.Thread(target=self.monitor.stop).start()
+
+    def _submit(self, node):
+        try:
+            node.job = self.scheduler.submit_batch_job(node.description)
+        except Exception as e:
+            with self._lock:
+                self._fail(node, e)
+            self._advance()
+            return
+        self.monitor.watch(node.job, lambda job, status, previous,
+                           node=node: self._transition(node, status))
+
+    def _stage_in(self, node):
+        try:
+            for local, remote in node.inputs:
+                path = Path(str(remote))
+                if self.filesystem.exists(path):
+                    self.filesystem.delete(path)
+                self.filesystem.write_to_file(path, read_chunks(local))
+        except Exception as e:
+            with self._lock:
+                self._fail(node, e)
+        else:
+            with self._lock:
+                self._set_state(node, READY)
+        self._advance()
+
+    def _transition(self, node, status):
+        if not status.done:
+            if status.running and node.state == SUBMITTED:
+                with self._lock:
+                    self._set_state(node, RUNNING)
+            return
+
+        node.status = status
+        with self._lock:
+            if status.error_message or status.exit_code != 0:
+                self._fail(node)
+            else:
+                self._set_state(node, STAGING_OUT)
+                self._transfers.submit(self._stage_out, node)
+        self._advance()
+
+    def _stage_out(self, node):
+        try:
+            for remote, local in node.outputs:
+                with open(local, 'wb') as f:
+                    for chunk in self.filesystem.read_from_file(
+                            Path(str(remote))):
+                        f.write(chunk)
+        except Exception as e:
+            with self._lock:
+                self._fail(node, e)
+        else:
+            with self._lock:
+                self._set_state(node, DONE)
+        self._advance()